@@ -0,0 +1,54 @@
+"""Холодный импорт пакета physics.
+
+Запуск из корня репозитория:
+    python -m benchmarks.import_time
+
+Каждый замер - отдельный процесс интерпретатора. Скрипт завершается с ошибкой,
+если лучший результат превышает бюджет или physics тянет за собой dearpygui.
+"""
+import argparse
+import json
+import subprocess
+import sys
+
+# Бюджет на `import physics` в секундах (без запуска самого интерпретатора)
+IMPORT_BUDGET = 0.05
+
+_PROBE = (
+    "import sys, time\n"
+    "start = time.perf_counter()\n"
+    "import physics\n"
+    "elapsed = time.perf_counter() - start\n"
+    "heavy = [m for m in ('dearpygui', 'numpy') if m in sys.modules]\n"
+    "print(elapsed, ','.join(heavy))\n"
+)
+
+
+def measure(repeats: int = 5):
+    timings = []
+    heavy = set()
+    for _ in range(repeats):
+        output = subprocess.run([sys.executable, "-c", _PROBE], check=True,
+                                capture_output=True, text=True).stdout.split()
+        timings.append(float(output[0]))
+        if len(output) > 1:
+            heavy.update(output[1].split(","))
+    return min(timings), sorted(heavy)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.import_time")
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--budget", type=float, default=IMPORT_BUDGET)
+    args = parser.parse_args(argv)
+
+    best, heavy = measure(args.repeats)
+    print(json.dumps({"import_physics_s": best, "heavy_modules": heavy, "budget_s": args.budget}))
+    if heavy:
+        sys.exit(f"physics импортирует тяжёлые модули: {', '.join(heavy)}")
+    if best > args.budget:
+        sys.exit(f"import physics занимает {best * 1000:.1f} мс (бюджет {args.budget * 1000:.0f} мс)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""Память на один шар.
+
+Запуск из корня репозитория:
+    python -m benchmarks.memory --cols 400 --rows 250
+
+Строит сцену field из cols * rows шаров и замеряет (tracemalloc) память
+самих объектов сцены и память, которую добавляет PhysicsSimulator на
+движке python. После прогона шагов замер повторяется: значения, созданные
+шагом (новые float и кэши), тоже входят в итог. Печатается строка JSON с
+байтами на шар.
+
+Для сравнения замеряется и прежняя раскладка (ключи legacy_*): шар с
+атрибутами в __dict__ и пара PhysicsCalculations/PhysicsVariables на
+каждый шар, как до перехода на __slots__ и общий PhysicsCalculator.
+"""
+import argparse
+import gc
+import json
+import sys
+import tracemalloc
+
+from physics.core import PhysicsSimulator
+from physics.objects import MPP, Ball
+from physics.scenes import field_scene
+
+
+# Атрибуты прежнего Ball в порядке их задания в __init__
+LEGACY_FIELDS = ("x", "y", "radius", "mass", "vx", "vy", "ax", "ay", "color", "fill_color",
+                 "rotation", "rotation_degrees", "angular_velocity", "draw_tag",
+                 "_prev_vx", "_prev_vy")
+
+
+class LegacyBall:
+    """Шар прежней раскладки: те же значения, но в __dict__."""
+
+    def __init__(self, ball):
+        for name in LEGACY_FIELDS:
+            setattr(self, name, getattr(ball, name, None))
+
+    def setup_physics(self, table_line, gravity, mpp):
+        self.physics_vars = LegacyVariables(self, table_line, gravity, mpp)
+        self.physics_calc = LegacyCalculations(self, table_line, gravity, mpp)
+
+
+class LegacyVariables:
+    def __init__(self, ball, table_line, gravity, mpp):
+        self._ball = ball
+        self._table_line = table_line
+        self._gravity = gravity
+        self._mpp = mpp
+
+
+class LegacyCalculations:
+    def __init__(self, ball, table_line, gravity, mpp):
+        self._physics_vars = LegacyVariables(ball, table_line, gravity, mpp)
+
+
+def measure_legacy(cols, rows):
+    """Байты на шар прежней раскладки: (объект шара, сцена, калькуляторы)."""
+    balls = cols * rows
+    gc.collect()
+    tracemalloc.start()
+    objects, table = field_scene(cols=cols, rows=rows)
+    # Значения переходят в __dict__, сами объекты со слотами освобождаются
+    legacy = [LegacyBall(obj) if isinstance(obj, Ball) else obj for obj in objects]
+    del objects
+    gc.collect()
+    scene_bytes, _ = tracemalloc.get_traced_memory()
+    for obj in legacy:
+        if isinstance(obj, LegacyBall):
+            obj.setup_physics(table, 9.8, MPP)
+    calculations_bytes, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    ball = legacy[0]
+    ball_bytes = sys.getsizeof(ball) + sys.getsizeof(ball.__dict__)
+    return ball_bytes, scene_bytes / balls, (calculations_bytes - scene_bytes) / balls
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.memory")
+    parser.add_argument("--cols", type=int, default=400)
+    parser.add_argument("--rows", type=int, default=250)
+    parser.add_argument("--steps", type=int, default=2)
+    args = parser.parse_args(argv)
+    balls = args.cols * args.rows
+    legacy_ball, legacy_scene, legacy_calculations = measure_legacy(args.cols, args.rows)
+
+    gc.collect()
+    tracemalloc.start()
+    objects, table = field_scene(cols=args.cols, rows=args.rows)
+    scene_bytes, _ = tracemalloc.get_traced_memory()
+    simulator = PhysicsSimulator(objects=objects, table_line=table,
+                                 width=int((args.cols + 4) / MPP))
+    simulator_bytes, _ = tracemalloc.get_traced_memory()
+    for _ in range(args.steps):
+        simulator.update(1 / 60)
+    gc.collect()
+    stepped_bytes, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    ball = objects[0]
+    print(json.dumps({
+        "balls": balls,
+        "ball_object_bytes": sys.getsizeof(ball) + sys.getsizeof(getattr(ball, "__dict__", None)
+                                                                  or ()),
+        "has_dict": hasattr(ball, "__dict__"),
+        "scene_bytes_per_ball": scene_bytes / balls,
+        "simulator_bytes_per_ball": (simulator_bytes - scene_bytes) / balls,
+        "total_bytes_per_ball": stepped_bytes / balls,
+        "total_mb": stepped_bytes / 2**20,
+        "legacy_ball_object_bytes": legacy_ball,
+        "legacy_scene_bytes_per_ball": legacy_scene,
+        "legacy_calculations_bytes_per_ball": legacy_calculations,
+    }))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""Масштабирование параллельного движка по числу процессов.
+
+Запуск из корня репозитория:
+    python -m benchmarks.parallel_scaling --cols 250 --rows 200 --workers 1 2 4 8
+
+Для каждого числа рабочих строится одна и та же сцена field (по умолчанию
+50 000 шаров), после разогрева замеряется время steps шагов. Ускорение
+считается относительно одного рабочего; для сравнения замеряется и
+однопроцессный движок numpy. Результаты - по строке JSON на замер.
+"""
+import argparse
+import json
+import os
+import time
+
+from physics.core import PhysicsSimulator
+from physics.objects import MPP
+from physics.scenes import field_scene
+
+
+def measure(engine: str, workers, cols: int, rows: int, steps: int, warmup: int, dt: float):
+    objects, table = field_scene(cols=cols, rows=rows)
+    simulator = PhysicsSimulator(objects=objects, table_line=table,
+                                 width=int((cols + 4) / MPP), gravity=50,
+                                 engine=engine, workers=workers)
+    try:
+        for _ in range(warmup):
+            simulator.update(dt)
+        start = time.perf_counter()
+        for _ in range(steps):
+            simulator.update(dt)
+        return (time.perf_counter() - start) / steps
+    finally:
+        simulator.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.parallel_scaling")
+    parser.add_argument("--cols", type=int, default=250)
+    parser.add_argument("--rows", type=int, default=200)
+    parser.add_argument("--steps", type=int, default=50)
+    parser.add_argument("--warmup", type=int, default=5)
+    parser.add_argument("--dt", type=float, default=1 / 60)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    args = parser.parse_args(argv)
+
+    balls = args.cols * args.rows
+    serial = measure("numpy", None, args.cols, args.rows, args.steps, args.warmup, args.dt)
+    print(json.dumps({"engine": "numpy", "balls": balls, "step_ms": serial * 1000}))
+    baseline = None
+    for workers in args.workers:
+        step = measure("parallel", workers, args.cols, args.rows, args.steps, args.warmup, args.dt)
+        baseline = baseline or step
+        print(json.dumps({"engine": "parallel", "workers": workers, "balls": balls,
+                          "step_ms": step * 1000, "speedup": baseline / step,
+                          "cpu_count": os.cpu_count()}))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""Накладные расходы записи траекторий.
+
+Запуск из корня репозитория:
+    python -m benchmarks.recorder --cols 100 --rows 100 --steps 2000
+
+Сцена field (по умолчанию 10 000 шаров) на движке numpy делает steps шагов
+без записи и с TrajectoryRecorder. Печатается строка JSON: время шага в
+обоих режимах, размер записи на диске и время чтения половины записи для
+одного шара. Пик памяти (tracemalloc) замеряется отдельными прогонами на
+steps и 2 * steps шагов: с числом шагов он расти не должен.
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+import tracemalloc
+
+from physics.core import PhysicsSimulator
+from physics.objects import MPP
+from physics.recorder import TrajectoryReader, TrajectoryRecorder
+from physics.scenes import field_scene
+
+
+def make_simulator(cols, rows, engine):
+    objects, table = field_scene(cols=cols, rows=rows)
+    return PhysicsSimulator(objects=objects, table_line=table, width=int((cols + 4) / MPP),
+                            gravity=50, engine=engine)
+
+
+def timed(simulator, steps, dt):
+    start = time.perf_counter()
+    for _ in range(steps):
+        simulator.update(dt)
+    return (time.perf_counter() - start) / steps
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.recorder")
+    parser.add_argument("--cols", type=int, default=100)
+    parser.add_argument("--rows", type=int, default=100)
+    parser.add_argument("--steps", type=int, default=2000)
+    parser.add_argument("--dt", type=float, default=1 / 60)
+    parser.add_argument("--engine", choices=["python", "numpy"], default="numpy")
+    parser.add_argument("--no-energies", action="store_true")
+    args = parser.parse_args(argv)
+
+    plain = timed(make_simulator(args.cols, args.rows, args.engine), args.steps, args.dt)
+
+    simulator = make_simulator(args.cols, args.rows, args.engine)
+    with tempfile.TemporaryDirectory() as directory:
+        recorder = TrajectoryRecorder(directory, energies=not args.no_energies)
+        recorder.attach(simulator)
+        recorded = timed(simulator, args.steps, args.dt)
+        recorder.close()
+        size = sum(os.path.getsize(os.path.join(directory, name)) for name in os.listdir(directory))
+        with TrajectoryReader(directory) as reader:
+            start = time.perf_counter()
+            times, _ = reader.read("x", t0=0.5 * simulator.t, objects=[simulator._balls[0].handle])
+            read_s = time.perf_counter() - start
+        print(json.dumps({
+            "engine": args.engine, "balls": args.cols * args.rows, "steps": args.steps,
+            "step_ms": plain * 1000, "recorded_step_ms": recorded * 1000,
+            "overhead": recorded / plain - 1, "bytes": size,
+            "read_half_one_ball_s": read_s, "read_steps": len(times),
+            "peak_mb": [peak_memory(args, steps) / 2**20
+                        for steps in (args.steps, 2 * args.steps)],
+        }))
+
+
+def peak_memory(args, steps):
+    simulator = make_simulator(args.cols, args.rows, args.engine)
+    with tempfile.TemporaryDirectory() as directory:
+        tracemalloc.start()
+        with TrajectoryRecorder(directory, energies=not args.no_energies) as recorder:
+            recorder.attach(simulator)
+            timed(simulator, steps, args.dt)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    return peak
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""Сохранение и загрузка сцен: проверка round-trip и время загрузки.
+
+Запуск из корня репозитория:
+    python -m benchmarks.scene_io --cols 500 --rows 200
+
+Строится сцена field (по умолчанию 100 000 шаров), сохраняется в JSON и
+в двоичном формате, затем загружается обратно. Для каждого формата
+печатается строка JSON: размер файла, время сохранения, чтения столбцов и
+создания объектов; round_trip - совпали ли состояния шаров.
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+
+from physics.scene_io import Scene, load_scene, save_scene
+from physics.scenes import field_scene
+
+
+def same_state(a: Scene, b: Scene) -> bool:
+    return all(list(a.balls[name]) == list(b.balls[name]) for name in a.balls) and \
+        all(list(a.lines[name]) == list(b.lines[name]) for name in a.lines)
+
+
+def measure(scene: Scene, path: str):
+    start = time.perf_counter()
+    save_scene(scene, path)
+    saved = time.perf_counter()
+    loaded = load_scene(path)
+    read = time.perf_counter()
+    objects, _ = loaded.to_objects()
+    built = time.perf_counter()
+    return {
+        "format": os.path.splitext(path)[1].lstrip("."),
+        "balls": scene.ball_count,
+        "bytes": os.path.getsize(path),
+        "save_s": saved - start,
+        "load_s": read - saved,
+        "build_s": built - read,
+        "objects": len(objects),
+        "round_trip": same_state(scene, Scene.from_objects(objects)),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.scene_io")
+    parser.add_argument("--cols", type=int, default=500)
+    parser.add_argument("--rows", type=int, default=200)
+    args = parser.parse_args(argv)
+
+    objects, table = field_scene(cols=args.cols, rows=args.rows)
+    scene = Scene.from_objects(objects, table=table)
+    with tempfile.TemporaryDirectory() as directory:
+        for extension in ("json", "scene"):
+            print(json.dumps(measure(scene, os.path.join(directory, f"field.{extension}"))))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""Заглушка dearpygui для бенчмарков GUI-кода.
+
+install() подменяет модуль dearpygui.dearpygui объектом, который ничего не
+рисует, а только считает вызовы (calls). Так замеряется работа самого
+Python-кода MapLoader и RenderSystem, а число вызовов показывает, сколько
+обращений к C API он сделал бы с настоящим dearpygui.
+"""
+import sys
+import types
+
+# Функции dearpygui, которые используются как контекстные менеджеры
+_CONTEXTS = {"child_window", "group", "collapsing_header", "window", "font_registry", "font",
+             "draw_layer", "texture_registry", "draw_node", "item_handler_registry",
+             "handler_registry", "table", "table_row", "mutex"}
+
+
+class _Context:
+    def __init__(self, tag):
+        self.tag = tag
+
+    def __enter__(self):
+        return self.tag
+
+    def __exit__(self, *exc):
+        return False
+
+
+class StubDpg(types.ModuleType):
+    def __init__(self):
+        super().__init__("dearpygui.dearpygui")
+        self.calls = 0
+        self._values = {}
+        self._items = set()
+        self._next_uuid = 10**6
+
+    def _add(self, *args, tag=None, default_value=None, **kwargs):
+        self.calls += 1
+        if tag is None:
+            tag = self.generate_uuid()
+        self._items.add(tag)
+        if default_value is not None:
+            self._values[tag] = default_value
+        return tag
+
+    def generate_uuid(self):
+        self._next_uuid += 1
+        return self._next_uuid
+
+    def does_item_exist(self, tag):
+        self.calls += 1
+        return tag in self._items
+
+    def delete_item(self, tag, children_only=False, **kwargs):
+        self.calls += 1
+        if not children_only:
+            self._items.discard(tag)
+
+    def set_value(self, tag, value):
+        self.calls += 1
+        self._values[tag] = value
+
+    def get_value(self, tag):
+        self.calls += 1
+        return self._values.get(tag)
+
+    def get_frame_count(self):
+        return 0
+
+    def __getattr__(self, name):
+        if name.startswith("__"):
+            raise AttributeError(name)
+        if name in _CONTEXTS:
+            def context(*args, tag=None, **kwargs):
+                return _Context(self._add(tag=tag))
+            return context
+        if name.startswith(("add_", "draw_")):
+            return self._add
+        if name.startswith("mv"):
+            return 0
+
+        def call(*args, **kwargs):
+            self.calls += 1
+        return call
+
+
+def install() -> StubDpg:
+    """Подменяет dearpygui заглушкой (до импорта модулей gui). Возвращает её."""
+    stub = StubDpg()
+    package = types.ModuleType("dearpygui")
+    package.dearpygui = stub
+    sys.modules["dearpygui"] = package
+    sys.modules["dearpygui.dearpygui"] = stub
+    return stub
@@ -0,0 +1,339 @@
+"""Набор бенчмарков ядра физики с отслеживанием регрессий.
+
+Запуск из корня репозитория:
+    python -m benchmarks.suite --sizes 200 1000 --out results.json
+    python -m benchmarks.suite --sizes 200 1000 --baseline benchmarks/baseline.json
+
+Замеряются:
+
+* update         - PhysicsSimulator.update (полный шаг);
+* collisions     - PhysicsSimulator.check_and_resolve_collisions;
+* line_collision - Ball.check_line_collision для всех шаров со столом
+                   (только движок python);
+* info_ui        - MapLoader.update_object_info_ui для видимой страницы панели;
+* render         - RenderSystem.update_draw по объектам (render_objects) и
+                   одним слоем-текстурой (render_batched, нужен NumPy).
+
+Цели GUI работают с заглушкой dearpygui (benchmarks/stub_dpg.py): время -
+это работа Python-кода, а dpg_calls - число вызовов dpg за один замер.
+
+Сцены: free-fall (поле шаров в свободном падении), pile (уложенная куча на
+столе), gas (плотный газ без гравитации) размером 200, 1k, 10k и 100k шаров.
+Каждая строка результата печатается в JSON; --out сохраняет весь прогон.
+
+Каждая цель замеряется в --rounds раундах, раунды идут по всему набору
+по очереди, поэтому фоновая нагрузка размазывается по всем целям. min_ms -
+лучший замер всех раундов, spread - относительный разброс лучших замеров
+раундов (шум машины для этой цели).
+С --baseline результаты сравниваются с сохранённым прогоном: регрессия,
+если min_ms медленнее базового больше чем на --threshold плюс spread
+базового прогона и больше чем на --min-delta мс. Подозрительные цели
+перемеряются ещё --confirm раундами, и регрессией (код выхода 1) остаются
+только те, что медленны и после этого. Так цели в доли миллисекунды не
+дают ложных тревог от дрожания таймера.
+
+Базовый прогон пишется через --save-baseline, в meta записываются машина
+и интерпретатор. Времена зависят от машины: при несовпадении meta
+сравнение печатает предупреждение. benchmarks/baseline.json снят со всеми
+размерами, включая 100k, на обоих движках (--engines python numpy; полный
+прогон идёт около двадцати минут).
+"""
+import argparse
+import json
+import math
+import os
+import platform
+import statistics
+import sys
+import time
+
+from benchmarks.stub_dpg import install
+
+dpg = install()
+
+from gui.map_loader import MapLoader  # noqa: E402 - после подмены dearpygui
+from gui.renderers import RenderSystem  # noqa: E402
+from physics.core import PhysicsSimulator  # noqa: E402
+from physics.objects import MPP, Ball  # noqa: E402
+from physics.scenes import field_scene, gas_scene, pile_scene  # noqa: E402
+
+SIZES = (200, 1000, 10000, 100000)
+DENSITIES = ("free-fall", "pile", "gas")
+TARGETS = ("update", "collisions", "line_collision", "info_ui", "render_objects",
+           "render_batched")
+# Размер drawlist окна, в который рисует RenderSystem
+VIEW_SIZE = (1100, 750)
+
+
+def scene_shape(density, size):
+    """(cols, rows) сцены примерно из size шаров."""
+    if density == "pile":
+        # Куча широкая и невысокая, чтобы лежать на столе, а не оседать
+        rows = max(5, round(math.sqrt(size) / 4))
+    else:
+        rows = max(1, round(math.sqrt(size / 2)))
+    return max(1, round(size / rows)), rows
+
+
+def make_simulator(density, size, engine):
+    cols, rows = scene_shape(density, size)
+    if density == "pile":
+        objects, table = pile_scene(cols=cols, rows=rows)
+    elif density == "gas":
+        objects, table = gas_scene(cols=cols, rows=rows)
+    else:
+        objects, table = field_scene(cols=cols, rows=rows)
+    width = int(max(table.x1, table.x2) + 4 / MPP)
+    return PhysicsSimulator(objects=objects, table_line=table, width=width, engine=engine,
+                            gravity=0.0 if density == "gas" else 9.8)
+
+
+def measure(func, prepare=None, min_time=0.2, min_repeats=3, max_repeats=50):
+    """Повторяет func, пока суммарное время меньше min_time.
+
+    Возвращает (замеры в секундах, вызовы dpg за все замеры); prepare не учитывается.
+    """
+    samples = []
+    calls = 0
+    while len(samples) < max_repeats and (len(samples) < min_repeats or sum(samples) < min_time):
+        if prepare is not None:
+            prepare()
+        calls -= dpg.calls
+        start = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+        calls += dpg.calls
+    return samples, calls
+
+
+class _PanelWindow:
+    """Минимум окна, нужный MapLoader для построения панели."""
+    object_panel_width = 300
+    height = VIEW_SIZE[1]
+    session = None
+
+
+def _shift_balls(balls, simulator=None):
+    # Сдвиг на полпикселя туда и обратно: у каждого шара меняется позиция
+    state = {"sign": 1.0}
+
+    def shift():
+        delta = 0.5 * state["sign"]
+        for ball in balls:
+            ball.x += delta
+        state["sign"] = -state["sign"]
+        if simulator is not None:
+            simulator.invalidate()
+    return shift
+
+
+def make_cases(simulator, target, dt):
+    """(func, prepare) для цели target или None, если она неприменима."""
+    balls = simulator._balls
+    if target == "update":
+        return (lambda: simulator.update(dt)), None
+    if target == "collisions":
+        return simulator.check_and_resolve_collisions, None
+    if target == "line_collision":
+        if simulator.options["engine"] != "python":
+            return None
+        table = simulator.table_line
+
+        def lines():
+            for ball in balls:
+                ball.check_line_collision(table)
+        return lines, None
+    if target == "info_ui":
+        render = RenderSystem(registry=simulator.registry)
+        loader = MapLoader(render, simulator, _PanelWindow())
+        loader.add_objects(simulator.objects)
+        loader.create_ui_for_objects()
+        clock = {"now": 0.0}
+        # Как после шага: шары страницы сдвинуты, величины пересчитываются
+        shift = _shift_balls([obj for obj in loader._slot_objects if isinstance(obj, Ball)],
+                             simulator)
+
+        def prepare():
+            shift()
+            clock["now"] += 1.0
+            # Все строки страницы раскрыты и отмечены обработчиком видимости
+            for group in loader._info_groups:
+                loader._info_visible_callback(None, group)
+        return (lambda: loader.update_object_info_ui(now=clock["now"])), prepare
+    if target in ("render_objects", "render_batched"):
+        batched = target == "render_batched"
+        render = RenderSystem(registry=simulator.registry, batched=batched, size=VIEW_SIZE)
+        if batched and not render.batched:
+            return None
+        for obj in simulator.objects:
+            render.add_object(obj)
+        render.draw_initial("drawlist")
+        return render.update_draw, _shift_balls([obj for obj in simulator.objects
+                                                 if isinstance(obj, Ball)])
+    raise ValueError(f"Неизвестная цель: {target}")
+
+
+def run_case(density, size, engine, target, args):
+    """Один раунд цели: (замеры в секундах, вызовы dpg на замер, число шаров) или None."""
+    simulator = make_simulator(density, size, engine)
+    try:
+        # Прогрев: кэши движка, сетка broad phase, первые контакты
+        for _ in range(2):
+            simulator.update(args.dt)
+        case = make_cases(simulator, target, args.dt)
+        if case is None:
+            return None
+        func, prepare = case
+        gui = target in ("info_ui", "render_objects", "render_batched")
+        samples, calls = measure(func, prepare, args.min_time, args.min_repeats,
+                                 args.max_repeats)
+        return samples, round(calls / len(samples)) if gui else None, len(simulator._balls)
+    finally:
+        simulator.close()
+
+
+def summarize(case, rounds):
+    """Строка результата по раундам одной цели."""
+    target, engine, density, size = case
+    samples = [sample for round_samples, _, _ in rounds for sample in round_samples]
+    bests = [min(round_samples) * 1000 for round_samples, _, _ in rounds]
+    best = min(bests)
+    return {
+        "key": f"{target}/{engine}/{density}/{size}",
+        "target": target, "engine": engine, "density": density, "size": size,
+        "balls": rounds[0][2], "ms": statistics.median(samples) * 1000,
+        "min_ms": best, "spread": (max(bests) - best) / best if best > 0 else 0.0,
+        "rounds": len(rounds), "repeats": len(samples), "dpg_calls": rounds[0][1],
+    }
+
+
+def compare(results, baseline, threshold, min_delta):
+    """Дополняет результаты базовым временем; возвращает список регрессий.
+
+    Сравнивается лучший замер (min_ms): он меньше всего зависит от фоновой
+    нагрузки машины, медиана остаётся для справки. Допуск - threshold плюс
+    разброс раундов базового прогона, но не меньше min_delta мс.
+    """
+    reference = {result["key"]: result for result in baseline["results"]}
+    regressions = []
+    for result in results:
+        base = reference.get(result["key"])
+        if base is None:
+            continue
+        base_ms = base["min_ms"]
+        result["baseline_ms"] = base_ms
+        if base_ms <= 0:
+            result["ratio"] = None
+            continue
+        result["ratio"] = result["min_ms"] / base_ms
+        result["tolerance"] = threshold + base.get("spread", 0.0)
+        if result["ratio"] > 1 + result["tolerance"] and result["min_ms"] - base_ms > min_delta:
+            regressions.append(result)
+    return regressions
+
+
+def machine_meta():
+    """Машина и интерпретатор, на которых снят прогон."""
+    try:
+        import numpy
+        numpy_version = numpy.__version__
+    except ImportError:
+        numpy_version = None
+    return {"python": platform.python_version(),
+            "implementation": platform.python_implementation(),
+            "executable": sys.executable, "numpy": numpy_version,
+            "machine": platform.machine(), "processor": platform.processor(),
+            "cpu_count": os.cpu_count(), "node": platform.node(),
+            "platform": platform.platform()}
+
+
+# Поля meta, при несовпадении которых времена несравнимы
+MACHINE_FIELDS = ("python", "implementation", "machine", "processor", "cpu_count", "node")
+
+
+def measure_rounds(measured, cases, rounds, args):
+    """Добавляет в measured[case] rounds раундов каждой цели, по очереди по всем целям."""
+    for _ in range(max(1, rounds)):
+        for case in cases:
+            if measured[case] is None:
+                continue
+            target, engine, density, size = case
+            result = run_case(density, size, engine, target, args)
+            if result is None:
+                # Цель неприменима (например, line_collision на движке numpy)
+                measured[case] = None
+            else:
+                measured[case].append(result)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.suite")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(SIZES))
+    parser.add_argument("--densities", nargs="+", choices=DENSITIES, default=list(DENSITIES))
+    parser.add_argument("--engines", nargs="+", choices=["python", "numpy"], default=["python"])
+    parser.add_argument("--targets", nargs="+", choices=TARGETS, default=list(TARGETS))
+    parser.add_argument("--dt", type=float, default=1 / 60)
+    parser.add_argument("--min-time", type=float, default=0.2,
+                        help="Минимальное суммарное время замеров одной цели, с")
+    parser.add_argument("--min-repeats", type=int, default=3)
+    parser.add_argument("--max-repeats", type=int, default=200)
+    parser.add_argument("--rounds", type=int, default=3,
+                        help="Число раундов замеров каждой цели")
+    parser.add_argument("--confirm", type=int, default=3,
+                        help="Дополнительные раунды для целей, похожих на регрессию")
+    parser.add_argument("--out", help="Сохранить прогон в JSON")
+    parser.add_argument("--baseline", help="Сравнить с сохранённым прогоном")
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="Допустимое замедление относительно базового прогона")
+    parser.add_argument("--min-delta", type=float, default=0.05,
+                        help="Замедление меньше этого (мс) не считается регрессией")
+    parser.add_argument("--save-baseline", help="Сохранить прогон как базовый")
+    args = parser.parse_args(argv)
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as file:
+            baseline = json.load(file)
+
+    cases = [(target, engine, density, size) for engine in args.engines
+             for density in args.densities for size in args.sizes for target in args.targets]
+    measured = {case: [] for case in cases}
+    measure_rounds(measured, cases, args.rounds, args)
+    results = [summarize(case, rounds) for case, rounds in measured.items() if rounds]
+
+    meta = machine_meta()
+    if baseline:
+        differs = [name for name in MACHINE_FIELDS
+                   if name in baseline["meta"] and baseline["meta"][name] != meta[name]]
+        if differs:
+            print(f"Базовый прогон снят в другом окружении ({', '.join(differs)}): "
+                  "времена могут быть несравнимы", file=sys.stderr)
+    regressions = compare(results, baseline, args.threshold, args.min_delta) if baseline else []
+    if regressions and args.confirm > 0:
+        # Перемер подозрительных целей: шумовой выброс не повторяется
+        suspects = [(result["target"], result["engine"], result["density"], result["size"])
+                    for result in regressions]
+        measure_rounds(measured, suspects, args.confirm, args)
+        results = [summarize(case, rounds) for case, rounds in measured.items() if rounds]
+        regressions = compare(results, baseline, args.threshold, args.min_delta)
+    for result in results:
+        print(json.dumps(result))
+
+    meta.update({"engines": args.engines, "dt": args.dt, "min_time": args.min_time,
+                 "rounds": args.rounds,
+                 "created": time.strftime("%Y-%m-%dT%H:%M:%S")})
+    run = {"meta": meta, "results": results}
+    for path in (args.out, args.save_baseline):
+        if path:
+            with open(path, "w", encoding="utf-8") as file:
+                json.dump(run, file, indent=1)
+    if baseline:
+        print(json.dumps({"compared": sum("baseline_ms" in result for result in results),
+                          "threshold": args.threshold, "min_delta": args.min_delta,
+                          "regressions": [result["key"] for result in regressions]}))
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
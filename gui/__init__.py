@@ -1,5 +1,7 @@
 from .window import Window
 from .map_loader import MapLoader
+from .renderers import RenderSystem
 __all__ = [
-    "Window"
+    "Window",
+    "RenderSystem"
 ]
\ No newline at end of file
@@ -1,145 +1,277 @@
 import dearpygui.dearpygui as dpg
 import math
+import time
+from physics.calculations import ball_info
 from physics.objects import Ball, Line
+from physics.scene_io import Scene, save_scene
 
 class MapLoader:
-    def __init__(self, render_system, physics_simulator, window_instance):
+    def __init__(self, render_system, physics_simulator, window_instance, info_rate: float = 10.0,
+                 page_size: int = 20):
         self.render_system = render_system
         self.physics_simulator = physics_simulator
         self.window = window_instance
+        # Объекты - в общем реестре по handle
+        self.registry = physics_simulator.registry
         self.objects = []
-        self.object_configs = {}
         self.object_properties_tags = {}
         self.object_panel_window_tag = "object_panel_window"
+        # Панель информации обновляется не чаще info_rate раз в секунду и только
+        # для шаров, чей блок сейчас отрисован (раскрыт заголовок и виден на экране)
+        self.info_rate = info_rate
+        self._last_info_update = None
+        self._info_handler_tag = "object_info_visible_handler"
+        self._info_groups = {}
+        self._visible_info = set()
+        self._info_text = {}
+        # Панель показывает page_size строк за раз; строки - постоянный набор
+        # виджетов, которые привязываются к объектам текущей страницы
+        self.page_size = page_size
+        self.page = 0
+        self.filter_text = ""
+        self._labels = []
+        self._filtered = []
+        self._slot_objects = [None] * page_size
+        # Снимок мира для сброса (PhysicsSimulator.snapshot)
+        self.initial_snapshot = None
 
-    def add_object(self, obj, config=None):
-        if config is None:
-            config = self._get_default_config(obj)
-        self.objects.append(obj)
-        self.object_configs[id(obj)] = config.copy() # Сохраняем копию
-        self.render_system.add_object(obj)
+    def add_objects(self, objects):
+        """Добавляет объекты одной пачкой, без словаря конфигурации на каждый объект."""
+        objects = list(objects)
+        register = self.registry.register
+        add_render = self.render_system.add_object
+        first = len(self.objects) + 1
+        for obj in objects:
+            register(obj)
+            add_render(obj)
+        self._labels.extend(f"{obj.__class__.__name__} {number} (ID: {obj.handle})"
+                            for number, obj in enumerate(objects, first))
+        self.objects.extend(objects)
 
-    def _get_default_config(self, obj):
-        if isinstance(obj, Ball):
-            return {
-                'type': 'ball',
-                'cord': (obj.x * self.physics_simulator.mpp, obj.y * self.physics_simulator.mpp),
-                'r': obj.radius * self.physics_simulator.mpp,
-                'mass': obj.mass,
-                'x': obj.x, 'y': obj.y, 'vx': obj.vx, 'vy': obj.vy,
-                'rotation': obj.rotation, 'angular_velocity': obj.angular_velocity
-            }
-        elif isinstance(obj, Line):
-            return {
-                'type': 'line',
-                'p1': (obj.x1 * self.physics_simulator.mpp, obj.y1 * self.physics_simulator.mpp),
-                'p2': (obj.x2 * self.physics_simulator.mpp, obj.y2 * self.physics_simulator.mpp),
-                'thickness': obj.thickness
-            }
-        return {}
+    def capture_initial_state(self):
+        """Запоминает текущее состояние мира как исходное для сброса."""
+        self.initial_snapshot = self.physics_simulator.snapshot()
+
+    def save_scene(self, path: str):
+        """Сохраняет текущее состояние сцены (.json или двоичный формат)."""
+        save_scene(Scene.from_objects(self.objects, table=self.physics_simulator.table_line), path)
 
     def create_ui_for_objects(self):
+        """Строит панель объектов: поиск, страницы и постоянный набор строк.
+
+        Строк всегда page_size, и они переиспользуются для разных объектов,
+        поэтому число элементов dearpygui не зависит от размера сцены.
+        """
         if dpg.does_item_exist(self.object_panel_window_tag):
             dpg.delete_item(self.object_panel_window_tag)
+        if not dpg.does_item_exist(self._info_handler_tag):
+            with dpg.item_handler_registry(tag=self._info_handler_tag):
+                dpg.add_item_visible_handler(callback=self._info_visible_callback)
+        self._info_groups.clear()
+        self._visible_info.clear()
+        self._info_text.clear()
 
         with dpg.child_window(tag=self.object_panel_window_tag, width=self.window.object_panel_width, height=self.window.height, parent="main_window_group"):
             dpg.add_text("Объекты", color=(255, 255, 0))
+            dpg.add_input_text(hint="Поиск (например, Ball 12)", tag="object_filter",
+                               callback=self._filter_callback)
+            with dpg.group(horizontal=True):
+                dpg.add_button(label="<", callback=self._page_callback, user_data=-1)
+                dpg.add_text("", tag="object_page_label")
+                dpg.add_button(label=">", callback=self._page_callback, user_data=1)
             self.object_properties_tags.clear()
-            for i, obj in enumerate(self.objects):
-                obj_id = id(obj)
-                header_label = f"{obj.__class__.__name__} {i+1} (ID: {obj_id})"
-                header_tag = f"obj_header_{obj_id}"
-                with dpg.collapsing_header(label=header_label, tag=header_tag, default_open=False):
-                    if isinstance(obj, Ball):
-                        props_tag = f"ball_props_{obj_id}"
-                        self.object_properties_tags[obj_id] = props_tag
-                        with dpg.group(tag=props_tag):
-                            dpg.add_slider_float(label="Масса", default_value=obj.mass,
-                                                 min_value=0.1, max_value=10.0, format="%.2f",
-                                                 tag=f"mass_{obj_id}", callback=self._update_object_property_callback)
-                            dpg.add_slider_float(label="Радиус", default_value=obj.radius * self.physics_simulator.mpp,
-                                                 min_value=1.0, max_value=50.0, format="%.1f",
-                                                 tag=f"radius_{obj_id}", callback=self._update_object_property_callback)
-                            dpg.add_slider_float(label="Вращение", default_value=obj.rotation_degrees,
-                                                 min_value=0, max_value=360, format="%.1f",
-                                                 tag=f"rotation_{obj_id}", callback=self._update_object_property_callback)
-
-                            dpg.add_text("", tag=f"info_pos_{obj_id}")
-                            dpg.add_text("", tag=f"info_vel_{obj_id}")
-                            dpg.add_text("", tag=f"info_energy_{obj_id}")
-                            dpg.add_text("", tag=f"info_forces_{obj_id}")
-                    elif isinstance(obj, Line):
-                        props_tag = f"line_props_{obj_id}"
-                        self.object_properties_tags[obj_id] = props_tag
-                        with dpg.group(tag=props_tag):
-                            dpg.add_slider_float(label="Толщина", default_value=obj.thickness,
-                                                 min_value=1, max_value=20, format="%.0f",
-                                                 tag=f"thickness_{obj_id}", callback=self._update_object_property_callback)
-
-    def _update_object_property_callback(self, sender, app_data):
-        # sender имеет формат "type_property_object_id" например "mass_12345"
-        parts = sender.split('_')
-        if len(parts) < 3:
-            return
-        prop_type = parts[0]
-        obj_id_str = '_'.join(parts[1:]) # Обрабатываем ID с подчеркиваниями
-        obj_id = int(obj_id_str)
-        obj = next((o for o in self.objects if id(o) == obj_id), None)
+            for slot in range(self.page_size):
+                with dpg.collapsing_header(label="", tag=f"obj_row_{slot}", default_open=False, show=False):
+                    with dpg.group(tag=f"ball_props_{slot}"):
+                        dpg.add_slider_float(label="Масса", min_value=0.1, max_value=10.0, format="%.2f",
+                                             tag=f"mass_{slot}", user_data=slot,
+                                             callback=self._update_object_property_callback)
+                        dpg.add_slider_float(label="Радиус", min_value=1.0, max_value=50.0, format="%.1f",
+                                             tag=f"radius_{slot}", user_data=slot,
+                                             callback=self._update_object_property_callback)
+                        dpg.add_slider_float(label="Вращение", min_value=0, max_value=360, format="%.1f",
+                                             tag=f"rotation_{slot}", user_data=slot,
+                                             callback=self._update_object_property_callback)
+
+                        info_group = dpg.generate_uuid()
+                        with dpg.group(tag=info_group):
+                            dpg.add_text("", tag=f"info_pos_{slot}")
+                            dpg.add_text("", tag=f"info_vel_{slot}")
+                            dpg.add_text("", tag=f"info_energy_{slot}")
+                            dpg.add_text("", tag=f"info_forces_{slot}")
+                        self._info_groups[info_group] = slot
+                        dpg.bind_item_handler_registry(info_group, self._info_handler_tag)
+                    with dpg.group(tag=f"line_props_{slot}"):
+                        dpg.add_slider_float(label="Толщина", min_value=1, max_value=20, format="%.0f",
+                                             tag=f"thickness_{slot}", user_data=slot,
+                                             callback=self._update_object_property_callback)
+        self._apply_filter()
+
+    def _filter_callback(self, sender, app_data):
+        self.filter_text = app_data or ""
+        self.page = 0
+        self._apply_filter()
+
+    def _page_callback(self, sender, app_data, user_data):
+        self.page += user_data
+        self.refresh_object_rows()
+
+    def _apply_filter(self):
+        query = self.filter_text.strip().lower()
+        if query:
+            self._filtered = [i for i, label in enumerate(self._labels) if query in label.lower()]
+        else:
+            self._filtered = range(len(self.objects))
+        self.refresh_object_rows()
+
+    def refresh_object_rows(self):
+        """Привязывает строки панели к объектам текущей страницы и обновляет их значения."""
+        pages = max(1, math.ceil(len(self._filtered) / self.page_size))
+        self.page = min(max(self.page, 0), pages - 1)
+        first = self.page * self.page_size
+        page_indices = self._filtered[first:first + self.page_size]
+        dpg.set_value("object_page_label", f"Страница {self.page + 1}/{pages} ({len(self._filtered)})")
+        self.object_properties_tags.clear()
+        for slot in range(self.page_size):
+            self._slot_objects[slot] = (self.objects[page_indices[slot]]
+                                        if slot < len(page_indices) else None)
+        sim_thread = getattr(self.window, "sim_thread", None)
+        if sim_thread is not None:
+            # Кадры симуляции будут содержать состояние шаров этой страницы
+            sim_thread.watch(self._slot_objects)
+        for slot in range(self.page_size):
+            obj = self._slot_objects[slot]
+            # Текст информации прошлого объекта строки больше не действителен
+            for kind in ("pos", "vel", "energy", "forces"):
+                self._info_text.pop(f"info_{kind}_{slot}", None)
+            self._visible_info.discard(slot)
+            row_tag = f"obj_row_{slot}"
+            if obj is None:
+                dpg.configure_item(row_tag, show=False)
+                continue
+            is_ball = isinstance(obj, Ball)
+            dpg.configure_item(row_tag, show=True, label=self._labels[page_indices[slot]])
+            dpg.configure_item(f"ball_props_{slot}", show=is_ball)
+            dpg.configure_item(f"line_props_{slot}", show=not is_ball)
+            if is_ball:
+                self.object_properties_tags[obj.handle] = f"ball_props_{slot}"
+                info = self._ball_info(obj)
+                dpg.set_value(f"mass_{slot}", info.mass)
+                dpg.set_value(f"radius_{slot}", info.radius)
+                dpg.set_value(f"rotation_{slot}", info.rotation_degrees)
+            elif isinstance(obj, Line):
+                self.object_properties_tags[obj.handle] = f"line_props_{slot}"
+                dpg.set_value(f"thickness_{slot}", obj.thickness)
+
+    def _update_object_property_callback(self, sender, app_data, user_data):
+        # sender - тег вида "type_slot", например "mass_3"; user_data - номер строки
+        prop_type = sender.split('_')[0]
+        obj = self._slot_objects[user_data]
         if not obj:
             return
         value = dpg.get_value(sender)
+        values = {}
         if isinstance(obj, Ball):
             if prop_type == "mass":
-                obj.mass = value
+                values["mass"] = value
             elif prop_type == "radius":
-                old_radius = obj.radius
-                new_radius = value / self.physics_simulator.mpp
-                obj.radius = new_radius
-                obj.mass *= (new_radius / old_radius) ** 2
+                # Масса пересчитывается пропорционально площади в _apply_properties
+                values["radius"] = value / self.physics_simulator.mpp
             elif prop_type == "rotation":
-                obj.rotation = math.radians(value)
-                obj.rotation_degrees = value
+                values["rotation"] = math.radians(value)
+                values["rotation_degrees"] = value
         elif isinstance(obj, Line):
             if prop_type == "thickness":
-                obj.thickness = value
+                values["thickness"] = value
+        # Команда ссылается на объект по handle: при потоке симуляции она
+        # выполнится в нём, между шагами, когда строка панели может быть уже другой
+        apply = getattr(self.window, "apply_to_simulation", None)
+        if apply is not None:
+            apply(self._apply_properties, obj.handle, values)
+        else:
+            self._apply_properties(obj.handle, values)
+
+    def _apply_properties(self, handle, values):
+        obj = self.registry.get(handle)
+        if obj is None:
+            return
+        if "radius" in values and "mass" not in values:
+            values = dict(values, mass=obj.mass * (values["radius"] / obj.radius) ** 2)
+        session = getattr(self.window, "session", None)
+        if session is not None:
+            # Детерминированный режим: правка ждёт границы шага и пишется в журнал
+            session.set_properties(obj, **values)
+            return
+        for name, new_value in values.items():
+            setattr(obj, name, new_value)
+        # Изменённый шар (и его остров) должен снова участвовать в симуляции
+        self.physics_simulator.wake(obj)
 
     def reset_all_objects(self):
-        for obj in self.objects:
-            obj_id = id(obj)
-            config = self.object_configs.get(obj_id)
-            if config:
-                if isinstance(obj, Ball):
-                    obj.x = config['x']
-                    obj.y = config['y']
-                    obj.vx = config['vx']
-                    obj.vy = config['vy']
-                    obj.rotation = config['rotation']
-                    obj.angular_velocity = config['angular_velocity']
-                    obj.rotation_degrees = math.degrees(obj.rotation)
-                # Линию не сбрасываем, т.к. она статичная
-        self.physics_simulator.reset_time()
-
-    def update_object_info_ui(self):
-        for obj in self.objects:
-            obj_id = id(obj)
-            # Обновляем информацию для шаров
-            if isinstance(obj, Ball) and hasattr(obj, 'physics_calc'):
-                ke = obj.physics_calc.kinetic_energy
-                pe = obj.physics_calc.potential_energy
-                total_energy = obj.physics_calc.total_energy
-                momentum = obj.physics_calc.momentum
-                velocity = obj.physics_calc.velocity_magnitude
-                acceleration = obj.physics_calc.acceleration
-                gravity_force = obj.physics_calc.gravity_force
-                friction_force = obj.physics_calc.friction_force
-                elastic_force = obj.physics_calc.elastic_force
-
-                pos_text = f"Позиция (м): ({obj.x * self.physics_simulator.mpp:.2f}, {obj.y * self.physics_simulator.mpp:.2f})"
-                vel_text = f"Скорость (м/с): ({obj.vx * self.physics_simulator.mpp:.2f}, {obj.vy * self.physics_simulator.mpp:.2f}), Вел: {velocity:.2f}"
-                energy_text = f"Энергии (J): K={ke:.2f}, P={pe:.2f}, T={total_energy:.2f}"
-                forces_text = f"Силы (N): G={gravity_force:.2f}, F={friction_force:.2f}, E={elastic_force:.2f}, A={acceleration:.2f} (м/с²)"
-
-                dpg.set_value(f"info_pos_{obj_id}", pos_text)
-                dpg.set_value(f"info_vel_{obj_id}", vel_text)
-                dpg.set_value(f"info_energy_{obj_id}", energy_text)
-                dpg.set_value(f"info_forces_{obj_id}", forces_text)
+        # Полное состояние, включая массу и радиус; параметры мира
+        # остаются такими, как их задали ползунки
+        self.physics_simulator.restore(self.initial_snapshot, parameters=False)
+
+    def _info_visible_callback(self, sender, app_data):
+        # app_data - id группы с информацией, которая отрисована в этом кадре
+        slot = self._info_groups.get(app_data)
+        if slot is None or self._slot_objects[slot] is None:
+            return
+        if slot not in self._visible_info:
+            self._visible_info.add(slot)
+            # Только что раскрытую строку заполняем сразу, не дожидаясь таймера
+            if f"info_pos_{slot}" not in self._info_text:
+                self._write_object_info(slot)
+
+    def update_object_info_ui(self, now: float = None):
+        """Обновляет информацию видимых шаров, не чаще info_rate раз в секунду."""
+        now = time.perf_counter() if now is None else now
+        if (self._last_info_update is not None and self.info_rate > 0 and
+                now - self._last_info_update < 1.0 / self.info_rate):
+            return
+        self._last_info_update = now
+        # Видимые строки заново отметятся обработчиком в следующих кадрах
+        visible = self._visible_info
+        self._visible_info = set()
+        for slot in visible:
+            self._write_object_info(slot)
+
+    def _set_info_text(self, tag, text):
+        # Пропускаем запись, если текст не изменился
+        if self._info_text.get(tag) != text:
+            self._info_text[tag] = text
+            dpg.set_value(tag, text)
+
+    def _ball_info(self, obj):
+        """BallInfo шара: из опубликованного кадра при потоке симуляции, иначе - сразу."""
+        sim_thread = getattr(self.window, "sim_thread", None)
+        if sim_thread is not None:
+            return sim_thread.frame.info.get(obj.handle)
+        return ball_info(self.physics_simulator, obj)
+
+    def _write_object_info(self, slot):
+        obj = self._slot_objects[slot]
+        # Обновляем информацию для шаров
+        info = self._ball_info(obj) if isinstance(obj, Ball) else None
+        if info is not None:
+            # Величины считаются один раз за шаг симуляции
+            values = info.quantities
+            ke = values.kinetic_energy
+            pe = values.potential_energy
+            total_energy = values.total_energy
+            momentum = values.momentum
+            velocity = values.velocity_magnitude
+            acceleration = values.acceleration
+            gravity_force = values.gravity_force
+            friction_force = values.friction_force
+            elastic_force = values.elastic_force
+
+            pos_text = f"Позиция (м): ({info.x:.2f}, {info.y:.2f})"
+            vel_text = f"Скорость (м/с): ({info.vx:.2f}, {info.vy:.2f}), Вел: {velocity:.2f}"
+            energy_text = f"Энергии (J): K={ke:.2f}, P={pe:.2f}, T={total_energy:.2f}"
+            forces_text = f"Силы (N): G={gravity_force:.2f}, F={friction_force:.2f}, E={elastic_force:.2f}, A={acceleration:.2f} (м/с²)"
+
+            self._set_info_text(f"info_pos_{slot}", pos_text)
+            self._set_info_text(f"info_vel_{slot}", vel_text)
+            self._set_info_text(f"info_energy_{slot}", energy_text)
+            self._set_info_text(f"info_forces_{slot}", forces_text)
@@ -0,0 +1,132 @@
+import dearpygui.dearpygui as dpg
+from physics.objects import Ball, Line
+from physics.registry import ObjectRegistry
+
+
+class BallRenderer:
+    """Отрисовка Ball кругом на drawlist."""
+
+    def __init__(self, ball):
+        self.obj = ball
+        self.draw_tag = None
+        # Последние отправленные в dpg центр и радиус
+        self._drawn = None
+
+    def draw(self, drawlist_tag: str):
+        ball = self.obj
+        self.draw_tag = f"ball_{ball.handle}"
+        dpg.draw_circle([ball.x, ball.y], ball.radius, color=ball.color,
+                        fill=ball.fill_color, parent=drawlist_tag, tag=self.draw_tag)
+        self._drawn = (ball.x, ball.y, ball.radius)
+
+    def update_draw(self, position_source=None, radius_source=None):
+        if self.draw_tag is None:
+            return
+        ball = self.obj
+        x, y = position_source(ball) if position_source else (ball.x, ball.y)
+        radius = radius_source(ball) if radius_source else ball.radius
+        state = (x, y, radius)
+        # Неподвижный шар не трогаем
+        if state != self._drawn:
+            dpg.configure_item(self.draw_tag, center=[x, y], radius=radius)
+            self._drawn = state
+
+
+class LineRenderer:
+    """Отрисовка Line отрезком на drawlist."""
+
+    def __init__(self, line):
+        self.obj = line
+        self.draw_tag = None
+        self._drawn = None
+
+    def draw(self, drawlist_tag: str):
+        line = self.obj
+        self.draw_tag = f"line_{line.handle}"
+        dpg.draw_line([line.x1, line.y1], [line.x2, line.y2],
+                      color=line.color, thickness=line.thickness,
+                      parent=drawlist_tag, tag=self.draw_tag)
+        self._drawn = (line.x1, line.y1, line.x2, line.y2)
+
+    def update_draw(self, position_source=None, radius_source=None):
+        if self.draw_tag is None:
+            return
+        line = self.obj
+        state = (line.x1, line.y1, line.x2, line.y2)
+        if state != self._drawn:
+            dpg.configure_item(self.draw_tag, p1=[line.x1, line.y1], p2=[line.x2, line.y2])
+            self._drawn = state
+
+
+# Адаптер отрисовки для каждого типа объекта модели
+RENDERERS = {
+    Ball: BallRenderer,
+    Line: LineRenderer,
+}
+
+
+def make_renderer(obj):
+    for cls in type(obj).__mro__:
+        renderer_cls = RENDERERS.get(cls)
+        if renderer_cls is not None:
+            return renderer_cls(obj)
+    raise TypeError(f"Нет адаптера отрисовки для {type(obj).__name__}")
+
+
+def make_ball_layer(width, height):
+    """Пакетный слой шаров (BallTextureLayer) или None, если нет NumPy."""
+    try:
+        from .texture_layer import BallTextureLayer
+    except ImportError:
+        return None
+    return BallTextureLayer(width, height)
+
+
+class RenderSystem:
+    """Отрисовка сцены.
+
+    При batched=True шары рисуются одним слоем-текстурой (см.
+    BallTextureLayer): кадр обходится без вызовов dpg на каждый шар. Без
+    NumPy или при batched=False используются адаптеры на каждый объект;
+    они тоже пропускают объекты, которые не сдвинулись.
+    """
+
+    def __init__(self, registry: ObjectRegistry = None, batched: bool = False,
+                 size=(0, 0)):
+        self.objects = []
+        self.renderers = []
+        # Реестр объектов сцены: теги отрисовки строятся по obj.handle
+        self.registry = registry if registry is not None else ObjectRegistry()
+        # Функция ball -> (x, y) для интерполированных позиций и ball -> радиус
+        # (None - текущие значения шара; в потоке симуляции - из StateFrame)
+        self.position_source = None
+        self.radius_source = None
+        self.ball_layer = make_ball_layer(*size) if batched else None
+
+    @property
+    def batched(self):
+        return self.ball_layer is not None
+
+    def add_object(self, obj):
+        self.registry.register(obj)
+        self.objects.append(obj)
+        if self.ball_layer is not None and isinstance(obj, Ball):
+            self.ball_layer.add(obj)
+        else:
+            self.renderers.append(make_renderer(obj))
+
+    def draw_initial(self, drawlist_tag):
+        for renderer in self.renderers:
+            renderer.draw(drawlist_tag)
+        if self.ball_layer is not None:
+            self.ball_layer.draw(drawlist_tag)
+
+    def resize(self, width, height):
+        if self.ball_layer is not None:
+            self.ball_layer.resize(width, height)
+
+    def update_draw(self):
+        for renderer in self.renderers:
+            renderer.update_draw(self.position_source, self.radius_source)
+        if self.ball_layer is not None:
+            self.ball_layer.update_draw(self.position_source, self.radius_source)
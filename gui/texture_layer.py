@@ -0,0 +1,119 @@
+import dearpygui.dearpygui as dpg
+import numpy as np
+
+
+def _rgba(color):
+    return tuple(color) + (255,) * (4 - len(color))
+
+
+def _disk_offsets(radius: int):
+    """Смещения пикселей круга радиуса radius: (заливка, контур толщиной в 1 пиксель)."""
+    span = np.arange(-radius - 1, radius + 2)
+    dy, dx = np.meshgrid(span, span, indexing="ij")
+    dist = np.sqrt(dx**2 + dy**2)
+    fill = dist < radius - 0.5
+    ring = ~fill & (dist < radius + 0.5)
+    return dy[fill], dx[fill], dy[ring], dx[ring]
+
+
+class BallTextureLayer:
+    """Пакетная отрисовка всех шаров в одну текстуру.
+
+    Шары растеризуются средствами NumPy в буфер raw-текстуры, которая
+    показана на drawlist одним draw_image. Буфер dearpygui читает напрямую,
+    поэтому кадр не требует вызовов dpg на каждый шар; если ни один шар не
+    сдвинулся, буфер не перерисовывается.
+    """
+
+    def __init__(self, width: int, height: int, tag: str = "balls_layer"):
+        self.width = int(width)
+        self.height = int(height)
+        self.balls = []
+        self.texture_tag = f"{tag}_texture"
+        self.image_tag = f"{tag}_image"
+        self._buffer = None
+        self._sprites = {}
+        self._fill = None
+        self._outline = None
+        self._last_state = None
+        # Источники позиций и радиусов последнего кадра: ими же перерисовывается
+        # текстура после draw и resize
+        self._sources = (None, None)
+
+    def add(self, ball):
+        self.balls.append(ball)
+        self._fill = None
+
+    def draw(self, drawlist_tag: str):
+        self._create_texture()
+        dpg.draw_image(self.texture_tag, (0, 0), (self.width, self.height),
+                       parent=drawlist_tag, tag=self.image_tag)
+        self.update_draw(*self._sources, force=True)
+
+    def resize(self, width: int, height: int):
+        """Пересоздаёт текстуру под новый размер drawlist."""
+        self.width = int(width)
+        self.height = int(height)
+        if self._buffer is None:
+            return
+        dpg.delete_item(self.texture_tag)
+        self._create_texture()
+        dpg.configure_item(self.image_tag, texture_tag=self.texture_tag,
+                           pmax=(self.width, self.height))
+        self.update_draw(*self._sources, force=True)
+
+    def _create_texture(self):
+        self._buffer = np.zeros((self.height, self.width, 4), dtype=np.float32)
+        # Пиксель RGBA (4 x float32) как одно 16-байтное значение: так
+        # запись по плоскому индексу копирует пиксель целиком за раз
+        self._pixels = self._buffer.view(np.complex128).reshape(-1)
+        with dpg.texture_registry():
+            dpg.add_raw_texture(self.width, self.height, self._buffer.reshape(-1),
+                                format=dpg.mvFormat_Float_rgba, tag=self.texture_tag)
+
+    def update_draw(self, position_source=None, radius_source=None, force: bool = False):
+        self._sources = (position_source, radius_source)
+        if self._buffer is None or not self.balls:
+            return
+        if position_source is None:
+            positions = [(ball.x, ball.y) for ball in self.balls]
+        else:
+            positions = [position_source(ball) for ball in self.balls]
+        state = np.empty((len(self.balls), 3))
+        state[:, :2] = positions
+        if radius_source is None:
+            state[:, 2] = [ball.radius for ball in self.balls]
+        else:
+            state[:, 2] = [radius_source(ball) for ball in self.balls]
+        if not force and self._last_state is not None and np.array_equal(state, self._last_state):
+            return
+        self._last_state = state
+        if self._fill is None:
+            self._fill = np.array([_rgba(ball.fill_color) for ball in self.balls],
+                                  dtype=np.float32) / 255
+            self._outline = np.array([_rgba(ball.color) for ball in self.balls],
+                                     dtype=np.float32) / 255
+            self._fill = self._fill.view(np.complex128).reshape(-1)
+            self._outline = self._outline.view(np.complex128).reshape(-1)
+
+        self._buffer.fill(0.0)
+        centers_x = np.rint(state[:, 0]).astype(np.int64)
+        centers_y = np.rint(state[:, 1]).astype(np.int64)
+        radii = np.maximum(np.rint(state[:, 2]).astype(np.int64), 1)
+        for radius in np.unique(radii):
+            sprite = self._sprites.get(radius)
+            if sprite is None:
+                sprite = self._sprites[radius] = _disk_offsets(int(radius))
+            fill_dy, fill_dx, ring_dy, ring_dx = sprite
+            chosen = np.flatnonzero(radii == radius)
+            self._stamp(centers_x[chosen], centers_y[chosen], fill_dy, fill_dx,
+                        self._fill[chosen])
+            self._stamp(centers_x[chosen], centers_y[chosen], ring_dy, ring_dx,
+                        self._outline[chosen])
+
+    def _stamp(self, cx, cy, dy, dx, colors):
+        py = cy[:, None] + dy[None, :]
+        px = cx[:, None] + dx[None, :]
+        inside = (px >= 0) & (px < self.width) & (py >= 0) & (py < self.height)
+        values = np.broadcast_to(colors[:, None], py.shape)
+        self._pixels[(py * self.width + px)[inside]] = values[inside]
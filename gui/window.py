@@ -1,11 +1,18 @@
 import dearpygui.dearpygui as dpg
 import math
 import os
-from physics import Ball, Line, PhysicsSimulator
+import time
+from physics import Ball, Line, PhysicsSimulator, FixedTimestep, ObjectRegistry, SnapshotRing
+from physics.profiling import Profiler
+from physics.replay import DeterministicSession
+from physics.threaded import SimulationThread
+from physics.scene_io import load_scene
 from .map_loader import MapLoader
+from .renderers import RenderSystem
 
 class Window:
-    def __init__(self, width=1200, height=700, objects=None):
+    def __init__(self, width=1200, height=700, objects=None, batched_render=True, scene=None,
+                 deterministic=False, profile=False, threaded=False, solver="pairwise"):
         self.width = width
         self.height = height
         self.fps = 60
@@ -15,12 +22,22 @@ class Window:
         self.bounce = 0.8
         self.friction = 0.999
         self.time_scale = 1.0
+        self.substeps = 1
         self.sidebar_width = 250
         self.object_panel_width = 300
+        # Частота обновления текстовой информации об объектах (Гц)
+        self.info_rate = 10
 
         self.calculate_render_sizes()
 
-        if objects is None:
+        # scene - путь к файлу сцены (.json или двоичный), вместо objects
+        self.scene_path = scene
+        loaded_scene = load_scene(scene) if scene is not None else None
+        if loaded_scene is not None:
+            self.objects, self.table = loaded_scene.to_objects()
+            if not self.table:
+                raise ValueError("В сцене нет линии стола.")
+        elif objects is None:
             self.ball = Ball(cord=(10, 20), r=5)
             self.table = Line(p1=(0, 40), p2=(100, 50))
             self.objects = [self.ball, self.table]
@@ -31,7 +48,11 @@ class Window:
                 raise ValueError("Не найден объект Line для стола.")
 
 
-        self.renderer = RenderSystem()
+        # Один реестр объектов на физику, отрисовку и панель объектов
+        self.registry = ObjectRegistry()
+        # Шары рисуются одним слоем-текстурой, если доступен NumPy
+        self.renderer = RenderSystem(self.registry, batched=batched_render,
+                                     size=(self.drawlist_width, self.drawlist_height))
         self.physics = PhysicsSimulator(
             objects=self.objects,
             table_line=self.table,
@@ -39,14 +60,44 @@ class Window:
             gravity=self.gravity,
             bounce=self.bounce,
             friction=self.friction,
-            mpp=self.MPP
+            mpp=self.MPP,
+            sleeping=True,
+            # "pairwise" - как раньше, "sequential" - итеративный решатель контактов
+            solver=solver,
+            registry=self.registry
         )
+        # Детерминированный режим: правки применяются на границах шагов и пишутся
+        # в журнал, который воспроизводится командой python -m physics.replay
+        self.session = DeterministicSession(self.physics) if deterministic else None
+        # Физика идёт фиксированными шагами dt по реальному времени: в кадре GUI
+        # или, при threaded=True, в своём потоке, независимо от частоты кадров
+        if threaded:
+            self.sim_thread = SimulationThread(self.physics, self.session or self.physics,
+                                               dt=self.dt, substeps=self.substeps)
+            self.timestep = self.sim_thread.timestep
+        else:
+            self.sim_thread = None
+            self.timestep = FixedTimestep(self.session or self.physics, dt=self.dt,
+                                          substeps=self.substeps)
+            self.renderer.position_source = self.timestep.render_position
+        self._last_frame_time = None
         # Создаем MapLoader
-        self.map_loader = MapLoader(self.renderer, self.physics, self)
+        self.map_loader = MapLoader(self.renderer, self.physics, self, info_rate=self.info_rate)
 
-        for obj in self.objects:
-            config = self.get_object_config(obj)
-            self.map_loader.add_object(obj, config)
+        # Все объекты добавляются одной пачкой; исходное состояние - снимок мира
+        self.map_loader.add_objects(self.objects)
+        self.map_loader.capture_initial_state()
+        # Снимки последних history_seconds секунд для перемотки
+        self.history_seconds = 10.0
+        self.history = SnapshotRing(seconds=self.history_seconds, interval=0.1)
+        self.history.record(self.physics)
+        if self.sim_thread is not None:
+            self.sim_thread.listeners.append(self.history.record)
+        # Профилирование стадий шага и кадра: оверлей в боковой панели
+        self.profiler = Profiler() if profile else None
+        self.physics.profiler = self.profiler
+        self.profile_rate = 2
+        self._last_profile_update = None
 
         dpg.create_context()
         dpg.create_viewport(title="Conphys", width=width, height=height)
@@ -54,25 +105,6 @@ class Window:
         dpg.set_viewport_resize_callback(self.on_viewport_resize)
         self.setup_ui()
 
-    def get_object_config(self, obj):
-        if isinstance(obj, Ball):
-            return {
-                'type': 'ball',
-                'cord': (obj.x * self.physics.mpp, obj.y * self.physics.mpp),
-                'r': obj.radius * self.physics.mpp,
-                'mass': obj.mass,
-                'x': obj.x, 'y': obj.y, 'vx': obj.vx, 'vy': obj.vy,
-                'rotation': obj.rotation, 'angular_velocity': obj.angular_velocity
-            }
-        elif isinstance(obj, Line):
-            return {
-                'type': 'line',
-                'p1': (obj.x1 * self.physics.mpp, obj.y1 * self.physics.mpp),
-                'p2': (obj.x2 * self.physics.mpp, obj.y2 * self.physics.mpp),
-                'thickness': obj.thickness
-            }
-        return {}
-
     def calculate_render_sizes(self):
         """Пересчитывает размеры области рендеринга."""
         self.drawlist_width = self.width - self.sidebar_width - self.object_panel_width
@@ -113,11 +145,27 @@ class Window:
                     dpg.add_slider_float(label="MPP", default_value=self.physics.mpp,
                                          min_value=0.01, max_value=1.0, format="%.2f",
                                          tag="mpp", callback=self.update_parameters)
+                    dpg.add_slider_int(label="Подшаги", default_value=self.timestep.substeps,
+                                       min_value=1, max_value=16,
+                                       tag="substeps", callback=self.update_parameters)
                     dpg.add_separator()
                     dpg.add_button(label="Сбросить", callback=self.reset_all_objects, width=-1)
                     dpg.add_button(label="Начать", callback=self.start_simulation, width=-1, tag="start_button")
                     dpg.add_button(label="Пауза", callback=self.pause_simulation, width=-1, tag="pause_button")
+                    dpg.add_button(label="Сохранить сцену", callback=self.save_scene, width=-1)
+                    if self.session is not None:
+                        dpg.add_button(label="Сохранить журнал", callback=self.save_input_log,
+                                       width=-1)
+                    dpg.add_slider_float(label="Назад, с", default_value=0.0,
+                                         min_value=0.0, max_value=self.history_seconds,
+                                         format="%.1f", tag="rewind", callback=self.rewind)
                     dpg.add_separator()
+                    if self.profiler is not None:
+                        with dpg.collapsing_header(label="Профилирование", default_open=True):
+                            dpg.add_text("p50 / p95 / max", color=(180, 180, 180))
+                            dpg.add_text("", tag="profile_overlay")
+                            dpg.add_button(label="Сохранить профиль", callback=self.save_profile,
+                                           width=-1)
                 with dpg.child_window(width=self.drawlist_width, height=self.height):
                     dpg.add_drawlist(width=self.drawlist_width, height=self.drawlist_height,
                                      tag="drawlist",
@@ -136,10 +184,9 @@ class Window:
             self.calculate_render_sizes()
 
             dpg.configure_item("drawlist", width=self.drawlist_width, height=self.drawlist_height)
+            self.renderer.resize(self.drawlist_width, self.drawlist_height)
 
-            self.physics.width = self.drawlist_width
-
-            self.map_loader.physics_simulator.mpp = self.physics.mpp
+            self.apply_to_simulation(self._set_width, self.drawlist_width)
 
     def find_font_path(self):
         possible_paths = [
@@ -154,65 +201,183 @@ class Window:
                 return path
         return None
 
+    def apply_to_simulation(self, func, *args, **kwargs):
+        """Правка мира: в потоке симуляции между шагами (threaded) или сразу."""
+        if self.sim_thread is not None:
+            self.sim_thread.submit(func, *args, **kwargs)
+        else:
+            func(*args, **kwargs)
+
+    def run_in_simulation(self, func, *args, **kwargs):
+        """Как apply_to_simulation, но дожидается выполнения и возвращает результат func."""
+        if self.sim_thread is not None:
+            return self.sim_thread.call(func, *args, **kwargs)
+        return func(*args, **kwargs)
+
     def update_parameters(self, sender, app_data):
-        gravity = dpg.get_value("gravity")
-        bounce = dpg.get_value("bounce")
-        friction = dpg.get_value("friction")
-        time_scale = dpg.get_value("time_scale")
-        mpp = dpg.get_value("mpp")
-        self.physics.set_parameters(
-            gravity=gravity,
-            bounce=bounce,
-            friction=friction,
-            time_scale=time_scale,
-            mpp=mpp
-        )
-        self.map_loader.physics_simulator.mpp = mpp
+        values = {
+            "gravity": dpg.get_value("gravity"),
+            "bounce": dpg.get_value("bounce"),
+            "friction": dpg.get_value("friction"),
+            "time_scale": dpg.get_value("time_scale"),
+            "mpp": dpg.get_value("mpp"),
+        }
+        self.apply_to_simulation(self._set_parameters, values,
+                                 max(1, dpg.get_value("substeps")))
+
+    def _set_parameters(self, values, substeps):
+        if self.session is not None:
+            # Применится перед следующим шагом и попадёт в журнал
+            self.session.set_parameters(**values)
+        else:
+            self.physics.set_parameters(**values)
+        self.timestep.substeps = substeps
+
+    def _set_width(self, width):
+        if self.session is not None:
+            self.session.set_parameters(width=width)
+        else:
+            self.physics.width = width
 
     def update_ui_status(self):
         self.map_loader.update_object_info_ui()
 
     def render_frame(self, sender, app_data, user_data):
-        self.physics.update(self.dt)
+        now = time.perf_counter()
+        if self.sim_thread is not None:
+            return self._threaded_frame(now)
+        profiler = self.profiler
+        if profiler is not None:
+            return self._profiled_frame(now, profiler)
+        if self._last_frame_time is not None:
+            if self.timestep.advance(now - self._last_frame_time):
+                self.history.record(self.physics)
+        self._last_frame_time = now
+        self.renderer.update_draw()
+        self.update_ui_status()
+        if self.simulation_running:
+            dpg.set_frame_callback(dpg.get_frame_count() + 1, self.render_frame)
+
+    def _profiled_frame(self, now, profiler):
+        # Тот же кадр, что render_frame, с замером каждой стадии
+        start = now
+        if self._last_frame_time is not None:
+            stepped = self.timestep.advance(now - self._last_frame_time)
+            start = profiler.lap("frame.physics", start)
+            if stepped:
+                self.history.record(self.physics)
+                start = profiler.lap("frame.history", start)
+        self._last_frame_time = now
+        self.renderer.update_draw()
+        start = profiler.lap("frame.render", start)
+        self.update_ui_status()
+        end = profiler.lap("frame.ui", start)
+        profiler.add_time("frame.total", (end - now) * 1000)
+        self._update_profile_overlay(end)
+        if self.simulation_running:
+            dpg.set_frame_callback(dpg.get_frame_count() + 1, self.render_frame)
+
+    def _threaded_frame(self, now):
+        # Физика идёт в своём потоке: кадр рисует последнее опубликованное состояние
+        self.sim_thread.check()
+        profiler = self.profiler
+        self.renderer.position_source = self.sim_thread.position_source(now)
+        self.renderer.radius_source = self.sim_thread.radius_source()
         self.renderer.update_draw()
+        if profiler is not None:
+            start = profiler.lap("frame.render", now)
         self.update_ui_status()
+        if profiler is not None:
+            end = profiler.lap("frame.ui", start)
+            profiler.add_time("frame.total", (end - now) * 1000)
+            self._update_profile_overlay(end)
         if self.simulation_running:
             dpg.set_frame_callback(dpg.get_frame_count() + 1, self.render_frame)
 
+    def _update_profile_overlay(self, now):
+        if (self._last_profile_update is None or
+                now - self._last_profile_update >= 1.0 / self.profile_rate):
+            self._last_profile_update = now
+            dpg.set_value("profile_overlay", "\n".join(self.profiler.format_lines()))
+
+    def save_scene(self, sender, app_data):
+        """Сохраняет сцену в файл, из которого она загружена (по умолчанию scene.json)."""
+        self.run_in_simulation(self.map_loader.save_scene, self.scene_path or "scene.json")
+
+    def save_profile(self, sender, app_data):
+        """Сохраняет сводку профилировщика в profile.json."""
+        self.profiler.dump("profile.json")
+
+    def save_input_log(self, sender, app_data):
+        """Сохраняет журнал детерминированного сеанса в session_inputs.json."""
+        self.run_in_simulation(self.session.save, "session_inputs.json")
+
+    def _restart_session(self):
+        # После сброса или перемотки журнал начинается заново от нового состояния
+        if self.session is not None:
+            self.session.start()
+
+    def rewind(self, sender, app_data):
+        """Перематывает на app_data секунд назад от последнего снимка (симуляция на паузе)."""
+        if self.simulation_running:
+            self.pause_simulation(None, None)
+        self.run_in_simulation(self._rewind, app_data)
+        self._show_state()
+
+    def _rewind(self, seconds):
+        if self.history.end is None:
+            return
+        self.history.rewind(self.physics, self.history.end - seconds, parameters=False)
+        self._restart_session()
+        self.timestep.reset()
+
     def reset_all_objects(self, sender, app_data):
+        self.run_in_simulation(self._reset)
+        dpg.set_value("rewind", 0.0)
+        self._show_state()
+
+    def _reset(self):
         self.map_loader.reset_all_objects()
-        self.map_loader.create_ui_for_objects()
+        self._restart_session()
+        self.timestep.reset()
+        self.history.clear()
+        self.history.record(self.physics)
+
+    def _show_state(self):
+        # Панель не перестраивается: обновляем значения в видимых строках
+        if self.sim_thread is not None:
+            self.renderer.position_source = self.sim_thread.position_source()
+            self.renderer.radius_source = self.sim_thread.radius_source()
+        self.map_loader.refresh_object_rows()
         self.renderer.update_draw()
 
     def start_simulation(self, sender, app_data):
         self.simulation_running = True
+        # Продолжаем с текущего (возможно, перемотанного) момента
+        self.run_in_simulation(self.history.record, self.physics)
+        dpg.set_value("rewind", 0.0)
+        # Время, проведённое на паузе, не должно попасть в аккумулятор
+        self._last_frame_time = None
+        if self.sim_thread is not None:
+            self.sim_thread.resume()
         dpg.configure_item("start_button", show=False)
         dpg.configure_item("pause_button", show=True)
         dpg.set_frame_callback(dpg.get_frame_count() + 1, self.render_frame)
 
     def pause_simulation(self, sender, app_data):
         self.simulation_running = False
+        if self.sim_thread is not None:
+            self.sim_thread.pause()
         dpg.configure_item("start_button", show=True)
         dpg.configure_item("pause_button", show=False)
 
     def run(self):
         self.simulation_running = False
+        if self.sim_thread is not None:
+            self.sim_thread.start()
         dpg.setup_dearpygui()
         dpg.show_viewport()
         dpg.start_dearpygui()
+        if self.sim_thread is not None:
+            self.sim_thread.stop()
         dpg.destroy_context()
-
-class RenderSystem:
-    def __init__(self):
-        self.objects = []
-
-    def add_object(self, obj):
-        self.objects.append(obj)
-
-    def draw_initial(self, drawlist_tag):
-        for obj in self.objects:
-            obj.draw(drawlist_tag)
-
-    def update_draw(self):
-        for obj in self.objects:
-            obj.update_draw()
@@ -1,8 +1,24 @@
+import sys
 import dearpygui.dearpygui as dpg
 from gui.window import Window
 from physics.objects import Ball, Line
 
 if __name__ == "__main__":
+    # python main.py [--profile] [--threaded] [--sequential] [scene.json] - загрузить сцену
+    # из файла, --profile - оверлей с временем стадий кадра, --threaded - физика в своём
+    # потоке, --sequential - итеративный решатель контактов вместо попарного
+    args = sys.argv[1:]
+    options = {}
+    for flag in ("--profile", "--threaded"):
+        options[flag[2:]] = flag in args
+        if flag in args:
+            args.remove(flag)
+    if "--sequential" in args:
+        args.remove("--sequential")
+        options["solver"] = "sequential"
+    if args:
+        Window(width=1400, height=800, scene=args[0], **options).run()
+        sys.exit()
     objects_list = []
     for x in range(20):
         for y in range(10):
@@ -11,5 +27,5 @@ if __name__ == "__main__":
     table = Line(p1=(-10, 40), p2=(200, 50), thickness=2)
     objects_list.append(table)
 
-    app = Window(width=1400, height=800, objects=objects_list)
+    app = Window(width=1400, height=800, objects=objects_list, **options)
     app.run()
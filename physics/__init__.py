@@ -1,11 +1,65 @@
 from .core import PhysicsSimulator
 from .objects import Ball, Line
-from .calculations import PhysicsCalculations, PhysicsVariables
+from .calculations import BatchQuantities, PhysicsCalculator, PhysicsCalculations, PhysicsVariables
+from .settings import WorldParameters, WorldSettings
+from .broadphase import BruteForceBroadPhase, SpatialHashBroadPhase
+from .timestep import FixedTimestep
+from .segments import SegmentGrid
+from .sleep import SleepManager
+from .solver import ContactSolver
+from .registry import ObjectRegistry
+from .snapshot import Snapshot, SnapshotRing
+
+# Ввод-вывод (сцены, запись траекторий) загружается при первом обращении,
+# чтобы не замедлять import physics
+_LAZY = {
+    "Scene": "scene_io",
+    "load_scene": "scene_io",
+    "save_scene": "scene_io",
+    "TrajectoryRecorder": "recorder",
+    "TrajectoryReader": "recorder",
+    "Profiler": "profiling",
+    "run_ensemble": "ensemble",
+    "parameter_grid": "ensemble",
+    "random_parameters": "ensemble",
+}
+
+
+def __getattr__(name):
+    module = _LAZY.get(name)
+    if module is None:
+        raise AttributeError(f"module 'physics' has no attribute {name!r}")
+    from importlib import import_module
+    value = getattr(import_module(f".{module}", __name__), name)
+    globals()[name] = value
+    return value
 
 __all__ = [
     "PhysicsSimulator",
+    "PhysicsCalculator",
+    "BatchQuantities",
     "PhysicsCalculations",
     "PhysicsVariables",
+    "WorldSettings",
+    "WorldParameters",
     "Ball",
-    "Line"
+    "Line",
+    "BruteForceBroadPhase",
+    "SpatialHashBroadPhase",
+    "FixedTimestep",
+    "SegmentGrid",
+    "SleepManager",
+    "ContactSolver",
+    "ObjectRegistry",
+    "Scene",
+    "load_scene",
+    "save_scene",
+    "Snapshot",
+    "SnapshotRing",
+    "TrajectoryRecorder",
+    "TrajectoryReader",
+    "Profiler",
+    "run_ensemble",
+    "parameter_grid",
+    "random_parameters"
 ]
\ No newline at end of file
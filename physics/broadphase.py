@@ -0,0 +1,106 @@
+import math
+from typing import Iterator, Tuple
+
+# Смещения ячеек окрестности 3x3
+_NEIGHBOUR_OFFSETS = tuple((ox, oy) for ox in (-1, 0, 1) for oy in (-1, 0, 1))
+
+
+class BruteForceBroadPhase:
+    """Эталонный режим: все пары шаров, O(n²)."""
+
+    def iter_pairs(self, balls) -> Iterator[Tuple[int, int]]:
+        n = len(balls)
+        for i in range(n):
+            for j in range(i + 1, n):
+                yield i, j
+
+
+class SpatialHashBroadPhase:
+    """Равномерная сетка (spatial hash) для поиска пар-кандидатов.
+
+    Размер ячейки по умолчанию равен максимальному диаметру шара, поэтому
+    любые два пересекающихся шара лежат в одной или в соседних ячейках.
+    Пары выдаются в том же порядке, что и при полном переборе, а сетка
+    обновляется после каждой пары: разрешение столкновения сдвигает шары,
+    и следующие проверки должны видеть их новые позиции.
+    """
+
+    def __init__(self, cell_size: float = None):
+        self.cell_size = cell_size
+
+    def iter_pairs(self, balls) -> Iterator[Tuple[int, int]]:
+        n = len(balls)
+        if n < 2:
+            return
+        cell_size = self.cell_size or 2 * max(ball.radius for ball in balls)
+        if cell_size <= 0:
+            yield from BruteForceBroadPhase().iter_pairs(balls)
+            return
+        inv_cell = 1.0 / cell_size
+
+        grid = {}
+        keys = []
+        for i, ball in enumerate(balls):
+            key = (math.floor(ball.x * inv_cell), math.floor(ball.y * inv_cell))
+            keys.append(key)
+            bucket = grid.get(key)
+            if bucket is None:
+                grid[key] = [i]
+            else:
+                bucket.append(i)
+
+        for i in range(n - 1):
+            candidates = self._neighbours(grid, keys[i], i)
+            k = 0
+            while k < len(candidates):
+                j = candidates[k]
+                k += 1
+                yield i, j
+                self._rehash(grid, keys, balls, j, inv_cell)
+                if self._rehash(grid, keys, balls, i, inv_cell):
+                    # Шар i перешёл в другую ячейку - меняется его окрестность
+                    candidates = self._neighbours(grid, keys[i], j)
+                    k = 0
+
+    @staticmethod
+    def _neighbours(grid, key, lower):
+        cx, cy = key
+        result = []
+        for ox, oy in _NEIGHBOUR_OFFSETS:
+            bucket = grid.get((cx + ox, cy + oy))
+            if bucket is not None:
+                result.extend(j for j in bucket if j > lower)
+        result.sort()
+        return result
+
+    @staticmethod
+    def _rehash(grid, keys, balls, i, inv_cell):
+        ball = balls[i]
+        key = (math.floor(ball.x * inv_cell), math.floor(ball.y * inv_cell))
+        old_key = keys[i]
+        if key == old_key:
+            return False
+        grid[old_key].remove(i)
+        bucket = grid.get(key)
+        if bucket is None:
+            grid[key] = [i]
+        else:
+            bucket.append(i)
+        keys[i] = key
+        return True
+
+
+BROAD_PHASES = {
+    "grid": SpatialHashBroadPhase,
+    "brute": BruteForceBroadPhase,
+}
+
+
+def make_broad_phase(broad_phase):
+    """Создаёт broad phase по имени ("grid"/"brute") или возвращает готовый объект."""
+    if isinstance(broad_phase, str):
+        try:
+            return BROAD_PHASES[broad_phase]()
+        except KeyError:
+            raise ValueError(f"Неизвестный режим broad phase: {broad_phase}")
+    return broad_phase
@@ -1,122 +1,166 @@
 import math
-from .objects import Ball
+import warnings
+from array import array
+from collections import namedtuple
+from .segments import SegmentGrid
+
+# Производные величины одного шара (в единицах СИ)
+Quantities = namedtuple("Quantities", [
+    "velocity_magnitude", "kinetic_energy", "potential_energy", "total_energy",
+    "momentum", "acceleration", "gravity_force", "elastic_force", "friction_force",
+])
+
+# Состояние шара для панели объектов: координаты (м), скорости (м/с), масса,
+# радиус (м), поворот (градусы) и величины Quantities
+BallInfo = namedtuple("BallInfo", [
+    "x", "y", "vx", "vy", "mass", "radius", "rotation_degrees", "quantities",
+])
+
+# Упрощённые коэффициенты силы упругости и трения
+ELASTIC_COEFFICIENT = 10
+FRICTION_COEFFICIENT = 0.1
+
+
+def height_above_surface(ball, surface):
+    """Высота нижней точки шара над поверхностью в пикселях (ось y направлена вниз)."""
+    if isinstance(surface, SegmentGrid):
+        # Высота над ближайшей поверхностью под шаром
+        surface_y = surface.surface_below(ball.x, ball.y)
+        return 0 if surface_y is None else surface_y - ball.y - ball.radius
+    # Высота от линии стола (предполагаем, что y=0 это верх экрана)
+    # Проекция центра шара на линию
+    line_vec_x = surface.x2 - surface.x1
+    line_vec_y = surface.y2 - surface.y1
+    line_len_sq = line_vec_x**2 + line_vec_y**2
+    if line_len_sq == 0:
+        return 0
+    point_vec_x = ball.x - surface.x1
+    point_vec_y = ball.y - surface.y1
+    t = max(0, min(1, (point_vec_x * line_vec_x + point_vec_y * line_vec_y) / line_len_sq))
+    proj_y = surface.y1 + t * line_vec_y
+    return proj_y - ball.y - ball.radius
+
+
+def ball_quantities(ball, surface, gravity, mpp):
+    """Все производные величины шара за один проход."""
+    mass = ball.mass
+    velocity = math.sqrt(ball.vx**2 + ball.vy**2) * mpp
+    kinetic = 0.5 * mass * velocity**2
+    # Предполагаем, что h=0 на линии стола
+    h_m = height_above_surface(ball, surface) * mpp
+    potential = mass * gravity * h_m if h_m > 0 else 0
+    gravity_force = mass * gravity
+    # Касание линии уже найдено в Ball.update; сила пропорциональна скорости и массе
+    elastic = velocity * mass * ELASTIC_COEFFICIENT if ball.line_contact else 0.0
+    return Quantities(
+        velocity_magnitude=velocity,
+        kinetic_energy=kinetic,
+        potential_energy=potential,
+        total_energy=kinetic + potential,
+        momentum=mass * velocity,
+        acceleration=math.sqrt(ball.ax**2 + ball.ay**2) * mpp,
+        gravity_force=gravity_force,
+        elastic_force=elastic,
+        # F_friction = mu * N, где N - нормальная сила (масса * g для горизонтальной поверхности)
+        friction_force=FRICTION_COEFFICIENT * gravity_force,
+    )
+
+
+def ball_info(simulator, ball) -> BallInfo:
+    """BallInfo шара по текущему состоянию симулятора."""
+    mpp = simulator.mpp
+    return BallInfo(ball.x * mpp, ball.y * mpp, ball.vx * mpp, ball.vy * mpp, ball.mass,
+                    ball.radius * mpp, ball.rotation_degrees,
+                    simulator.calculator.quantities(ball))
+
+
+def _column_sum(column):
+    # У массивов NumPy своя быстрая сумма, array('d') суммируем через fsum
+    total = getattr(column, "sum", None)
+    return float(total()) if total is not None else math.fsum(column)
+
+
+class BatchQuantities:
+    """Производные величины всех шаров в виде столбцов (array('d') или массивы NumPy).
+
+    Столбцы называются как поля Quantities, плюс momentum_x и momentum_y -
+    компоненты импульса. Суммы по системе считаются сразу при создании.
+    """
+
+    def __init__(self, columns):
+        for name, column in columns.items():
+            setattr(self, name, column)
+        self.size = len(self.kinetic_energy)
+        self.total_kinetic = _column_sum(self.kinetic_energy)
+        self.total_potential = _column_sum(self.potential_energy)
+        self.system_energy = self.total_kinetic + self.total_potential
+        self.system_momentum_x = _column_sum(self.momentum_x)
+        self.system_momentum_y = _column_sum(self.momentum_y)
+        self.system_momentum = math.hypot(self.system_momentum_x, self.system_momentum_y)
+
+    @classmethod
+    def from_balls(cls, balls, surface, gravity, mpp):
+        columns = {name: array("d") for name in Quantities._fields + ("momentum_x", "momentum_y")}
+        appenders = [columns[name].append for name in Quantities._fields]
+        momentum_x = columns["momentum_x"].append
+        momentum_y = columns["momentum_y"].append
+        for ball in balls:
+            for append, value in zip(appenders, ball_quantities(ball, surface, gravity, mpp)):
+                append(value)
+            momentum_x(ball.mass * ball.vx * mpp)
+            momentum_y(ball.mass * ball.vy * mpp)
+        return cls(columns)
+
+
+class PhysicsCalculator:
+    """Производные величины отдельных шаров, один объект на симулятор.
+
+    Параметры (поверхность, gravity, mpp) читаются у симулятора в момент
+    расчёта (simulator.settings), поэтому их смена не требует обхода шаров. Величины шара
+    считаются при первом запросе и кэшируются по handle до смены
+    simulator.revision (новый шаг или внешняя правка объектов).
+    """
+
+    def __init__(self, simulator):
+        self.simulator = simulator
+        self._revision = None
+        self._cache = {}
+
+    def quantities(self, ball) -> Quantities:
+        """Все величины шара сразу (Quantities)."""
+        simulator = self.simulator
+        if self._revision != simulator.revision:
+            self._cache.clear()
+            self._revision = simulator.revision
+        values = self._cache.get(ball.handle)
+        if values is None:
+            parameters = simulator.settings.snapshot()
+            values = ball_quantities(ball, simulator.surface, parameters.gravity, parameters.mpp)
+            self._cache[ball.handle] = values
+        return values
+
 
 class PhysicsVariables:
+    """Устаревший интерфейс: величины одного шара. Используйте PhysicsCalculator
+    или ball_quantities.
+
+    Каждое обращение к величине пересчитывает Quantities шара заново.
+    """
+
     def __init__(self, ball, table_line, gravity, mpp):
-        # Ссылка на объект шара и параметры для вычислений
+        warnings.warn(f"{type(self).__name__} устарел, используйте PhysicsCalculator "
+                      "или ball_quantities", DeprecationWarning, stacklevel=2)
         self._ball = ball
         self._table_line = table_line
         self._gravity = gravity
         self._mpp = mpp
 
-    @property
-    def kinetic_energy(self):
-        """Кинетическая энергия (Ek)"""
-        v_m = math.sqrt(self._ball.vx**2 + self._ball.vy**2) * self._mpp
-        return 0.5 * self._ball.mass * v_m**2
-
-    @property
-    def potential_energy(self):
-        """Потенциальная энергия (Ep)"""
-        # Высота от линии стола (предполагаем, что y=0 это верх экрана)
-        # Проекция центра шара на линию
-        line_vec_x = self._table_line.x2 - self._table_line.x1
-        line_vec_y = self._table_line.y2 - self._table_line.y1
-        line_len_sq = line_vec_x**2 + line_vec_y**2
-        if line_len_sq == 0:
-            h_px = 0
-        else:
-            point_vec_x = self._ball.x - self._table_line.x1
-            point_vec_y = self._ball.y - self._table_line.y1
-            t = max(0, min(1, (point_vec_x * line_vec_x + point_vec_y * line_vec_y) / line_len_sq))
-            proj_x = self._table_line.x1 + t * line_vec_x
-            proj_y = self._table_line.y1 + t * line_vec_y
-            h_px = self._ball.y - proj_y - self._ball.radius
-        h_m = h_px * self._mpp
-        # Предполагаем, что h=0 на линии стола
-        return self._ball.mass * self._gravity * h_m if h_m > 0 else 0
-
-    @property
-    def total_energy(self):
-        """Полная механическая энергия (E)"""
-        return self.kinetic_energy + self.potential_energy
-
-    @property
-    def momentum(self):
-        """Импульс (kg*m/s)"""
-        v_m = math.sqrt(self._ball.vx**2 + self._ball.vy**2) * self._mpp
-        return self._ball.mass * v_m
-
-    @property
-    def gravity_force(self):
-        """Сила тяжести (Fтяж)"""
-        return self._ball.mass * self._gravity
-
-    @property
-    def velocity_magnitude(self):
-        """Величина скорости в м/с"""
-        return math.sqrt(self._ball.vx**2 + self._ball.vy**2) * self._mpp
-
-    @property
-    def acceleration(self):
-        """Ускорение (м/с^2)"""
-        return math.sqrt(self._ball.ax**2 + self._ball.ay**2) * self._mpp
-
-    @property
-    def elastic_force(self):
-        """Сила упругости при столкновении с линией (N) - упрощенная модель"""
-        # Проверяем столкновение с линией
-        collision, _, _ = self._ball.check_line_collision(self._table_line)
-        if collision:
-            # Сила пропорциональна нормальной скорости и массе
-            v_normal = math.sqrt(self._ball.vx**2 + self._ball.vy**2) * self._mpp
-            return v_normal * self._ball.mass * 10  # Упрощенный коэффициент
-        return 0.0
-
-    @property
-    def friction_force(self):
-        """Сила трения (Ff)"""
-        # F_friction = mu * N, где N - нормальная сила (масса * g для горизонтальной поверхности)
-        friction_coefficient = 0.1  # Упрощенный коэффициент трения
-        normal_force = self.gravity_force
-        return friction_coefficient * normal_force
-
-class PhysicsCalculations:
-    def __init__(self, ball, table_line, gravity, mpp):
-        self._physics_vars = PhysicsVariables(ball, table_line, gravity, mpp)
-
-    @property
-    def kinetic_energy(self):
-        return self._physics_vars.kinetic_energy
-
-    @property
-    def potential_energy(self):
-        return self._physics_vars.potential_energy
-
-    @property
-    def total_energy(self):
-        return self._physics_vars.total_energy
-
-    @property
-    def momentum(self):
-        return self._physics_vars.momentum
-
-    @property
-    def gravity_force(self):
-        return self._physics_vars.gravity_force
-
-    @property
-    def velocity_magnitude(self):
-        return self._physics_vars.velocity_magnitude
-
-    @property
-    def acceleration(self):
-        return self._physics_vars.acceleration
+    def __getattr__(self, name):
+        if name in Quantities._fields:
+            return getattr(ball_quantities(self._ball, self._table_line,
+                                           self._gravity, self._mpp), name)
+        raise AttributeError(f"{type(self).__name__!r} object has no attribute {name!r}")
 
-    @property
-    def elastic_force(self):
-        return self._physics_vars.elastic_force
 
-    @property
-    def friction_force(self):
-        return self._physics_vars.friction_force
\ No newline at end of file
+class PhysicsCalculations(PhysicsVariables):
+    """Устаревший интерфейс, то же, что PhysicsVariables."""
@@ -1,47 +1,243 @@
-import math
+from time import perf_counter
 from typing import List
 from .objects import Ball, Line
+from .broadphase import make_broad_phase
+from .segments import SegmentGrid
+from .sleep import SleepManager
+from .solver import ContactSolver
+from .calculations import BatchQuantities, PhysicsCalculator
+from .registry import ObjectRegistry
+from .settings import WORLD_FIELDS, WorldSettings
+from .snapshot import (LINE_FIELDS, PARAMETERS, STATE_FIELDS, Snapshot, pack_columns,
+                       restore_balls, restore_lines)
+
+def _world_parameter(name):
+    # Параметр мира хранится в self.settings; запись идёт через set_parameters
+    def get(self):
+        return getattr(self.settings.snapshot(), name)
+
+    def set(self, value):
+        self.set_parameters(**{name: value})
+    return property(get, set)
+
 
 class PhysicsSimulator:
+    gravity = _world_parameter("gravity")
+    bounce = _world_parameter("bounce")
+    friction = _world_parameter("friction")
+    time_scale = _world_parameter("time_scale")
+    mpp = _world_parameter("mpp")
+    width = _world_parameter("width")
+
     def __init__(self, objects: List, table_line: Line, width: int,
                  gravity: float = 9.8, bounce: float = 0.8,
-                 friction: float = 0.999, mpp: float = 0.1):
+                 friction: float = 0.999, mpp: float = 0.1,
+                 broad_phase="grid", engine: str = "python", ccd: bool = False,
+                 static_lines: List[Line] = None, sleeping: bool = False,
+                 sleep_velocity: float = 5.0, sleep_frames: int = 30,
+                 solver: str = "pairwise", solver_iterations: int = 8,
+                 workers: int = None, registry: ObjectRegistry = None):
         self.objects = objects
+        # Параметры конструктора, по которым можно собрать такой же симулятор
+        # (детерминированное воспроизведение, ансамбли)
+        self.options = {
+            "width": width, "broad_phase": broad_phase if isinstance(broad_phase, str) else "grid",
+            "engine": engine, "ccd": ccd, "sleeping": sleeping,
+            "sleep_velocity": sleep_velocity, "sleep_frames": sleep_frames,
+            "solver": solver, "solver_iterations": solver_iterations, "workers": workers,
+        }
+        # Общий с GUI реестр: у каждого объекта стабильный handle
+        self.registry = registry if registry is not None else ObjectRegistry()
+        for obj in objects:
+            self.registry.register(obj)
         self.table_line = table_line
-        self.width = width
-        self.gravity = gravity
-        self.bounce = bounce
-        self.friction = friction
-        self.time_scale = 1.0
+        # Параметры мира (версионированные). Шаг работает со снимком
+        # step_parameters, взятым в его начале; правка между шагами будит
+        # шары один раз, перед следующим шагом
+        self.settings = WorldSettings(gravity=gravity, bounce=bounce, friction=friction,
+                                      time_scale=1.0, mpp=mpp, width=width)
+        self.step_parameters = self.settings.snapshot()
+        self._woken_version = self.settings.version
         self.t = 0.0
-        self.mpp = mpp
-        for obj in objects:
-            if isinstance(obj, Ball):
-                obj.setup_physics(table_line, gravity, mpp)
+        # Растёт с каждым шагом и после внешних правок объектов; по нему
+        # сбрасываются кэши производных величин
+        self.revision = 0
+        # Число сделанных шагов и функции hook(simulator), вызываемые после
+        # каждого шага (запись траекторий и т.п.)
+        self.steps = 0
+        self.step_hooks = []
+        # Profiler (physics.profiling) или None: без него стадии не замеряются
+        self.profiler = None
+        self._quantities = None
+        self._quantities_revision = None
+        # "grid" - пространственный хэш, "brute" - эталонный полный перебор
+        self.broad_phase = make_broad_phase(broad_phase)
+        # Непрерывное обнаружение столкновений шаров с линией (swept-тест)
+        self.ccd = ccd
+        # Статическая геометрия: линия стола, все Line из objects и static_lines.
+        # Если отрезков несколько, шары ищут соседние через SegmentGrid
+        self.static_lines = []
+        seen = set()
+        for line in [table_line] + [obj for obj in objects if isinstance(obj, Line)] + list(static_lines or []):
+            if line is not None and id(line) not in seen:
+                seen.add(id(line))
+                self.static_lines.append(line)
+        if not self.static_lines:
+            raise ValueError("Нужна хотя бы одна линия (table_line или static_lines)")
+        for line in self.static_lines:
+            self.registry.register(line)
+        if self.table_line is None:
+            self.table_line = self.static_lines[0]
+        if len(self.static_lines) > 1:
+            max_radius = max((obj.radius for obj in objects if isinstance(obj, Ball)), default=0.0)
+            self.segments = SegmentGrid(self.static_lines, margin=max_radius)
+        else:
+            self.segments = None
+        # Поверхность отсчёта потенциальной энергии
+        self.surface = self.segments if self.segments is not None else self.table_line
+        # Величины отдельных шаров (панель объектов) - общий для всех шаров калькулятор
+        self.calculator = PhysicsCalculator(self)
+        # Шары фиксируются при создании симулятора
+        self._balls = [obj for obj in objects if isinstance(obj, Ball)]
+        # "python" - пошаговое обновление каждого Ball, "numpy" - пакетный движок
+        # над массивами (шары становятся представлениями над ними)
+        self.engine = engine
+        if engine == "numpy":
+            from .vectorized import VectorizedEngine
+            self._vector_engine = VectorizedEngine(self._balls)
+        elif engine == "parallel":
+            # Несколько процессов над разделяемой памятью (workers, по умолчанию - все ядра)
+            from .parallel import ParallelEngine
+            self._vector_engine = ParallelEngine(self._balls, workers=workers,
+                                                 table_line=self.table_line,
+                                                 segments=self.segments)
+        elif engine == "python":
+            self._vector_engine = None
+        else:
+            raise ValueError(f"Неизвестный движок: {engine}")
+        # "pairwise" - столкновения разрешаются сразу, по одной паре;
+        # "sequential" - итеративный решатель контактов с warm starting
+        if solver == "sequential":
+            if self._vector_engine is not None:
+                raise ValueError("Решатель sequential поддерживается только движком python")
+            self.solver = ContactSolver(iterations=solver_iterations)
+        elif solver == "pairwise":
+            self.solver = None
+        else:
+            raise ValueError(f"Неизвестный решатель: {solver}")
+        # Усыпление покоящихся шаров: скорость ниже sleep_velocity (пикс/с)
+        # в течение sleep_frames шагов
+        self.sleeping = sleeping
+        self._sleep = None
+        if sleeping:
+            if self._vector_engine is not None:
+                self._vector_engine.enable_sleep(sleep_velocity, sleep_frames)
+            else:
+                self._sleep = SleepManager(self._balls, sleep_velocity, sleep_frames)
 
     def update(self, dt):
-        scaled_dt = dt * self.time_scale
+        parameters = self.settings.snapshot()
+        self.step_parameters = parameters
+        if parameters.version != self._woken_version:
+            # Параметры изменились после прошлого шага: спящие шары должны их почувствовать
+            self._woken_version = parameters.version
+            self.wake_all()
+        scaled_dt = dt * parameters.time_scale
         self.t += scaled_dt
-        for obj in self.objects:
-            if isinstance(obj, Ball):
-                obj.update(scaled_dt, self.gravity, self.bounce,
-                           self.friction, self.table_line, self.width, self.mpp)
+        self.revision += 1
+        self.steps += 1
+        profiler = self.profiler
+        if profiler is not None:
+            profiler.count("active_bodies", self.awake_count)
+            start = perf_counter()
+        if self.solver is not None:
+            # solve_step сам отмечает свои стадии
+            self.solve_step(scaled_dt)
+            if profiler is not None:
+                start = perf_counter()
+        else:
+            if self._vector_engine is not None:
+                self._vector_engine.integrate(scaled_dt, parameters.gravity, parameters.bounce,
+                                              parameters.friction, self.table_line,
+                                              parameters.width, ccd=self.ccd,
+                                              segments=self.segments)
+            else:
+                balls = self._sleep.awake_balls() if self._sleep is not None else self._balls
+                gravity = parameters.gravity
+                bounce = parameters.bounce
+                friction = parameters.friction
+                width = parameters.width
+                mpp = parameters.mpp
+                for obj in balls:
+                    obj.update(scaled_dt, gravity, bounce, friction, self.table_line, width, mpp,
+                               ccd=self.ccd, segments=self.segments)
+            if profiler is not None:
+                start = profiler.lap("integrate", start)
 
-        self.check_and_resolve_collisions()
+            self.check_and_resolve_collisions()
+            if profiler is not None:
+                start = profiler.lap("collisions", start)
+        if self.step_hooks:
+            for hook in self.step_hooks:
+                hook(self)
+            if profiler is not None:
+                profiler.lap("hooks", start)
 
-    def check_and_resolve_collisions(self):
-        for i in range(len(self.objects)):
-            for j in range(i + 1, len(self.objects)):
-                obj1 = self.objects[i]
-                obj2 = self.objects[j]
-
-                # Пропускаем столкновения с Line
-                if isinstance(obj1, Line) or isinstance(obj2, Line):
-                    continue
+    def solve_step(self, dt):
+        """Шаг по стадиям: скорости, решатель контактов, позиции."""
+        profiler = self.profiler
+        if profiler is not None:
+            start = perf_counter()
+        parameters = self.step_parameters
+        sleep = self._sleep
+        balls = sleep.awake_balls() if sleep is not None else self._balls
+        for obj in balls:
+            obj.integrate_velocity(dt, parameters.gravity)
+        candidates = sleep.candidates() if sleep is not None else balls
+        if profiler is not None:
+            start = profiler.lap("integrate", start)
+        contacts = self.solver.solve(self, candidates, dt)
+        if profiler is not None:
+            start = profiler.lap("solver", start)
+            profiler.count("contacts", len(contacts))
+        for obj in balls:
+            obj.integrate_position(dt, parameters.bounce, parameters.width)
+        if sleep is not None:
+            sleep.wake_touched(contacts)
+            sleep.update(contacts)
+        if profiler is not None:
+            profiler.lap("positions", start)
 
-                collision, normal, depth = self.check_collision_pair(obj1, obj2)
-                if collision:
-                    self.resolve_collision_pair(obj1, obj2, normal, depth)
+    def check_and_resolve_collisions(self):
+        profiler = self.profiler
+        if self._vector_engine is not None:
+            engine = self._vector_engine
+            engine.resolve_ball_collisions(self.step_parameters.bounce)
+            if profiler is not None and engine.pair_tests is not None:
+                profiler.count("pair_tests", engine.pair_tests)
+                profiler.count("contacts", engine.contact_count)
+            return
+        if self._sleep is not None:
+            contacts = self._sleep.collide(self)
+            self._sleep.update(contacts)
+            if profiler is not None:
+                profiler.count("contacts", len(contacts))
+            return
+        # Line в столкновениях шаров не участвует, поэтому берём только шары
+        balls = self._balls
+        tests = 0
+        contacts = 0
+        for i, j in self.broad_phase.iter_pairs(balls):
+            obj1 = balls[i]
+            obj2 = balls[j]
+            tests += 1
+            collision, normal, depth = self.check_collision_pair(obj1, obj2)
+            if collision:
+                contacts += 1
+                self.resolve_collision_pair(obj1, obj2, normal, depth)
+        if profiler is not None:
+            profiler.count("pair_tests", tests)
+            profiler.count("contacts", contacts)
 
     def check_collision_pair(self, obj1, obj2):
         if isinstance(obj1, Ball) and isinstance(obj2, Ball):
@@ -50,21 +246,133 @@ class PhysicsSimulator:
 
     def resolve_collision_pair(self, obj1, obj2, normal, depth):
         if isinstance(obj1, Ball) and isinstance(obj2, Ball):
-            obj1.resolve_collision_with_ball(obj2, normal, depth, self.bounce)
-            obj2.resolve_collision_with_ball(obj1, (-normal[0], -normal[1]), depth, self.bounce)
-
-    def set_parameters(self, gravity, bounce, friction, time_scale, mpp):
-        self.gravity = gravity
-        self.bounce = bounce
-        self.friction = friction
-        self.time_scale = time_scale
-        self.mpp = mpp
-        for obj in self.objects:
-            if isinstance(obj, Ball):
-                obj.physics_vars._gravity = gravity
-                obj.physics_calc._physics_vars._gravity = gravity
-                obj.physics_vars._mpp = mpp
-                obj.physics_calc._physics_vars._mpp = mpp
+            bounce = self.step_parameters.bounce
+            obj1.resolve_collision_with_ball(obj2, normal, depth, bounce)
+            obj2.resolve_collision_with_ball(obj1, (-normal[0], -normal[1]), depth, bounce)
+
+    def set_parameters(self, gravity=None, bounce=None, friction=None, time_scale=None,
+                       mpp=None, width=None):
+        """Меняет параметры мира (None - оставить как есть).
+
+        O(1): объекты не обходятся. Шаги видят новые значения со следующего
+        update, тогда же один раз будятся спящие шары.
+        """
+        values = {name: value for name, value in zip(
+            WORLD_FIELDS, (gravity, bounce, friction, time_scale, mpp, width)) if value is not None}
+        if self.settings.update(**values):
+            self.invalidate()
+
+    def invalidate(self):
+        """Сбрасывает кэши производных величин (объекты изменены вне update)."""
+        self.revision += 1
+
+    def quantities(self):
+        """Энергии, импульсы и силы всех шаров (BatchQuantities); считаются раз на revision."""
+        if self._quantities_revision != self.revision:
+            parameters = self.settings.snapshot()
+            if self._vector_engine is not None:
+                self._quantities = self._vector_engine.quantities(self.surface, parameters.gravity,
+                                                                  parameters.mpp)
+            else:
+                self._quantities = BatchQuantities.from_balls(self._balls, self.surface,
+                                                              parameters.gravity, parameters.mpp)
+            self._quantities_revision = self.revision
+        return self._quantities
+
+    @property
+    def total_energy(self):
+        """Полная механическая энергия системы (Дж)."""
+        return self.quantities().system_energy
+
+    @property
+    def total_momentum(self):
+        """Суммарный импульс системы (px, py) в кг*м/с."""
+        quantities = self.quantities()
+        return quantities.system_momentum_x, quantities.system_momentum_y
+
+    def wake(self, obj):
+        """Будит шар вместе с его островом (после внешних правок объекта)."""
+        self.invalidate()
+        if not isinstance(obj, Ball):
+            if isinstance(obj, Line):
+                self._lines_changed()
+            return
+        if self._vector_engine is not None:
+            self._vector_engine.wake(obj)
+        elif self._sleep is not None:
+            self._sleep.wake(obj)
+
+    def wake_all(self):
+        self.invalidate()
+        if self._vector_engine is not None:
+            self._vector_engine.wake_all()
+        elif self._sleep is not None:
+            self._sleep.wake_all()
+
+    @property
+    def awake_count(self):
+        """Число шаров, которые сейчас интегрируются."""
+        if self._vector_engine is not None:
+            return self._vector_engine.awake_count
+        if self._sleep is not None:
+            return self._sleep.awake_count
+        return len(self._balls)
+
+    def snapshot(self) -> Snapshot:
+        """Снимок всего мира: t, параметры, состояние шаров и линий."""
+        balls = self.state_columns(STATE_FIELDS)
+        parameters = {name: getattr(self.settings, name) for name in PARAMETERS}
+        return Snapshot(self.t, parameters, balls, pack_columns(self.static_lines, LINE_FIELDS),
+                        len(self._balls), len(self.static_lines))
+
+    def state_columns(self, fields=STATE_FIELDS) -> bytes:
+        """Поля fields всех шаров одним буфером float64 по столбцам (в пикселях)."""
+        if self._vector_engine is not None:
+            return self._vector_engine.state_bytes(fields)
+        return pack_columns(self._balls, fields)
+
+    def restore(self, snapshot: Snapshot, parameters: bool = True):
+        """Возвращает мир к снимку одной пакетной записью.
+
+        parameters=False оставляет текущие параметры мира (например, заданные
+        ползунками GUI). Скрытое состояние тоже сбрасывается: все шары
+        просыпаются с чистой историей усыпления, импульсы решателя забываются,
+        поэтому одинаковые снимки дают одинаковые последующие шаги.
+        """
+        if snapshot.ball_count != len(self._balls) or snapshot.line_count != len(self.static_lines):
+            raise ValueError("Снимок сделан для другой сцены")
+        if self._vector_engine is not None:
+            self._vector_engine.load_state(snapshot.balls)
+        else:
+            restore_balls(self._balls, snapshot.balls)
+        restore_lines(self.static_lines, snapshot.lines)
+        self._lines_changed()
+        if parameters:
+            self.set_parameters(**snapshot.parameters)
+        self.invalidate()
+        if self._vector_engine is not None:
+            self._vector_engine.reset_sleep()
+        elif self._sleep is not None:
+            self._sleep.reset()
+        # Шары уже разбужены сбросом: следующий шаг не будит их повторно
+        self._woken_version = self.settings.version
+        self.reset_time()
+        self.t = snapshot.t
+
+    def _lines_changed(self):
+        # Параллельный движок держит копии линий в рабочих процессах
+        update_lines = getattr(self._vector_engine, "update_lines", None)
+        if update_lines is not None:
+            update_lines(self.table_line, self.segments)
+
+    def close(self):
+        """Освобождает ресурсы движка (рабочие процессы параллельного режима)."""
+        close = getattr(self._vector_engine, "close", None)
+        if close is not None:
+            close()
 
     def reset_time(self):
         self.t = 0.0
+        # Импульсы прошлых шагов после сброса объектов уже не подходят
+        if self.solver is not None:
+            self.solver.reset()
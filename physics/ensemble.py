@@ -0,0 +1,285 @@
+"""Ансамбли: одна сцена, много наборов параметров, пул процессов.
+
+run_ensemble запускает headless-симуляции сцены для каждого набора
+параметров мира (gravity, bounce, friction, time_scale, mpp) и выдаёт
+сводные метрики прогонов по мере их завершения:
+
+* settle_time    - время (с), после которого скорость всех шаров остаётся
+                   ниже settle_speed (None, если сцена не успокоилась);
+* energy_loss    - потеря полной механической энергии за прогон (Дж) и
+                   её доля energy_loss_fraction;
+* max_penetration - наибольшее перекрытие шар-шар или шар-линия (м).
+
+Сцена передаётся рабочим один раз, при запуске пула, буфером двоичного
+формата (scene_to_bytes); каждый прогон строит объекты из этого буфера.
+Наборы параметров - сетка (parameter_grid) или случайная выборка
+(random_parameters). Пример:
+
+    python -m physics.ensemble --scene pile --cols 20 --rows 5 \\
+        --grid bounce=0.2,0.5,0.8 friction=0.99,0.999 --steps 600 --processes 4
+"""
+import argparse
+import itertools
+import json
+import math
+import multiprocessing
+import random
+import sys
+import time
+from .core import PhysicsSimulator
+from .objects import MPP, Ball
+from .scene_io import Scene, load_scene, scene_from_bytes, scene_to_bytes
+from .scenes import SCENES
+
+# Параметры мира, которые можно перебирать
+SWEEP_PARAMETERS = ("gravity", "bounce", "friction", "time_scale", "mpp")
+METRICS = ("settle_time", "energy_loss", "energy_loss_fraction", "max_penetration")
+
+# Состояние рабочего процесса: сцена и настройки прогона, заданные при запуске пула
+_worker = {}
+
+
+def parameter_grid(**values) -> list:
+    """Все сочетания значений: parameter_grid(bounce=[0.2, 0.8], friction=[0.99, 0.999])."""
+    names = list(values)
+    return [dict(zip(names, combination))
+            for combination in itertools.product(*(values[name] for name in names))]
+
+
+def random_parameters(count: int, seed=None, **ranges) -> list:
+    """count наборов, каждый параметр равномерно из своего диапазона (low, high)."""
+    rng = random.Random(seed)
+    return [{name: rng.uniform(low, high) for name, (low, high) in ranges.items()}
+            for _ in range(count)]
+
+
+def scene_width(scene: Scene) -> int:
+    """Ширина мира в пикселях: до правого края линий с запасом 4 м."""
+    lines = scene.lines
+    right = max(itertools.chain(lines["x1"], lines["x2"]), default=0.0)
+    return int((right + 4) / MPP)
+
+
+def max_penetration(simulator) -> float:
+    """Наибольшее перекрытие шар-шар или шар-линия в текущем состоянии (м)."""
+    balls = simulator._balls
+    depth = 0.0
+    for i, j in simulator.broad_phase.iter_pairs(balls):
+        collision, _, overlap = balls[i].check_collision_with_ball(balls[j])
+        if collision and overlap > depth:
+            depth = overlap
+    segments = simulator.segments
+    lines = simulator.static_lines
+    for ball in balls:
+        if segments is not None:
+            lines = segments.query(ball.x, ball.y, ball.radius)
+        for line in lines:
+            collision, _, overlap = ball.check_line_collision(line)
+            if collision and overlap > depth:
+                depth = overlap
+    return depth * simulator.mpp
+
+
+def max_speed(simulator) -> float:
+    """Наибольшая скорость шара (м/с)."""
+    n = len(simulator._balls)
+    if n == 0:
+        return 0.0
+    columns = memoryview(simulator.state_columns(("vx", "vy"))).cast("d")
+    return max(map(math.hypot, columns[:n], columns[n:])) * simulator.mpp
+
+
+def run_member(scene: Scene, parameters: dict, steps: int = 600, dt: float = 1 / 60,
+               options: dict = None, settle_speed: float = 0.05, sample_every: int = 10) -> dict:
+    """Один прогон сцены с параметрами parameters. Возвращает словарь метрик.
+
+    options - остальные аргументы PhysicsSimulator (engine, width, solver...).
+    Перекрытия проверяются каждые sample_every шагов и после последнего: полный
+    проход по парам на Python стоит почти столько же, сколько сам шаг.
+    """
+    unknown = set(parameters) - set(SWEEP_PARAMETERS)
+    if unknown:
+        raise ValueError(f"Неизвестные параметры: {', '.join(sorted(unknown))}")
+    options = dict(options or {})
+    options.setdefault("width", scene_width(scene))
+    objects, table = scene.to_objects()
+    values = dict(parameters)
+    time_scale = values.pop("time_scale", 1.0)
+    simulator = PhysicsSimulator(objects=objects, table_line=table, **options, **values)
+    simulator.time_scale = time_scale
+    start = time.perf_counter()
+    try:
+        initial = simulator.total_energy
+        penetration = max_penetration(simulator)
+        # Момент последнего шага, на котором что-то ещё двигалось
+        moving_until = 0.0
+        still = max_speed(simulator) < settle_speed
+        for step in range(1, steps + 1):
+            simulator.update(dt)
+            still = max_speed(simulator) < settle_speed
+            if not still:
+                moving_until = simulator.t
+            if step % sample_every == 0 or step == steps:
+                penetration = max(penetration, max_penetration(simulator))
+        final = simulator.total_energy
+    finally:
+        simulator.close()
+    return {
+        "parameters": parameters,
+        "balls": sum(isinstance(obj, Ball) for obj in objects),
+        "steps": steps,
+        "t": simulator.t,
+        "settle_time": moving_until if still else None,
+        "energy_initial": initial,
+        "energy_final": final,
+        "energy_loss": initial - final,
+        "energy_loss_fraction": (initial - final) / initial if initial else None,
+        "max_penetration": penetration,
+        "elapsed": time.perf_counter() - start,
+    }
+
+
+def _init_worker(scene_bytes, settings):
+    _worker["scene"] = scene_from_bytes(scene_bytes)
+    _worker["settings"] = settings
+
+
+def _run_task(task):
+    index, parameters = task
+    result = run_member(_worker["scene"], parameters, **_worker["settings"])
+    result["index"] = index
+    return result
+
+
+def run_ensemble(scene: Scene, parameters, steps: int = 600, dt: float = 1 / 60,
+                 options: dict = None, processes: int = None, settle_speed: float = 0.05,
+                 sample_every: int = 10, chunksize: int = 1):
+    """Прогоняет сцену для каждого набора parameters; выдаёт результаты по мере готовности.
+
+    Порядок выдачи - порядок завершения, номер набора в parameters - в
+    поле index. processes=1 выполняет прогоны в текущем процессе, None -
+    по процессу на ядро. Движок parallel внутри пула недоступен: рабочие
+    пула не могут запускать свои процессы.
+    """
+    options = dict(options or {})
+    if options.get("engine") == "parallel":
+        raise ValueError("Ансамбль не поддерживает движок parallel")
+    options.setdefault("width", scene_width(scene))
+    settings = {"steps": steps, "dt": dt, "options": options, "settle_speed": settle_speed,
+                "sample_every": max(1, sample_every)}
+    tasks = list(enumerate(parameters))
+    # Рабочим передаётся один буфер сцены, а не списки объектов на каждый прогон
+    scene_bytes = scene_to_bytes(scene)
+    if processes == 1:
+        _init_worker(scene_bytes, settings)
+        try:
+            for task in tasks:
+                yield _run_task(task)
+        finally:
+            _worker.clear()
+        return
+    with multiprocessing.Pool(processes, initializer=_init_worker,
+                              initargs=(scene_bytes, settings)) as pool:
+        yield from pool.imap_unordered(_run_task, tasks, chunksize)
+
+
+def aggregate(results) -> dict:
+    """Сводка по ансамблю: count/mean/min/max каждой метрики и лучшие наборы.
+
+    settled - сколько прогонов успокоилось; best - параметры прогона с
+    наименьшим значением метрики.
+    """
+    results = list(results)
+    summary = {"runs": len(results),
+               "settled": sum(result["settle_time"] is not None for result in results)}
+    for metric in METRICS:
+        values = [(result[metric], result) for result in results if result[metric] is not None]
+        if not values:
+            summary[metric] = None
+            continue
+        numbers = [value for value, _ in values]
+        best = min(values, key=lambda item: item[0])[1]
+        summary[metric] = {"count": len(numbers), "mean": sum(numbers) / len(numbers),
+                           "min": min(numbers), "max": max(numbers),
+                           "best": best["parameters"]}
+    return summary
+
+
+def _parse_grid(items):
+    # bounce=0.2,0.5,0.8 -> {"bounce": [0.2, 0.5, 0.8]}
+    values = {}
+    for item in items:
+        name, _, numbers = item.partition("=")
+        values[name] = [float(number) for number in numbers.split(",")]
+    return values
+
+
+def _parse_ranges(items):
+    # bounce=0.1:0.9 -> {"bounce": (0.1, 0.9)}
+    ranges = {}
+    for item in items:
+        name, _, bounds = item.partition("=")
+        low, _, high = bounds.partition(":")
+        ranges[name] = (float(low), float(high))
+    return ranges
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m physics.ensemble",
+                                     description="Перебор параметров мира на пуле процессов")
+    parser.add_argument("--scene", choices=sorted(SCENES), default="grid")
+    parser.add_argument("--scene-file", default=None,
+                        help="Загрузить сцену из файла (.json или двоичный) вместо --scene")
+    parser.add_argument("--cols", type=int, default=20)
+    parser.add_argument("--rows", type=int, default=10)
+    parser.add_argument("--grid", nargs="+", default=[], metavar="NAME=V1,V2",
+                        help="Сетка значений параметров")
+    parser.add_argument("--random", type=int, default=0, help="Число случайных наборов")
+    parser.add_argument("--range", nargs="+", default=[], metavar="NAME=LOW:HIGH",
+                        help="Диапазоны параметров для --random")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--steps", type=int, default=600)
+    parser.add_argument("--dt", type=float, default=1 / 60)
+    parser.add_argument("--engine", choices=["python", "numpy"], default="python")
+    parser.add_argument("--processes", type=int, default=None,
+                        help="Число процессов (по умолчанию - все ядра, 1 - без пула)")
+    parser.add_argument("--settle-speed", type=float, default=0.05,
+                        help="Скорость (м/с), ниже которой шар считается покоящимся")
+    parser.add_argument("--sample-every", type=int, default=10,
+                        help="Проверять перекрытия каждые N шагов")
+    parser.add_argument("--out", default=None, help="Сохранить результаты (JSON Lines)")
+    args = parser.parse_args(argv)
+
+    if args.scene_file:
+        scene = load_scene(args.scene_file)
+    else:
+        objects, table = SCENES[args.scene](cols=args.cols, rows=args.rows)
+        scene = Scene.from_objects(objects, table=table)
+    parameters = parameter_grid(**_parse_grid(args.grid)) if args.grid else []
+    if args.random:
+        parameters += random_parameters(args.random, args.seed, **_parse_ranges(args.range))
+    if not parameters:
+        parser.error("нужны --grid или --random")
+
+    start = time.perf_counter()
+    results = []
+    out = open(args.out, "w", encoding="utf-8") if args.out else None
+    try:
+        for result in run_ensemble(scene, parameters, steps=args.steps, dt=args.dt,
+                                   options={"engine": args.engine}, processes=args.processes,
+                                   settle_speed=args.settle_speed,
+                                   sample_every=args.sample_every):
+            results.append(result)
+            line = json.dumps(result)
+            print(line, flush=True)
+            if out is not None:
+                out.write(line + "\n")
+    finally:
+        if out is not None:
+            out.close()
+    print(json.dumps({"summary": aggregate(results)}))
+    print(f"{len(results)} прогонов за {time.perf_counter() - start:.2f} с", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,35 @@
-import dearpygui.dearpygui as dpg
 import math
 from typing import Tuple
 
 MPP = 0.1  # 1 пиксель = 0.1 метра
 
+
+def _ray_circle_toi(px, py, dx, dy, cx, cy, r):
+    """Наименьшее t в [0, 1], при котором точка P + t*D попадает на окружность (C, r)."""
+    fx = px - cx
+    fy = py - cy
+    a = dx**2 + dy**2
+    c = fx**2 + fy**2 - r**2
+    if a == 0 or c <= 0:
+        return None
+    b = fx * dx + fy * dy
+    disc = b**2 - a * c
+    if b >= 0 or disc < 0:
+        return None
+    t = (-b - math.sqrt(disc)) / a
+    return t if t <= 1 else None
+
+
 class Ball:
+    # Без __dict__: на больших сценах словари атрибутов весили больше самих данных
+    __slots__ = ("x", "y", "radius", "mass", "vx", "vy", "ax", "ay", "color", "fill_color",
+                 "rotation", "rotation_degrees", "angular_velocity", "sleeping",
+                 "line_contact", "handle", "_prev_vx", "_prev_vy",
+                 # Состояние усыпления (задаёт SleepManager)
+                 "_still_frames", "_ground_frames", "_avg_vx", "_avg_vy", "_island",
+                 # Ссылка на массивы движка numpy (см. vectorized.BallView)
+                 "_arrays", "_index")
+
     def __init__(self, cord: Tuple[float, float] = (10, 20),
                  r: float = 20, mass: float = 1.0,
                  color: Tuple[int, int, int] = (255, 50, 50),
@@ -22,17 +47,82 @@ class Ball:
         self.rotation = 0
         self.rotation_degrees = 0
         self.angular_velocity = 0
-        self.draw_tag = None
+        self.sleeping = False
+        self.line_contact = False
+        # Стабильный дескриптор из ObjectRegistry (None до регистрации)
+        self.handle = None
         self._prev_vx = 0.0
         self._prev_vy = 0.0
 
+    @classmethod
+    def from_state(cls, x: float, y: float, radius: float, mass: float = 1.0,
+                   vx: float = 0.0, vy: float = 0.0, rotation: float = 0.0,
+                   angular_velocity: float = 0.0, **kwargs):
+        """Шар по состоянию в пикселях (без пересчёта из метров) - для загрузки сцен."""
+        ball = cls(cord=(0, 0), r=0, mass=mass, **kwargs)
+        ball.x = x
+        ball.y = y
+        ball.radius = radius
+        ball.vx = vx
+        ball.vy = vy
+        ball.rotation = rotation
+        ball.rotation_degrees = math.degrees(rotation)
+        ball.angular_velocity = angular_velocity
+        return ball
+
     def update(self, dt: float, gravity: float, bounce: float,
-               friction: float, table_line, width: int, mpp: float):
+               friction: float, table_line, width: int, mpp: float,
+               ccd: bool = False, segments=None):
+        start_x = self.x
+        start_y = self.y
+
+        self.integrate_velocity(dt, gravity)
+
+        self.x += self.vx * dt
+        self.y += self.vy * dt
+
+        if dt != 0:
+            self.ax = (self.vx - self._prev_vx) / dt
+            self.ay = (self.vy - self._prev_vy) / dt
+
+        # С индексом отрезков проверяем только линии рядом с путём шара
+        if segments is not None:
+            lines = segments.query_path(start_x, start_y, self.x, self.y, self.radius)
+        else:
+            lines = (table_line,)
+
+        # При CCD сначала ищем момент касания на всём пути за шаг: дискретная
+        # проверка в конце шага не видит шар, пролетевший сквозь линию
+        self.line_contact = False
+        impact_line = None
+        if ccd:
+            first_toi = None
+            for line in lines:
+                hit, toi, normal = self.sweep_line_collision(line, start_x, start_y)
+                if hit and (first_toi is None or toi < first_toi):
+                    impact_line, first_toi, impact_normal = line, toi, normal
+            if impact_line is not None:
+                self.resolve_line_impact(impact_line, first_toi, impact_normal,
+                                         start_x, start_y, dt, bounce, friction)
+                self.line_contact = True
+        for line in lines:
+            if line is impact_line:
+                continue
+            collision, normal, depth = self.check_line_collision(line)
+            if collision:
+                self.resolve_line_collision(line, normal, depth, bounce, friction)
+                self.line_contact = True
+
+        self.finish_step(dt, bounce, width)
+
+    def integrate_velocity(self, dt: float, gravity: float):
+        """Первая стадия шага: запоминает скорость и добавляет гравитацию."""
         self._prev_vx = self.vx
         self._prev_vy = self.vy
-
         self.vy += (gravity) * dt
 
+    def integrate_position(self, dt: float, bounce: float, width: int):
+        """Последняя стадия шага для решателя контактов: перемещение по скорости."""
         self.x += self.vx * dt
         self.y += self.vy * dt
 
@@ -40,10 +130,10 @@ class Ball:
             self.ax = (self.vx - self._prev_vx) / dt
             self.ay = (self.vy - self._prev_vy) / dt
 
-        collision, normal, depth = self.check_line_collision(table_line)
-        if collision:
-            self.resolve_line_collision(table_line, normal, depth, bounce, friction)
+        self.finish_step(dt, bounce, width)
 
+    def finish_step(self, dt: float, bounce: float, width: int):
+        """Стенки мира и вращение."""
         if self.x - self.radius < 0:
             self.x = self.radius
             self.vx *= -bounce
@@ -81,6 +171,67 @@ class Ball:
             return True, (normal_x, normal_y), depth
         return False, (0, 0), 0
 
+    def sweep_line_collision(self, line, start_x, start_y):
+        """Swept-тест круга против отрезка на пути (start_x, start_y) -> (x, y).
+
+        Возвращает (столкновение, доля шага до касания, нормаль). Если шар уже
+        касался линии в начале пути, столкновение засчитывается в момент 0,
+        только когда центр шара за шаг пересекает линию - остальное отработает
+        дискретная проверка.
+        """
+        line_vec_x = line.x2 - line.x1
+        line_vec_y = line.y2 - line.y1
+        line_len_sq = line_vec_x**2 + line_vec_y**2
+        move_x = self.x - start_x
+        move_y = self.y - start_y
+        if line_len_sq == 0 or (move_x == 0 and move_y == 0):
+            return False, 0, (0, 0)
+        line_len = math.sqrt(line_len_sq)
+        r = self.radius
+
+        # Касание боковой стороны: расстояние до прямой линии становится равным r
+        normal_x = -line_vec_y / line_len
+        normal_y = line_vec_x / line_len
+        start_dist = (start_x - line.x1) * normal_x + (start_y - line.y1) * normal_y
+        end_dist = (self.x - line.x1) * normal_x + (self.y - line.y1) * normal_y
+        side = 1 if start_dist >= 0 else -1
+        start_dist *= side
+        end_dist *= side
+        if end_dist < r and start_dist > end_dist and (start_dist > r or end_dist < 0):
+            toi = max(0, (start_dist - r) / (start_dist - end_dist))
+            hit_x = start_x + move_x * toi
+            hit_y = start_y + move_y * toi
+            u = ((hit_x - line.x1) * line_vec_x + (hit_y - line.y1) * line_vec_y) / line_len_sq
+            if 0 <= u <= 1:
+                return True, toi, (normal_x * side, normal_y * side)
+
+        # Касание концов отрезка
+        best = None
+        for end_x, end_y in ((line.x1, line.y1), (line.x2, line.y2)):
+            toi = _ray_circle_toi(start_x, start_y, move_x, move_y, end_x, end_y, r)
+            if toi is not None and (best is None or toi < best[0]):
+                best = (toi, end_x, end_y)
+        if best is None:
+            return False, 0, (0, 0)
+        toi, end_x, end_y = best
+        return True, toi, ((start_x + move_x * toi - end_x) / r,
+                           (start_y + move_y * toi - end_y) / r)
+
+    def resolve_line_impact(self, line, toi, normal, start_x, start_y, dt, bounce, friction):
+        """Ставит шар в точку касания, отражает скорость и доводит остаток шага."""
+        self.x = start_x + (self.x - start_x) * toi
+        self.y = start_y + (self.y - start_y) * toi
+        # В момент касания шар может уже немного перекрывать линию
+        collision, contact_normal, depth = self.check_line_collision(line)
+        if collision:
+            normal = contact_normal
+        else:
+            depth = 0
+        self.resolve_line_collision(line, normal, depth, bounce, friction)
+        remaining = (1 - toi) * dt
+        self.x += self.vx * remaining
+        self.y += self.vy * remaining
+
     def resolve_line_collision(self, line, normal, depth, bounce, friction):
         normal_x, normal_y = normal
         self.x += normal_x * depth
@@ -99,20 +250,6 @@ class Ball:
         self.vx = new_vel_normal_x + new_vel_tangent_x
         self.vy = new_vel_normal_y + new_vel_tangent_y
 
-    def setup_physics(self, table_line, gravity, mpp):
-        from .calculations import PhysicsVariables, PhysicsCalculations
-        self.physics_vars = PhysicsVariables(self, table_line, gravity, mpp)
-        self.physics_calc = PhysicsCalculations(self, table_line, gravity, mpp)
-
-    def draw(self, drawlist_tag: str):
-        self.draw_tag = f"ball_{id(self)}"
-        dpg.draw_circle([self.x, self.y], self.radius, color=self.color,
-                        fill=self.fill_color, parent=drawlist_tag, tag=self.draw_tag)
-
-    def update_draw(self):
-        if self.draw_tag and dpg.does_item_exist(self.draw_tag):
-            dpg.configure_item(self.draw_tag, center=[self.x, self.y], radius=self.radius)
-
     def get_center(self):
         return self.x, self.y
 
@@ -160,6 +297,9 @@ class Ball:
 
 
 class Line:
+    __slots__ = ("x1", "y1", "x2", "y2", "color", "thickness", "rotation", "rotation_degrees",
+                 "handle")
+
     def __init__(self, p1: Tuple[float, float] = (-20, 0),
                  p2: Tuple[float, float] = (20, 0),
                  color: Tuple[int, int, int] = (100, 100, 100),
@@ -172,14 +312,14 @@ class Line:
         self.thickness = thickness
         self.rotation = 0
         self.rotation_degrees = 0
-        self.draw_tag = None
-
-    def draw(self, drawlist_tag: str):
-        self.draw_tag = f"line_{id(self)}"
-        dpg.draw_line([self.x1, self.y1], [self.x2, self.y2],
-                      color=self.color, thickness=self.thickness,
-                      parent=drawlist_tag, tag=self.draw_tag)
-
-    def update_draw(self):
-        if self.draw_tag and dpg.does_item_exist(self.draw_tag):
-            dpg.configure_item(self.draw_tag, p1=[self.x1, self.y1], p2=[self.x2, self.y2])
+        self.handle = None
+
+    @classmethod
+    def from_points(cls, x1: float, y1: float, x2: float, y2: float, **kwargs):
+        """Линия по концам в пикселях (без пересчёта из метров)."""
+        line = cls(**kwargs)
+        line.x1 = x1
+        line.y1 = y1
+        line.x2 = x2
+        line.y2 = y2
+        return line
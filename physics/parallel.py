@@ -0,0 +1,205 @@
+import multiprocessing
+import os
+import weakref
+from multiprocessing import shared_memory
+
+import numpy as np
+from .vectorized import FIELDS, BallArrays, VectorizedEngine, bind_views, candidate_pairs
+
+
+class SharedBallArrays(BallArrays):
+    """BallArrays, чьи поля лежат в одном блоке разделяемой памяти.
+
+    Блок создаёт главный процесс (create=True), рабочие подключаются к нему
+    по имени. Кроме полей шара в блоке хранятся порядок шаров по полосам и
+    флаги "у границы полосы", которые рабочие передают главному процессу.
+    """
+
+    def __init__(self, size: int, name: str = None):
+        self.size = size
+        floats = size * 8
+        total = max(1, floats * (len(FIELDS) + 1) + size * 2)
+        self.shm = shared_memory.SharedMemory(name=name, create=name is None, size=total)
+        buffer = self.shm.buf
+        offset = 0
+        for field in FIELDS:
+            setattr(self, field, np.ndarray(size, dtype=np.float64, buffer=buffer, offset=offset))
+            offset += floats
+        self.order = np.ndarray(size, dtype=np.int64, buffer=buffer, offset=offset)
+        offset += floats
+        self.line_contact = np.ndarray(size, dtype=bool, buffer=buffer, offset=offset)
+        offset += size
+        self.boundary = np.ndarray(size, dtype=bool, buffer=buffer, offset=offset)
+        # Усыпление в параллельном режиме не поддерживается, но BallView читает флаг
+        self.asleep = np.zeros(size, dtype=bool)
+
+    def detach(self):
+        """Копирует поля в обычную память и закрывает блок (шары остаются читаемыми)."""
+        for field in FIELDS + ("order", "line_contact", "boundary"):
+            setattr(self, field, getattr(self, field).copy())
+        self.shm.close()
+
+
+def _worker_main(conn, shm_name, size, table_line, segments):
+    """Цикл рабочего процесса: по команде обновляет свою полосу шаров."""
+    shared = SharedBallArrays(size, name=shm_name)
+    engine = VectorizedEngine.from_arrays(None)
+    try:
+        while True:
+            command = conn.recv()
+            if command is None:
+                break
+            if command[0] == "lines":
+                # Главный процесс изменил линии (правка свойств, restore)
+                table_line, segments = command[1:]
+            else:
+                _worker_step(shared, engine, table_line, segments, *command)
+            conn.send(True)
+    finally:
+        engine.arrays = None
+        shared.detach()
+        conn.close()
+
+
+def _worker_step(shared, engine, table_line, segments, start, stop, lo, hi, band, cell,
+                 dt, gravity, bounce, friction, width, ccd):
+    indices = shared.order[start:stop].copy()
+    local = shared.take(indices)
+    engine.arrays = local
+    engine.integrate(dt, gravity, bounce, friction, table_line, width,
+                     ccd=ccd, segments=segments)
+    # Шары у границ полосы (или вышедшие за неё) разрешает главный процесс
+    boundary = (local.x < lo + band) | (local.x > hi - band)
+    first, second = candidate_pairs(local.x, local.y, cell)
+    interior = ~(boundary[first] | boundary[second])
+    if interior.any():
+        engine.resolve_pairs(first[interior], second[interior], bounce)
+    shared.put(indices, local)
+    shared.boundary[indices] = boundary
+
+
+class ParallelEngine(VectorizedEngine):
+    """Многопроцессный движок для больших сцен (NumPy + разделяемая память).
+
+    Мир делится по x на полосы с равным числом шаров, по одной на рабочий
+    процесс. Рабочий интегрирует свои шары и разрешает пары внутри полосы.
+    Пары, где хотя бы один шар ближе ширины band к границе полосы, после
+    этого разрешает главный процесс - всегда в одном и том же порядке,
+    поэтому результат не зависит от того, какой рабочий закончил первым
+    (но зависит от числа рабочих: меняется разбиение на полосы).
+    """
+
+    def __init__(self, balls, workers: int = None, table_line=None, segments=None,
+                 context=None):
+        self.balls = balls
+        self.workers = max(1, workers or os.cpu_count() or 1)
+        self.arrays = SharedBallArrays(len(balls))
+        for name in FIELDS:
+            getattr(self.arrays, name)[:] = [getattr(ball, name) for ball in balls]
+        self.arrays.line_contact.fill(False)
+        bind_views(balls, self.arrays)
+        self._segment_table = None
+        self.sleep_enabled = False
+        self.sleep_velocity = 0.0
+        self.sleep_frames = 0
+        self._bounds = None
+
+        context = context or multiprocessing.get_context()
+        self._connections = []
+        self._processes = []
+        for _ in range(self.workers):
+            parent_conn, child_conn = context.Pipe()
+            process = context.Process(target=_worker_main, daemon=True,
+                                      args=(child_conn, self.arrays.shm.name, len(balls),
+                                            table_line, segments))
+            process.start()
+            child_conn.close()
+            self._connections.append(parent_conn)
+            self._processes.append(process)
+        self._finalizer = weakref.finalize(self, _shutdown, self._connections,
+                                           self._processes, self.arrays)
+
+    def enable_sleep(self, velocity, frames):
+        raise ValueError("Параллельный движок не поддерживает усыпление шаров")
+
+    # Усыпления нет: все шары всегда активны, будить нечего
+    def wake(self, ball):
+        pass
+
+    def wake_all(self):
+        pass
+
+    def reset_sleep(self):
+        pass
+
+    def update_lines(self, table_line, segments):
+        """Передаёт рабочим текущие линии: у каждого своя копия, полученная при запуске."""
+        for conn in self._connections:
+            conn.send(("lines", table_line, segments))
+        for conn in self._connections:
+            conn.recv()
+
+    def close(self):
+        """Останавливает рабочие процессы и освобождает разделяемую память."""
+        self._finalizer()
+
+    def integrate(self, dt, gravity, bounce, friction, table_line, width, ccd=False,
+                  segments=None):
+        """Шаг рабочих: интегрирование и столкновения внутри полос."""
+        a = self.arrays
+        n = a.size
+        if n == 0:
+            return
+        cell = 2 * float(a.radius.max())
+        # Полосы с равным числом шаров; границы - x шаров-разделителей
+        order = np.argsort(a.x, kind="stable")
+        a.order[:] = order
+        cuts = [n * k // self.workers for k in range(self.workers + 1)]
+        bounds = [-np.inf] + [float(a.x[order[cut]]) for cut in cuts[1:-1]] + [np.inf]
+        self._bounds = np.array(bounds[1:-1])
+        self._band = cell
+        for k, conn in enumerate(self._connections):
+            conn.send((cuts[k], cuts[k + 1], bounds[k], bounds[k + 1], cell, cell,
+                       dt, gravity, bounce, friction, width, ccd))
+        for conn in self._connections:
+            conn.recv()
+
+    def resolve_ball_collisions(self, bounce):
+        """Пары у границ полос, которые рабочие пропустили."""
+        a = self.arrays
+        if self._bounds is None or self._bounds.size == 0:
+            return
+        # Кандидаты - шары у границ и все, до кого они могут дотянуться
+        reach = 3 * self._band
+        position = np.searchsorted(self._bounds, a.x)
+        left = self._bounds[np.maximum(position - 1, 0)]
+        right = self._bounds[np.minimum(position, self._bounds.size - 1)]
+        near = (np.abs(a.x - left) < reach) | (np.abs(a.x - right) < reach) | a.boundary
+        zone = np.flatnonzero(near)
+        if zone.size < 2:
+            return
+        local = a.take(zone)
+        first, second = candidate_pairs(local.x, local.y, self._band)
+        flagged = a.boundary[zone]
+        keep = flagged[first] | flagged[second]
+        if not keep.any():
+            return
+        engine = VectorizedEngine.from_arrays(local)
+        engine.resolve_pairs(first[keep], second[keep], bounce)
+        a.put(zone, local)
+
+
+def _shutdown(connections, processes, arrays):
+    for conn in connections:
+        try:
+            conn.send(None)
+        except (BrokenPipeError, OSError):
+            pass
+    for process in processes:
+        process.join(timeout=5)
+        if process.is_alive():
+            process.terminate()
+    for conn in connections:
+        conn.close()
+    arrays.detach()
+    arrays.shm.unlink()
@@ -0,0 +1,136 @@
+"""Профилирование стадий шага симуляции и кадра GUI.
+
+Profiler собирает длительности стадий (в миллисекундах) и счётчики
+(проверки пар, контакты, активные шары) в скользящие окна последних
+window значений. Подключение:
+
+    simulator.profiler = Profiler()
+    ...
+    simulator.profiler.dump("profile.json")   # или .csv
+
+Без профилировщика (simulator.profiler = None, по умолчанию) стадии
+проверяют только этот атрибут и не вызывают таймер.
+"""
+import csv
+import json
+import math
+from bisect import bisect_right
+from collections import deque
+from time import perf_counter
+
+# Границы корзин гистограммы времени (мс): от 1/16 мс, каждая вдвое шире
+TIME_EDGES = tuple(2.0 ** k for k in range(-4, 11))
+SUMMARY_FIELDS = ("count", "last", "mean", "p50", "p95", "p99", "max")
+
+
+class RollingHistogram:
+    """Последние window значений величины и сводка по ним."""
+
+    def __init__(self, window: int = 600):
+        self.values = deque(maxlen=window)
+        # Сколько значений добавлено за всё время (окно хранит только последние)
+        self.total = 0
+
+    def add(self, value: float):
+        self.values.append(value)
+        self.total += 1
+
+    def summary(self) -> dict:
+        values = sorted(self.values)
+        if not values:
+            return {name: 0 for name in SUMMARY_FIELDS}
+
+        def percentile(q):
+            return values[min(len(values) - 1, math.ceil(q * len(values)) - 1)]
+        return {
+            "count": len(values),
+            "last": self.values[-1],
+            "mean": sum(values) / len(values),
+            "p50": percentile(0.50),
+            "p95": percentile(0.95),
+            "p99": percentile(0.99),
+            "max": values[-1],
+        }
+
+    def histogram(self, edges=TIME_EDGES) -> list:
+        """Число значений по корзинам: до edges[0], между соседними границами, после последней."""
+        counts = [0] * (len(edges) + 1)
+        for value in list(self.values):
+            counts[bisect_right(edges, value)] += 1
+        return counts
+
+
+class Profiler:
+    """Скользящие гистограммы стадий и счётчиков.
+
+    Стадия замеряется отрезком времени: start = perf_counter() перед ней и
+    start = profiler.lap(имя, start) после, так подряд идущие стадии
+    замеряются одним вызовом таймера на границу.
+    """
+
+    def __init__(self, window: int = 600):
+        self.window = window
+        self.stages = {}
+        self.counters = {}
+
+    def _histogram(self, table, name):
+        histogram = table.get(name)
+        if histogram is None:
+            histogram = table[name] = RollingHistogram(self.window)
+        return histogram
+
+    def lap(self, name: str, start: float) -> float:
+        """Записывает время стадии name с момента start. Возвращает текущий момент."""
+        now = perf_counter()
+        self._histogram(self.stages, name).add((now - start) * 1000)
+        return now
+
+    def add_time(self, name: str, milliseconds: float):
+        self._histogram(self.stages, name).add(milliseconds)
+
+    def count(self, name: str, value):
+        self._histogram(self.counters, name).add(value)
+
+    def clear(self):
+        self.stages.clear()
+        self.counters.clear()
+
+    def summary(self) -> dict:
+        return {
+            "window": self.window,
+            "stages_ms": {name: h.summary() for name, h in list(self.stages.items())},
+            "counters": {name: h.summary() for name, h in list(self.counters.items())},
+        }
+
+    def to_dict(self) -> dict:
+        data = self.summary()
+        data["time_edges_ms"] = list(TIME_EDGES)
+        data["histograms_ms"] = {name: h.histogram() for name, h in list(self.stages.items())}
+        return data
+
+    def dump(self, path: str):
+        """Сохраняет сводку: .csv - строка на стадию или счётчик, иначе JSON с гистограммами."""
+        if path.lower().endswith(".csv"):
+            with open(path, "w", newline="", encoding="utf-8") as file:
+                writer = csv.writer(file)
+                writer.writerow(("kind", "name") + SUMMARY_FIELDS)
+                for kind, table in (("stage_ms", self.stages), ("counter", self.counters)):
+                    for name, histogram in list(table.items()):
+                        summary = histogram.summary()
+                        writer.writerow((kind, name) + tuple(summary[field]
+                                                             for field in SUMMARY_FIELDS))
+        else:
+            with open(path, "w", encoding="utf-8") as file:
+                json.dump(self.to_dict(), file, indent=1)
+
+    def format_lines(self):
+        """Строки для оверлея: p50/p95/max стадий и средние счётчиков."""
+        # Копии словарей: стадии может дописывать поток симуляции (SimulationThread)
+        lines = []
+        for name, histogram in list(self.stages.items()):
+            s = histogram.summary()
+            lines.append(f"{name}: {s['p50']:.2f} / {s['p95']:.2f} / {s['max']:.2f} мс")
+        for name, histogram in list(self.counters.items()):
+            s = histogram.summary()
+            lines.append(f"{name}: {s['mean']:.0f} (макс. {s['max']:.0f})")
+        return lines
@@ -0,0 +1,279 @@
+"""Потоковая запись траекторий шаров на диск.
+
+Запись - каталог из трёх файлов:
+
+* meta.json   - описание записи: число шаров, их handle, столбцы, mpp;
+* data.bin    - сжатые zlib блоки столбцов, дописываются по мере записи;
+* index.jsonl - строка на блок: шаги, интервал времени, mpp и смещения
+  столбцов в data.bin.
+
+Блок (chunk) содержит chunk_steps записанных шагов. Столбец в блоке -
+матрица float64 шагов x шаров (по строке на шаг), плюс столбцы t и step.
+Положения и скорости хранятся в пикселях (как в симуляторе), энергии - в Дж.
+Смена mpp посреди записи закрывает текущий блок: в блоке один mpp, и
+читатель переводит пиксели в метры по mpp своего блока.
+"""
+import json
+import mmap
+import os
+import zlib
+from array import array
+
+TRAJECTORY_FORMAT = "conphys-trajectory"
+TRAJECTORY_VERSION = 1
+STATE_COLUMNS = ("x", "y", "vx", "vy")
+ENERGY_COLUMNS = ("kinetic", "potential", "total")
+# Столбцы в пикселях, которые читатель переводит в метры
+_LENGTH_COLUMNS = ("x", "y", "vx", "vy")
+
+
+class TrajectoryRecorder:
+    """Пишет состояние шаров после каждого every-го шага симулятора.
+
+    Подключается как hook шага (attach). Шаги копятся в буферах текущего
+    блока; заполненный блок уходит в ограниченную очередь, а сжимает и
+    пишет его фоновый поток. Блок - chunk_steps шагов или, если не задано,
+    столько шагов, сколько помещается в chunk_bytes. Память ограничена
+    (queue_size + 1) блоками; если диск не успевает, шаг симуляции ждёт
+    освобождения очереди.
+    """
+
+    def __init__(self, path: str, every: int = 1, chunk_steps: int = None,
+                 chunk_bytes: int = 4 * 2**20, energies: bool = True,
+                 compression: int = 1, queue_size: int = 4):
+        self.path = path
+        self.every = max(1, every)
+        self.chunk_steps = chunk_steps
+        self.chunk_bytes = chunk_bytes
+        self.energies = energies
+        self.compression = compression
+        self.columns = STATE_COLUMNS + (ENERGY_COLUMNS if energies else ())
+        self.simulator = None
+        self.ball_count = 0
+        self.recorded_steps = 0
+        self.queue_size = max(1, queue_size)
+        self._queue = None
+        self._thread = None
+        self._error = None
+        self._reset_chunk()
+
+    def _reset_chunk(self):
+        self._buffers = {name: bytearray() for name in self.columns}
+        self._times = array("d")
+        self._steps = array("q")
+        self._mpp = None
+
+    def attach(self, simulator):
+        """Начинает запись: создаёт файлы и подключается к шагам simulator."""
+        if self.simulator is not None:
+            raise RuntimeError("Запись уже подключена к симулятору")
+        # threading и queue нужны только при записи: не тянем их в import physics
+        import queue
+        import threading
+        os.makedirs(self.path, exist_ok=True)
+        balls = simulator._balls
+        self.simulator = simulator
+        self.ball_count = len(balls)
+        if self.chunk_steps is None:
+            step_bytes = max(1, self.ball_count * 8 * len(self.columns))
+            self.chunk_steps = max(1, self.chunk_bytes // step_bytes)
+        meta = {
+            "format": TRAJECTORY_FORMAT,
+            "version": TRAJECTORY_VERSION,
+            "balls": self.ball_count,
+            "handles": [ball.handle for ball in balls],
+            "columns": list(self.columns),
+            "dtype": "<f8",
+            "compression": "zlib",
+            "mpp": simulator.mpp,
+            "every": self.every,
+            "chunk_steps": self.chunk_steps,
+        }
+        with open(os.path.join(self.path, "meta.json"), "w", encoding="utf-8") as file:
+            json.dump(meta, file)
+        self._data = open(os.path.join(self.path, "data.bin"), "wb")
+        self._index = open(os.path.join(self.path, "index.jsonl"), "w", encoding="utf-8")
+        self._queue = queue.Queue(maxsize=self.queue_size)
+        self._thread = threading.Thread(target=self._writer, name="trajectory-writer",
+                                        daemon=True)
+        self._thread.start()
+        simulator.step_hooks.append(self)
+        self(simulator, initial=True)
+
+    def __call__(self, simulator, initial: bool = False):
+        if not initial and simulator.steps % self.every:
+            return
+        mpp = simulator.mpp
+        if mpp != self._mpp:
+            # Пиксели блока переводятся в метры одним mpp
+            self.flush()
+            self._mpp = mpp
+        n = self.ball_count
+        state = memoryview(simulator.state_columns(STATE_COLUMNS))
+        size = n * 8
+        buffers = self._buffers
+        for k, name in enumerate(STATE_COLUMNS):
+            buffers[name] += state[k * size:(k + 1) * size]
+        if self.energies:
+            quantities = simulator.quantities()
+            for name, column in zip(ENERGY_COLUMNS, (quantities.kinetic_energy,
+                                                     quantities.potential_energy,
+                                                     quantities.total_energy)):
+                buffers[name] += memoryview(column).cast("B")
+        self._times.append(simulator.t)
+        self._steps.append(simulator.steps)
+        self.recorded_steps += 1
+        if len(self._times) >= self.chunk_steps:
+            self.flush()
+
+    def flush(self):
+        """Отдаёт накопленные шаги фоновому потоку."""
+        if self._error is not None:
+            raise RuntimeError("Ошибка записи траекторий") from self._error
+        if not self._times:
+            return
+        self._queue.put((self._times, self._steps, self._buffers, self._mpp))
+        self._reset_chunk()
+
+    def close(self):
+        """Дописывает остаток, останавливает поток и закрывает файлы."""
+        if self.simulator is None:
+            return
+        if self in self.simulator.step_hooks:
+            self.simulator.step_hooks.remove(self)
+        try:
+            self.flush()
+        finally:
+            self._queue.put(None)
+            self._thread.join()
+            self._data.close()
+            self._index.close()
+            self.simulator = None
+        if self._error is not None:
+            raise RuntimeError("Ошибка записи траекторий") from self._error
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _writer(self):
+        offset = 0
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            if self._error is not None:
+                continue
+            times, steps, buffers, mpp = item
+            try:
+                entry = {"first_step": steps[0], "last_step": steps[-1], "steps": len(times),
+                         "t0": times[0], "t1": times[-1], "mpp": mpp, "columns": {}}
+                blobs = [("t", times.tobytes()), ("step", steps.tobytes())]
+                blobs += [(name, bytes(buffers[name])) for name in self.columns]
+                for name, raw in blobs:
+                    blob = zlib.compress(raw, self.compression)
+                    self._data.write(blob)
+                    entry["columns"][name] = [offset, len(blob)]
+                    offset += len(blob)
+                self._data.flush()
+                self._index.write(json.dumps(entry) + "\n")
+                self._index.flush()
+            except Exception as error:  # поток не должен молча умереть
+                self._error = error
+
+
+class TrajectoryReader:
+    """Чтение записи TrajectoryRecorder (нужен NumPy).
+
+    data.bin отображается в память; распаковываются только блоки, попавшие
+    в запрошенный интервал времени.
+    """
+
+    def __init__(self, path: str):
+        import numpy as np
+        self._np = np
+        with open(os.path.join(path, "meta.json"), encoding="utf-8") as file:
+            self.meta = json.load(file)
+        if self.meta.get("format") != TRAJECTORY_FORMAT:
+            raise ValueError(f"{path}: не запись траекторий Conphys")
+        with open(os.path.join(path, "index.jsonl"), encoding="utf-8") as file:
+            self.chunks = [json.loads(line) for line in file if line.strip()]
+        self.ball_count = self.meta["balls"]
+        self.columns = tuple(self.meta["columns"])
+        self._handles = {handle: i for i, handle in enumerate(self.meta["handles"])}
+        self._file = open(os.path.join(path, "data.bin"), "rb")
+        size = os.fstat(self._file.fileno()).st_size
+        self._data = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+
+    def close(self):
+        if isinstance(self._data, mmap.mmap):
+            self._data.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    @property
+    def step_count(self):
+        return sum(chunk["steps"] for chunk in self.chunks)
+
+    def _blob(self, chunk, name, dtype):
+        offset, length = chunk["columns"][name]
+        raw = zlib.decompress(self._data[offset:offset + length])
+        return self._np.frombuffer(raw, dtype=dtype)
+
+    def times(self, t0: float = None, t1: float = None):
+        """Времена записанных шагов в интервале [t0, t1]."""
+        np = self._np
+        parts = [self._blob(chunk, "t", np.float64) for chunk in self._select(t0, t1)]
+        times = np.concatenate(parts) if parts else np.empty(0)
+        return times[self._mask(times, t0, t1)]
+
+    def read(self, column: str, t0: float = None, t1: float = None, objects=None,
+             si: bool = True):
+        """Столбец column за интервал [t0, t1]: (times, values[шаг, шар]).
+
+        objects - handle шаров (по умолчанию все). При si=True положения и
+        скорости переводятся из пикселей в метры и м/с.
+        """
+        np = self._np
+        if column not in self.columns:
+            raise KeyError(f"Нет столбца {column!r}; есть {', '.join(self.columns)}")
+        indices = None
+        if objects is not None:
+            indices = np.array([self._handles[handle] for handle in objects], dtype=np.int64)
+        times_parts = []
+        value_parts = []
+        for chunk in self._select(t0, t1):
+            times = self._blob(chunk, "t", np.float64)
+            values = self._blob(chunk, column, np.float64).reshape(len(times), self.ball_count)
+            keep = self._mask(times, t0, t1)
+            values = values[keep]
+            if indices is not None:
+                values = values[:, indices]
+            if si and column in _LENGTH_COLUMNS:
+                # Старые записи хранят mpp только в meta.json
+                values = values * chunk.get("mpp", self.meta["mpp"])
+            times_parts.append(times[keep])
+            value_parts.append(values)
+        width = self.ball_count if indices is None else len(indices)
+        times = np.concatenate(times_parts) if times_parts else np.empty(0)
+        values = np.concatenate(value_parts) if value_parts else np.empty((0, width))
+        return times, values
+
+    def _select(self, t0, t1):
+        return [chunk for chunk in self.chunks
+                if (t0 is None or chunk["t1"] >= t0) and (t1 is None or chunk["t0"] <= t1)]
+
+    def _mask(self, times, t0, t1):
+        keep = self._np.ones(len(times), dtype=bool)
+        if t0 is not None:
+            keep &= times >= t0
+        if t1 is not None:
+            keep &= times <= t1
+        return keep
@@ -0,0 +1,40 @@
+class ObjectRegistry:
+    """Реестр объектов сцены со стабильными целочисленными дескрипторами.
+
+    Объект получает handle при регистрации (атрибут obj.handle). Дескрипторы
+    не переиспользуются, поэтому в отличие от id(obj) ссылка по handle не
+    укажет на другой объект после удаления старого. Один реестр делят
+    PhysicsSimulator, RenderSystem и MapLoader; команды GUI (правки свойств)
+    ссылаются на объект по handle и находят его через get.
+    """
+
+    def __init__(self):
+        self._objects = {}
+        self._next_handle = 1
+
+    def register(self, obj) -> int:
+        """Регистрирует объект (повторная регистрация возвращает прежний handle)."""
+        handle = getattr(obj, "handle", None)
+        if handle is None or self._objects.get(handle) is not obj:
+            handle = self._next_handle
+            self._next_handle += 1
+            obj.handle = handle
+            self._objects[handle] = obj
+        return handle
+
+    def remove(self, handle: int):
+        self._objects.pop(handle, None)
+
+    def get(self, handle: int):
+        """Объект по handle или None, если он удалён."""
+        return self._objects.get(handle)
+
+    def __contains__(self, obj):
+        return self._objects.get(getattr(obj, "handle", None)) is obj
+
+    def __len__(self):
+        return len(self._objects)
+
+    def __iter__(self):
+        """Объекты в порядке регистрации."""
+        return iter(self._objects.values())
@@ -0,0 +1,244 @@
+"""Детерминированный режим и воспроизведение журнала команд.
+
+DeterministicSession оборачивает PhysicsSimulator: правки параметров и
+свойств объектов не применяются сразу, а ставятся в очередь и выполняются
+на границе следующего шага. Каждая применённая команда записывается в
+журнал (InputLog) с номером шага, туда же пишутся dt шагов и контрольные
+хэши состояния. Журнал содержит сцену и начальный снимок, поэтому его
+можно воспроизвести в headless-симуляторе и сравнить состояние побитово:
+
+    python -m physics.replay session_inputs.json
+"""
+import argparse
+import base64
+import hashlib
+import json
+import struct
+import sys
+from .core import PhysicsSimulator
+from .scene_io import Scene, scene_from_dict, scene_to_dict
+from .snapshot import STATE_FIELDS, Snapshot
+
+INPUT_LOG_FORMAT = "conphys-inputs"
+INPUT_LOG_VERSION = 1
+
+
+def state_digest(simulator) -> str:
+    """SHA-256 состояния всех шаров и времени симуляции."""
+    digest = hashlib.sha256(simulator.state_columns(STATE_FIELDS))
+    digest.update(struct.pack("<d", simulator.t))
+    return digest.hexdigest()
+
+
+def snapshot_to_dict(snapshot: Snapshot) -> dict:
+    return {
+        "t": snapshot.t,
+        "parameters": snapshot.parameters,
+        "balls": base64.b64encode(snapshot.balls).decode("ascii"),
+        "lines": base64.b64encode(snapshot.lines).decode("ascii"),
+        "ball_count": snapshot.ball_count,
+        "line_count": snapshot.line_count,
+    }
+
+
+def snapshot_from_dict(data: dict) -> Snapshot:
+    return Snapshot(data["t"], data["parameters"], base64.b64decode(data["balls"]),
+                    base64.b64decode(data["lines"]), data["ball_count"], data["line_count"])
+
+
+def object_target(simulator, obj) -> dict:
+    """Ссылка на объект, не зависящая от handle: индекс среди шаров или линий."""
+    if obj in simulator.static_lines:
+        return {"line": simulator.static_lines.index(obj)}
+    return {"ball": simulator._balls.index(obj)}
+
+
+def resolve_target(simulator, target: dict):
+    if "line" in target:
+        return simulator.static_lines[target["line"]]
+    return simulator._balls[target["ball"]]
+
+
+def apply_event(simulator, kind: str, payload: dict):
+    """Выполняет команду журнала над симулятором."""
+    if kind == "parameters":
+        simulator.set_parameters(**payload)
+    elif kind == "properties":
+        obj = resolve_target(simulator, payload["target"])
+        for name, value in payload["values"].items():
+            setattr(obj, name, value)
+        simulator.wake(obj)
+    elif kind != "dt":
+        raise ValueError(f"Неизвестная команда журнала: {kind}")
+
+
+class InputLog:
+    """Журнал сеанса: сцена, начальный снимок, параметры симулятора и команды.
+
+    events - список (шаг, вид, данные); команда шага k применена перед
+    k-м шагом. checkpoints - список (число шагов, state_digest).
+    """
+
+    def __init__(self, scene: Scene, snapshot: Snapshot, options: dict, events=None,
+                 checkpoints=None, steps: int = 0):
+        self.scene = scene
+        self.snapshot = snapshot
+        self.options = options
+        self.events = events if events is not None else []
+        self.checkpoints = checkpoints if checkpoints is not None else []
+        self.steps = steps
+
+    def to_dict(self) -> dict:
+        return {
+            "format": INPUT_LOG_FORMAT,
+            "version": INPUT_LOG_VERSION,
+            "options": self.options,
+            "steps": self.steps,
+            "scene": scene_to_dict(self.scene),
+            "snapshot": snapshot_to_dict(self.snapshot),
+            "events": [list(event) for event in self.events],
+            "checkpoints": [list(checkpoint) for checkpoint in self.checkpoints],
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict):
+        if data.get("format") != INPUT_LOG_FORMAT:
+            raise ValueError("Не журнал команд Conphys")
+        if data.get("version", 0) > INPUT_LOG_VERSION:
+            raise ValueError(f"Версия журнала {data['version']} новее поддерживаемой")
+        return cls(scene_from_dict(data["scene"]), snapshot_from_dict(data["snapshot"]),
+                   data["options"], [tuple(event) for event in data["events"]],
+                   [tuple(checkpoint) for checkpoint in data["checkpoints"]], data["steps"])
+
+    def save(self, path: str):
+        with open(path, "w", encoding="utf-8") as file:
+            json.dump(self.to_dict(), file)
+
+    @classmethod
+    def load(cls, path: str):
+        with open(path, encoding="utf-8") as file:
+            return cls.from_dict(json.load(file))
+
+
+class DeterministicSession:
+    """Детерминированный режим поверх PhysicsSimulator.
+
+    Используется вместо симулятора там, где вызывается update(dt) (например,
+    FixedTimestep). Команды set_parameters/set_properties ждут границы шага,
+    поэтому правка из GUI не может попасть в середину прохода столкновений.
+    Порядок объектов фиксирован порядком шаров и линий симулятора.
+    """
+
+    def __init__(self, simulator, checkpoint_every: int = 60):
+        self.simulator = simulator
+        self.checkpoint_every = checkpoint_every
+        self._pending = []
+        self.start()
+
+    def start(self):
+        """Начинает новый журнал от текущего состояния симулятора."""
+        simulator = self.simulator
+        snapshot = simulator.snapshot()
+        # Скрытое состояние (усыпление, импульсы решателя) приводится к тому,
+        # что получит воспроизведение после restore того же снимка
+        simulator.restore(snapshot)
+        # Линии берутся из static_lines: туда попадают и переданные мимо objects
+        scene = Scene.from_objects(simulator._balls + simulator.static_lines,
+                                   table=simulator.table_line)
+        self.log = InputLog(scene, snapshot, dict(simulator.options))
+        self.step_index = 0
+        self._dt = None
+        self._pending.clear()
+
+    @property
+    def objects(self):
+        return self.simulator.objects
+
+    def set_parameters(self, **values):
+        """Параметры мира (gravity, bounce, friction, time_scale, mpp, width) со следующего шага."""
+        self._pending.append(("parameters", values))
+
+    def set_properties(self, obj, **values):
+        """Свойства объекта (mass, radius, thickness...) со следующего шага."""
+        self._pending.append(("properties", {"target": object_target(self.simulator, obj),
+                                             "values": values}))
+
+    def update(self, dt: float):
+        log = self.log
+        if dt != self._dt:
+            log.events.append((self.step_index, "dt", {"dt": dt}))
+            self._dt = dt
+        for kind, payload in self._pending:
+            apply_event(self.simulator, kind, payload)
+            log.events.append((self.step_index, kind, payload))
+        self._pending.clear()
+        self.simulator.update(dt)
+        self.step_index += 1
+        log.steps = self.step_index
+        if self.checkpoint_every and self.step_index % self.checkpoint_every == 0:
+            log.checkpoints.append((self.step_index, state_digest(self.simulator)))
+
+    def save(self, path: str):
+        """Сохраняет журнал с контрольным хэшем текущего состояния."""
+        log = self.log
+        if not log.checkpoints or log.checkpoints[-1][0] != self.step_index:
+            log.checkpoints.append((self.step_index, state_digest(self.simulator)))
+        log.save(path)
+
+
+def build_simulator(log: InputLog) -> PhysicsSimulator:
+    """Симулятор в начальном состоянии журнала."""
+    objects, table = log.scene.to_objects()
+    simulator = PhysicsSimulator(objects=objects, table_line=table, **log.options)
+    simulator.restore(log.snapshot)
+    return simulator
+
+
+def replay(log: InputLog, simulator: PhysicsSimulator = None, steps: int = None):
+    """Воспроизводит журнал. Возвращает (simulator, [(шаг, ожидаемый хэш, полученный)])."""
+    simulator = simulator if simulator is not None else build_simulator(log)
+    events = {}
+    for step, kind, payload in log.events:
+        events.setdefault(step, []).append((kind, payload))
+    checkpoints = dict(log.checkpoints)
+    mismatches = []
+    dt = None
+    for step in range(log.steps if steps is None else steps):
+        for kind, payload in events.get(step, ()):
+            if kind == "dt":
+                dt = payload["dt"]
+            else:
+                apply_event(simulator, kind, payload)
+        simulator.update(dt)
+        expected = checkpoints.get(step + 1)
+        if expected is not None:
+            actual = state_digest(simulator)
+            if actual != expected:
+                mismatches.append((step + 1, expected, actual))
+    return simulator, mismatches
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m physics.replay",
+                                     description="Воспроизведение журнала детерминированного сеанса")
+    parser.add_argument("log", help="Файл журнала (DeterministicSession.save)")
+    parser.add_argument("--steps", type=int, default=None, help="Воспроизвести только первые N шагов")
+    args = parser.parse_args(argv)
+
+    log = InputLog.load(args.log)
+    simulator, mismatches = replay(log, steps=args.steps)
+    try:
+        checked = sum(1 for step, _ in log.checkpoints if args.steps is None or step <= args.steps)
+        print(json.dumps({"steps": log.steps if args.steps is None else args.steps,
+                          "events": len(log.events), "checkpoints": checked,
+                          "mismatches": [{"step": step, "expected": expected, "actual": actual}
+                                         for step, expected, actual in mismatches],
+                          "digest": state_digest(simulator)}))
+    finally:
+        simulator.close()
+    if mismatches:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
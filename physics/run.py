@@ -0,0 +1,112 @@
+"""Headless-запуск симуляции без GUI.
+
+Пример:
+    python -m physics.run --scene grid --steps 6000 --dt 0.0166667 --out run_output
+"""
+import argparse
+import csv
+import os
+import sys
+import time
+from .core import PhysicsSimulator
+from .objects import Ball
+from .profiling import Profiler
+from .recorder import TrajectoryRecorder
+from .scene_io import load_scene, save_scene, Scene
+from .scenes import SCENES
+
+
+def run(simulator: PhysicsSimulator, steps: int, dt: float, out_dir: str, every: int = 1):
+    """Делает steps шагов с фиксированным dt и пишет траектории и энергии в out_dir."""
+    os.makedirs(out_dir, exist_ok=True)
+    balls = [obj for obj in simulator.objects if isinstance(obj, Ball)]
+
+    with open(os.path.join(out_dir, "trajectories.csv"), "w", newline="") as traj_file, \
+            open(os.path.join(out_dir, "energies.csv"), "w", newline="") as energy_file:
+        traj_writer = csv.writer(traj_file)
+        energy_writer = csv.writer(energy_file)
+        traj_writer.writerow(["step", "t", "ball", "x", "y", "vx", "vy"])
+        energy_writer.writerow(["step", "t", "kinetic", "potential", "total"])
+
+        def record(step):
+            mpp = simulator.mpp
+            for i, ball in enumerate(balls):
+                traj_writer.writerow([step, simulator.t, i, ball.x * mpp, ball.y * mpp,
+                                      ball.vx * mpp, ball.vy * mpp])
+            quantities = simulator.quantities()
+            energy_writer.writerow([step, simulator.t, quantities.total_kinetic,
+                                    quantities.total_potential, quantities.system_energy])
+
+        record(0)
+        for step in range(1, steps + 1):
+            simulator.update(dt)
+            if step % every == 0:
+                record(step)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m physics.run",
+                                     description="Headless-запуск физической симуляции")
+    parser.add_argument("--scene", choices=sorted(SCENES), default="grid")
+    parser.add_argument("--scene-file", default=None,
+                        help="Загрузить сцену из файла (.json или двоичный) вместо --scene")
+    parser.add_argument("--save-scene", default=None,
+                        help="Сохранить начальную сцену в файл и продолжить")
+    parser.add_argument("--cols", type=int, default=20, help="Шаров по горизонтали (сцена grid)")
+    parser.add_argument("--rows", type=int, default=10, help="Шаров по вертикали (сцена grid)")
+    parser.add_argument("--steps", type=int, default=600)
+    parser.add_argument("--dt", type=float, default=1 / 60)
+    parser.add_argument("--width", type=int, default=850, help="Ширина мира в пикселях")
+    parser.add_argument("--gravity", type=float, default=9.8)
+    parser.add_argument("--bounce", type=float, default=0.8)
+    parser.add_argument("--friction", type=float, default=0.999)
+    parser.add_argument("--mpp", type=float, default=0.1)
+    parser.add_argument("--engine", choices=["python", "numpy", "parallel"], default="python")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Число процессов для --engine parallel (по умолчанию - все ядра)")
+    parser.add_argument("--broad-phase", choices=["grid", "brute"], default="grid")
+    parser.add_argument("--solver", choices=["pairwise", "sequential"], default="pairwise")
+    parser.add_argument("--solver-iterations", type=int, default=8)
+    parser.add_argument("--every", type=int, default=1, help="Записывать каждый N-й шаг")
+    parser.add_argument("--out", default="run_output", help="Каталог для результатов")
+    parser.add_argument("--record", default=None,
+                        help="Каталог для сжатой столбцовой записи траекторий (TrajectoryRecorder)")
+    parser.add_argument("--profile", default=None,
+                        help="Замерять стадии шага и сохранить сводку (.json или .csv)")
+    args = parser.parse_args(argv)
+
+    if args.scene_file:
+        objects, table = load_scene(args.scene_file).to_objects()
+    else:
+        objects, table = SCENES[args.scene](cols=args.cols, rows=args.rows)
+    if args.save_scene:
+        save_scene(Scene.from_objects(objects, table=table), args.save_scene)
+    simulator = PhysicsSimulator(objects=objects, table_line=table, width=args.width,
+                                 gravity=args.gravity, bounce=args.bounce,
+                                 friction=args.friction, mpp=args.mpp,
+                                 broad_phase=args.broad_phase, engine=args.engine,
+                                 solver=args.solver, solver_iterations=args.solver_iterations,
+                                 workers=args.workers)
+
+    if args.profile:
+        simulator.profiler = Profiler(window=max(1, args.steps))
+    recorder = None
+    if args.record:
+        recorder = TrajectoryRecorder(args.record, every=max(1, args.every))
+        recorder.attach(simulator)
+    start = time.perf_counter()
+    try:
+        run(simulator, args.steps, args.dt, args.out, every=max(1, args.every))
+    finally:
+        if recorder is not None:
+            recorder.close()
+        simulator.close()
+    if args.profile:
+        simulator.profiler.dump(args.profile)
+    elapsed = time.perf_counter() - start
+    print(f"{args.steps} шагов за {elapsed:.2f} с ({args.steps / elapsed:.0f} шагов/с), "
+          f"результаты в {args.out}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,246 @@
+"""Сохранение и загрузка сцен.
+
+Сцена хранится по столбцам: у шаров и линий по отдельному набору
+столбцов-чисел (координаты в метрах, скорости в м/с, как в конструкторах
+Ball и Line). Форматы:
+
+* JSON (.json) - читаемый человеком, столбцы записаны списками;
+* двоичный (.scene) - заголовок и столбцы float64 подряд. Файл
+  отображается в память (mmap), столбцы читаются без копирования.
+
+Двоичный файл:
+    8 байт   - сигнатура b"CONPHYS\\x01"
+    4 байта  - длина заголовка (uint32, little-endian)
+    4 байта  - зарезервировано
+    заголовок - JSON в UTF-8, дополнен пробелами до кратной 8 длины
+    столбцы шаров, затем столбцы линий - по count значений float64 (little-endian)
+"""
+import json
+import mmap
+import struct
+import sys
+from array import array
+from .objects import MPP, Ball, Line
+
+SCENE_FORMAT = "conphys-scene"
+SCENE_VERSION = 1
+BINARY_MAGIC = b"CONPHYS\x01"
+_PREFIX = struct.Struct("<II")
+
+# Столбцы шара и линии в порядке записи
+BALL_COLUMNS = ("x", "y", "radius", "mass", "vx", "vy", "rotation", "angular_velocity",
+                "color_r", "color_g", "color_b",
+                "fill_r", "fill_g", "fill_b", "fill_a")
+LINE_COLUMNS = ("x1", "y1", "x2", "y2", "thickness", "color_r", "color_g", "color_b")
+
+
+class Scene:
+    """Сцена в столбцах: balls и lines - словари имя столбца -> последовательность чисел.
+
+    table - индекс линии стола среди lines. Столбцы могут быть списками,
+    array('d') или memoryview над отображённым файлом.
+    """
+
+    def __init__(self, balls, lines, table: int = 0):
+        self.balls = balls
+        self.lines = lines
+        self.table = table
+        self.ball_count = len(balls["x"]) if balls else 0
+        self.line_count = len(lines["x1"]) if lines else 0
+
+    @classmethod
+    def from_objects(cls, objects, table=None):
+        """Снимок объектов (Ball и Line) в столбцы."""
+        balls = [obj for obj in objects if isinstance(obj, Ball)]
+        lines = [obj for obj in objects if isinstance(obj, Line)]
+        if table is not None and table not in lines:
+            lines.insert(0, table)
+        ball_columns = {
+            "x": array("d", [ball.x * MPP for ball in balls]),
+            "y": array("d", [ball.y * MPP for ball in balls]),
+            "radius": array("d", [ball.radius * MPP for ball in balls]),
+            "mass": array("d", [ball.mass for ball in balls]),
+            "vx": array("d", [ball.vx * MPP for ball in balls]),
+            "vy": array("d", [ball.vy * MPP for ball in balls]),
+            "rotation": array("d", [ball.rotation for ball in balls]),
+            "angular_velocity": array("d", [ball.angular_velocity for ball in balls]),
+        }
+        for k, name in enumerate(("color_r", "color_g", "color_b")):
+            ball_columns[name] = array("d", [ball.color[k] for ball in balls])
+        for k, name in enumerate(("fill_r", "fill_g", "fill_b", "fill_a")):
+            ball_columns[name] = array("d", [ball.fill_color[k] for ball in balls])
+        line_columns = {
+            "x1": array("d", [line.x1 * MPP for line in lines]),
+            "y1": array("d", [line.y1 * MPP for line in lines]),
+            "x2": array("d", [line.x2 * MPP for line in lines]),
+            "y2": array("d", [line.y2 * MPP for line in lines]),
+            "thickness": array("d", [line.thickness for line in lines]),
+        }
+        for k, name in enumerate(("color_r", "color_g", "color_b")):
+            line_columns[name] = array("d", [line.color[k] for line in lines])
+        table_index = lines.index(table) if table is not None else 0
+        return cls(ball_columns, line_columns, table_index)
+
+    def to_objects(self):
+        """Создаёт объекты сцены. Возвращает (objects, table): сначала шары, затем линии."""
+        b = self.balls
+        scale = 1 / MPP
+        colors = zip(b["color_r"], b["color_g"], b["color_b"])
+        fills = zip(b["fill_r"], b["fill_g"], b["fill_b"], b["fill_a"])
+        objects = [
+            Ball.from_state(x * scale, y * scale, radius * scale, mass, vx * scale, vy * scale,
+                            rotation, angular_velocity,
+                            color=tuple(map(int, color)), fill_color=tuple(map(int, fill)))
+            for x, y, radius, mass, vx, vy, rotation, angular_velocity, color, fill in zip(
+                b["x"], b["y"], b["radius"], b["mass"], b["vx"], b["vy"],
+                b["rotation"], b["angular_velocity"], colors, fills)
+        ]
+        lines = self.lines
+        line_objects = [
+            Line.from_points(x1 * scale, y1 * scale, x2 * scale, y2 * scale,
+                             color=(int(r), int(g), int(bl)), thickness=thickness)
+            for x1, y1, x2, y2, thickness, r, g, bl in zip(
+                *(lines[name] for name in LINE_COLUMNS))
+        ]
+        objects.extend(line_objects)
+        table = line_objects[self.table] if line_objects else None
+        return objects, table
+
+    def header(self):
+        return {
+            "format": SCENE_FORMAT,
+            "version": SCENE_VERSION,
+            "units": "m",
+            "table": self.table,
+            "balls": self.ball_count,
+            "lines": self.line_count,
+            "ball_columns": list(BALL_COLUMNS),
+            "line_columns": list(LINE_COLUMNS),
+        }
+
+
+def scene_to_dict(scene: Scene) -> dict:
+    """Сцена в виде словаря формата JSON (столбцы - списки)."""
+    data = scene.header()
+    data["balls"] = {name: list(scene.balls[name]) for name in BALL_COLUMNS}
+    data["lines"] = {name: list(scene.lines[name]) for name in LINE_COLUMNS}
+    return data
+
+
+def _read_columns(data, kind, names):
+    # Все столбцы обязательны и одной длины: иначе zip молча обрежет объекты
+    source = data.get(kind, {})
+    missing = [name for name in names if name not in source]
+    if missing:
+        raise ValueError(f"В сцене нет столбцов {kind}: {', '.join(missing)}")
+    columns = {name: array("d", source[name]) for name in names}
+    lengths = {len(column) for column in columns.values()}
+    if len(lengths) > 1:
+        raise ValueError(f"Столбцы {kind} разной длины: {sorted(lengths)}")
+    return columns
+
+
+def scene_from_dict(data: dict) -> Scene:
+    _check_header(data)
+    balls = _read_columns(data, "balls", BALL_COLUMNS)
+    lines = _read_columns(data, "lines", LINE_COLUMNS)
+    return Scene(balls, lines, data.get("table", 0))
+
+
+def save_json(scene: Scene, path: str):
+    with open(path, "w", encoding="utf-8") as file:
+        json.dump(scene_to_dict(scene), file)
+
+
+def load_json(path: str) -> Scene:
+    with open(path, encoding="utf-8") as file:
+        return scene_from_dict(json.load(file))
+
+
+def _write_binary(scene: Scene, write):
+    header = json.dumps(scene.header()).encode("utf-8")
+    header += b" " * (-len(header) % 8)
+    write(BINARY_MAGIC)
+    write(_PREFIX.pack(len(header), 0))
+    write(header)
+    for columns, names in ((scene.balls, BALL_COLUMNS), (scene.lines, LINE_COLUMNS)):
+        for name in names:
+            column = array("d", columns[name])
+            if sys.byteorder != "little":
+                column.byteswap()
+            write(column.tobytes())
+
+
+def save_binary(scene: Scene, path: str):
+    with open(path, "wb") as file:
+        _write_binary(scene, file.write)
+
+
+def scene_to_bytes(scene: Scene) -> bytes:
+    """Сцена в двоичном формате в памяти (например, для передачи в другие процессы)."""
+    parts = []
+    _write_binary(scene, parts.append)
+    return b"".join(parts)
+
+
+def scene_from_bytes(data) -> Scene:
+    """Читает сцену из буфера двоичного формата; столбцы - memoryview над data без копирования."""
+    return _read_binary(memoryview(data), "буфер")
+
+
+def load_binary(path: str, use_mmap: bool = True) -> Scene:
+    """Читает двоичную сцену. При use_mmap столбцы - memoryview над отображённым файлом."""
+    with open(path, "rb") as file:
+        if use_mmap:
+            data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        else:
+            data = file.read()
+    return _read_binary(memoryview(data), path)
+
+
+def _read_binary(view, source) -> Scene:
+    if bytes(view[:len(BINARY_MAGIC)]) != BINARY_MAGIC:
+        raise ValueError(f"{source}: не файл сцены Conphys")
+    offset = len(BINARY_MAGIC)
+    header_size, _ = _PREFIX.unpack_from(view, offset)
+    offset += _PREFIX.size
+    header = json.loads(bytes(view[offset:offset + header_size]))
+    _check_header(header)
+    offset += header_size
+
+    def read_columns(names, count):
+        nonlocal offset
+        columns = {}
+        for name in names:
+            column = view[offset:offset + count * 8].cast("d")
+            if sys.byteorder != "little":
+                column = array("d", column)
+                column.byteswap()
+            columns[name] = column
+            offset += count * 8
+        return columns
+
+    balls = read_columns(header["ball_columns"], header["balls"])
+    lines = read_columns(header["line_columns"], header["lines"])
+    return Scene(balls, lines, header.get("table", 0))
+
+
+def _check_header(header):
+    if header.get("format") != SCENE_FORMAT:
+        raise ValueError("Неизвестный формат сцены")
+    if header.get("version", 0) > SCENE_VERSION:
+        raise ValueError(f"Версия сцены {header['version']} новее поддерживаемой ({SCENE_VERSION})")
+
+
+def save_scene(scene: Scene, path: str):
+    """Сохраняет сцену: .json - в JSON, иначе в двоичном формате."""
+    if path.lower().endswith(".json"):
+        save_json(scene, path)
+    else:
+        save_binary(scene, path)
+
+
+def load_scene(path: str) -> Scene:
+    if path.lower().endswith(".json"):
+        return load_json(path)
+    return load_binary(path)
@@ -0,0 +1,82 @@
+import math
+import random
+from .objects import Ball, Line
+
+
+def grid_scene(cols: int = 20, rows: int = 10, r: float = 0.5, mass: float = 1.0):
+    """Сетка шаров над наклонным столом, как в main.py. Возвращает (objects, table)."""
+    objects = []
+    for x in range(cols):
+        for y in range(rows):
+            objects.append(Ball(cord=(x + 2, 10 + y), r=r, mass=mass))
+    table = Line(p1=(-10, 40), p2=(200, 50), thickness=2)
+    objects.append(table)
+    return objects, table
+
+
+def terrain_scene(cols: int = 40, rows: int = 5, segments: int = 2000, r: float = 0.3):
+    """Шары над ломаной "местностью" из множества отрезков."""
+    objects = []
+    for x in range(cols):
+        for y in range(rows):
+            objects.append(Ball(cord=(2 + x * 2, 5 + y * 2), r=r))
+    width_m = cols * 2 + 4
+    step = width_m / segments
+    points = [(i * step, 40 + 3 * math.sin(i * step / 4) + (i % 7) * 0.05)
+              for i in range(segments + 1)]
+    lines = [Line(p1=points[i], p2=points[i + 1], thickness=2) for i in range(segments)]
+    objects.extend(lines)
+    return objects, lines[0]
+
+
+def field_scene(cols: int = 250, rows: int = 200, r: float = 0.4):
+    """Большое поле шаров над длинным ровным столом (cols * rows шаров)."""
+    objects = []
+    for x in range(cols):
+        for y in range(rows):
+            objects.append(Ball(cord=(2 + x, 2 + y), r=r))
+    table = Line(p1=(0, rows + 6), p2=(cols + 4, rows + 6), thickness=2)
+    objects.append(table)
+    return objects, table
+
+
+def pile_scene(cols: int = 40, rows: int = 25, r: float = 0.4):
+    """Уложенная куча: касающиеся шары в гексагональной укладке на ровном столе."""
+    objects = []
+    row_height = math.sqrt(3) * r
+    table_y = rows * row_height + 6
+    for y in range(rows):
+        # Нечётные ряды сдвинуты на радиус и лежат в лунках нижнего ряда
+        offset = r if y % 2 else 0.0
+        for x in range(cols):
+            objects.append(Ball(cord=(2 + r + offset + x * 2 * r, table_y - r - y * row_height), r=r))
+    table = Line(p1=(0, table_y), p2=(cols * 2 * r + 4, table_y), thickness=2)
+    objects.append(table)
+    return objects, table
+
+
+def gas_scene(cols: int = 40, rows: int = 25, r: float = 0.4, speed: float = 200.0,
+              seed: int = 0):
+    """Плотный "газ": шары почти вплотную со случайными скоростями до speed пикс/с."""
+    rng = random.Random(seed)
+    objects = []
+    spacing = 2.2 * r
+    for x in range(cols):
+        for y in range(rows):
+            ball = Ball(cord=(2 + x * spacing, 2 + y * spacing), r=r)
+            ball.vx = rng.uniform(-speed, speed)
+            ball.vy = rng.uniform(-speed, speed)
+            objects.append(ball)
+    table_y = rows * spacing + 4
+    table = Line(p1=(0, table_y), p2=(cols * spacing + 4, table_y), thickness=2)
+    objects.append(table)
+    return objects, table
+
+
+SCENES = {
+    "grid": grid_scene,
+    "terrain": terrain_scene,
+    "field": field_scene,
+    "pile": pile_scene,
+    "gas": gas_scene,
+}
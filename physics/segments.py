@@ -0,0 +1,109 @@
+import math
+from typing import List
+
+
+def _point_segment_distance(px, py, line):
+    line_vec_x = line.x2 - line.x1
+    line_vec_y = line.y2 - line.y1
+    line_len_sq = line_vec_x**2 + line_vec_y**2
+    if line_len_sq == 0:
+        t = 0
+    else:
+        t = max(0, min(1, ((px - line.x1) * line_vec_x + (py - line.y1) * line_vec_y) / line_len_sq))
+    return math.hypot(px - (line.x1 + t * line_vec_x), py - (line.y1 + t * line_vec_y))
+
+
+class SegmentGrid:
+    """Статический индекс отрезков (Line) на равномерной сетке.
+
+    Отрезок регистрируется во всех ячейках, до которых он ближе, чем margin
+    (обычно максимальный радиус шара). Тогда шару радиуса <= margin достаточно
+    посмотреть одну ячейку - ту, где лежит его центр.
+    """
+
+    def __init__(self, lines, cell_size: float = None, margin: float = 0.0):
+        self.lines = list(lines)
+        if cell_size is None:
+            extents = [max(abs(line.x2 - line.x1), abs(line.y2 - line.y1)) for line in self.lines]
+            cell_size = max(sum(extents) / len(extents) if extents else 0, 4 * margin, 1.0)
+        self.cell_size = cell_size
+        self.build(margin)
+
+    def build(self, margin: float):
+        """(Пере)строит сетку для заданного запаса margin."""
+        self.margin = margin
+        cell = self.cell_size
+        # Ячейка попадает в отрезок, если её центр ближе полудиагонали + margin
+        reach = cell * math.sqrt(0.5) + margin
+        cells = {}
+        for index, line in enumerate(self.lines):
+            x_lo = math.floor((min(line.x1, line.x2) - margin) / cell)
+            x_hi = math.floor((max(line.x1, line.x2) + margin) / cell)
+            y_lo = math.floor((min(line.y1, line.y2) - margin) / cell)
+            y_hi = math.floor((max(line.y1, line.y2) + margin) / cell)
+            for cx in range(x_lo, x_hi + 1):
+                for cy in range(y_lo, y_hi + 1):
+                    if _point_segment_distance((cx + 0.5) * cell, (cy + 0.5) * cell, line) <= reach:
+                        cells.setdefault((cx, cy), []).append(index)
+        self.cells = cells
+        self._reach = reach
+        # Непустые строки сетки для каждого столбца - для поиска поверхности под точкой
+        columns = {}
+        for cx, cy in cells:
+            columns.setdefault(cx, []).append(cy)
+        for rows in columns.values():
+            rows.sort()
+        self.columns = columns
+
+    def ensure_margin(self, margin: float):
+        if margin > self.margin:
+            self.build(margin)
+
+    def query(self, x: float, y: float, radius: float) -> List:
+        """Отрезки рядом с кругом (x, y, radius), в порядке добавления."""
+        if radius <= self.margin:
+            inv_cell = 1.0 / self.cell_size
+            indices = self.cells.get((math.floor(x * inv_cell), math.floor(y * inv_cell)))
+            return [self.lines[i] for i in indices] if indices else []
+        return self.query_box(x - radius, y - radius, x + radius, y + radius)
+
+    def query_path(self, x0: float, y0: float, x1: float, y1: float, radius: float) -> List:
+        """Отрезки рядом с путём круга из (x0, y0) в (x1, y1)."""
+        if x0 == x1 and y0 == y1:
+            return self.query(x1, y1, radius)
+        return self.query_box(min(x0, x1) - radius, min(y0, y1) - radius,
+                              max(x0, x1) + radius, max(y0, y1) + radius)
+
+    def query_box(self, x_min: float, y_min: float, x_max: float, y_max: float) -> List:
+        inv_cell = 1.0 / self.cell_size
+        found = set()
+        for cx in range(math.floor(x_min * inv_cell), math.floor(x_max * inv_cell) + 1):
+            for cy in range(math.floor(y_min * inv_cell), math.floor(y_max * inv_cell) + 1):
+                indices = self.cells.get((cx, cy))
+                if indices:
+                    found.update(indices)
+        return [self.lines[i] for i in sorted(found)]
+
+    def surface_below(self, x: float, y: float):
+        """y ближайшей поверхности под точкой (ось y направлена вниз) или None."""
+        inv_cell = 1.0 / self.cell_size
+        cx = math.floor(x * inv_cell)
+        min_row = math.floor(y * inv_cell)
+        best = None
+        seen = set()
+        for cy in self.columns.get(cx, ()):
+            if cy < min_row:
+                continue
+            if best is not None and cy * self.cell_size - self._reach > best:
+                break
+            for index in self.cells[(cx, cy)]:
+                if index in seen:
+                    continue
+                seen.add(index)
+                line = self.lines[index]
+                if line.x1 == line.x2 or not min(line.x1, line.x2) <= x <= max(line.x1, line.x2):
+                    continue
+                line_y = line.y1 + (x - line.x1) * (line.y2 - line.y1) / (line.x2 - line.x1)
+                if line_y >= y and (best is None or line_y < best):
+                    best = line_y
+        return best
@@ -0,0 +1,50 @@
+"""Параметры мира: одно общее хранилище с номером версии.
+
+WorldSettings хранит gravity, bounce, friction, time_scale, mpp и width.
+Правка - это запись нескольких полей и увеличение version, без обхода
+объектов, поэтому ползунок GUI стоит O(1) при любом числе шаров.
+Симулятор берёт snapshot() один раз в начале шага: все стадии шага и
+калькуляторы величин видят один и тот же неизменяемый набор параметров,
+даже если правка пришла посреди шага.
+"""
+from collections import namedtuple
+
+WORLD_FIELDS = ("gravity", "bounce", "friction", "time_scale", "mpp", "width")
+
+# Неизменяемый набор параметров одной версии
+WorldParameters = namedtuple("WorldParameters", WORLD_FIELDS + ("version",))
+
+
+class WorldSettings:
+    """Текущие параметры мира и их версия (растёт при каждой правке)."""
+
+    def __init__(self, gravity: float = 9.8, bounce: float = 0.8, friction: float = 0.999,
+                 time_scale: float = 1.0, mpp: float = 0.1, width: int = 0):
+        self.version = 0
+        self._snapshot = WorldParameters(gravity, bounce, friction, time_scale, mpp, width, 0)
+
+    def __getattr__(self, name):
+        # Поля параметров читаются из текущего снимка
+        if name in WORLD_FIELDS:
+            return getattr(self._snapshot, name)
+        raise AttributeError(f"'WorldSettings' object has no attribute {name!r}")
+
+    def update(self, **values) -> bool:
+        """Меняет параметры. Возвращает True, если что-то изменилось (версия выросла)."""
+        unknown = set(values) - set(WORLD_FIELDS)
+        if unknown:
+            raise ValueError(f"Неизвестные параметры мира: {', '.join(sorted(unknown))}")
+        current = self._snapshot
+        if all(getattr(current, name) == value for name, value in values.items()):
+            return False
+        self.version += 1
+        # Новый кортеж целиком: читатели видят либо старую, либо новую версию
+        self._snapshot = current._replace(version=self.version, **values)
+        return True
+
+    def snapshot(self) -> WorldParameters:
+        """Параметры текущей версии (не меняются при последующих правках)."""
+        return self._snapshot
+
+    def to_dict(self) -> dict:
+        return {name: getattr(self._snapshot, name) for name in WORLD_FIELDS}
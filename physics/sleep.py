@@ -0,0 +1,178 @@
+import math
+
+# Вес нового значения в экспоненциальном сглаживании скорости
+SMOOTHING = 0.2
+# Шары ближе (r1 + r2) * (1 + CONTACT_SLOP) считаются одним островом, даже
+# если на этом шаге они не пересеклись
+CONTACT_SLOP = 0.1
+
+
+class SleepManager:
+    """Усыпление покоящихся шаров по островам контактов (для движка "python").
+
+    Шар считается неподвижным, если его сглаженная скорость меньше velocity
+    (в стопке шары дрожат, и мгновенная скорость не затухает). Остров -
+    группа шаров, связанных контактами друг с другом; он засыпает целиком,
+    когда все его шары неподвижны не меньше frames шагов подряд и хотя бы
+    один из них касался линии за последние frames шагов. Спящие шары не
+    интегрируются и не проверяются друг с другом; касание бодрствующего шара
+    будит весь остров.
+    """
+
+    def __init__(self, balls, velocity: float = 5.0, frames: int = 30):
+        self.balls = balls
+        self.velocity = velocity
+        self.frames = frames
+        self._order = {ball.handle: i for i, ball in enumerate(balls)}
+        self._awake = None
+        # Сетка спящих шаров: по ней бодрствующие находят спящих соседей
+        self._grid = {}
+        self._cell_size = 0.0
+        self.reset()
+
+    def reset(self):
+        """Будит все шары и забывает накопленную историю скоростей и касаний."""
+        for ball in self.balls:
+            ball.sleeping = False
+            ball._still_frames = 0
+            ball._ground_frames = 0
+            ball._avg_vx = 0.0
+            ball._avg_vy = 0.0
+            ball._island = None
+        self._rebuild_grid()
+
+    @property
+    def awake_count(self):
+        return len(self.awake_balls())
+
+    def awake_balls(self):
+        if self._awake is None:
+            self._awake = [ball for ball in self.balls if not ball.sleeping]
+        return self._awake
+
+    def candidates(self):
+        """Бодрствующие шары и спящие рядом с ними, в исходном порядке."""
+        awake = self.awake_balls()
+        candidates = list(awake)
+        if awake and self._grid:
+            inv_cell = 1.0 / self._cell_size
+            seen = set()
+            for ball in awake:
+                cx = math.floor(ball.x * inv_cell)
+                cy = math.floor(ball.y * inv_cell)
+                for ox in (-1, 0, 1):
+                    for oy in (-1, 0, 1):
+                        for other in self._grid.get((cx + ox, cy + oy), ()):
+                            if other.handle not in seen:
+                                seen.add(other.handle)
+                                candidates.append(other)
+            candidates.sort(key=lambda ball: self._order[ball.handle])
+        return candidates
+
+    def collide(self, simulator):
+        """Проход столкновений шаров: бодрствующие и спящие рядом с ними."""
+        contacts = []
+        candidates = self.candidates()
+        for i, j in simulator.broad_phase.iter_pairs(candidates):
+            obj1 = candidates[i]
+            obj2 = candidates[j]
+            if obj1.sleeping and obj2.sleeping:
+                continue
+            collision, normal, depth = simulator.check_collision_pair(obj1, obj2)
+            if collision:
+                if obj1.sleeping:
+                    self.wake(obj1)
+                if obj2.sleeping:
+                    self.wake(obj2)
+                simulator.resolve_collision_pair(obj1, obj2, normal, depth)
+                contacts.append((obj1, obj2))
+            elif ((obj1.x - obj2.x)**2 + (obj1.y - obj2.y)**2 <
+                    ((obj1.radius + obj2.radius) * (1 + CONTACT_SLOP))**2):
+                contacts.append((obj1, obj2))
+        return contacts
+
+    def update(self, contacts):
+        """Обновляет счётчики неподвижности и усыпляет успокоившиеся острова."""
+        awake = self.awake_balls()
+        threshold_sq = self.velocity**2
+        parent = {ball.handle: ball.handle for ball in awake}
+
+        def find(key):
+            while parent[key] != key:
+                parent[key] = parent[parent[key]]
+                key = parent[key]
+            return key
+
+        for obj1, obj2 in contacts:
+            if obj1.sleeping or obj2.sleeping:
+                continue
+            root1 = find(obj1.handle)
+            root2 = find(obj2.handle)
+            if root1 != root2:
+                parent[root1] = root2
+
+        islands = {}
+        for ball in awake:
+            ball._avg_vx += (ball.vx - ball._avg_vx) * SMOOTHING
+            ball._avg_vy += (ball.vy - ball._avg_vy) * SMOOTHING
+            if ball._avg_vx**2 + ball._avg_vy**2 < threshold_sq:
+                ball._still_frames += 1
+            else:
+                ball._still_frames = 0
+            # Лежащий шар касается линии не на каждом шаге, поэтому помним касание
+            if ball.line_contact:
+                ball._ground_frames = self.frames
+            elif ball._ground_frames > 0:
+                ball._ground_frames -= 1
+            islands.setdefault(find(ball.handle), []).append(ball)
+
+        for members in islands.values():
+            if (all(ball._still_frames >= self.frames for ball in members)
+                    and any(ball._ground_frames > 0 for ball in members)):
+                self._sleep_island(members)
+
+    def wake_touched(self, contacts):
+        """Будит острова спящих шаров, которых касаются бодрствующие."""
+        for obj1, obj2 in contacts:
+            if obj1.sleeping != obj2.sleeping:
+                self.wake(obj1 if obj1.sleeping else obj2)
+
+    def wake(self, ball):
+        """Будит остров, в который входит шар (например, после правки его свойств)."""
+        if not ball.sleeping:
+            ball._still_frames = 0
+            return
+        for member in ball._island:
+            member.sleeping = False
+            member._still_frames = 0
+            member._island = None
+        self._rebuild_grid()
+
+    def wake_all(self):
+        for ball in self.balls:
+            ball.sleeping = False
+            ball._still_frames = 0
+            ball._island = None
+        self._rebuild_grid()
+
+    def _sleep_island(self, members):
+        for ball in members:
+            ball.sleeping = True
+            ball._island = members
+            ball.vx = 0.0
+            ball.vy = 0.0
+            ball.ax = 0.0
+            ball.ay = 0.0
+        self._rebuild_grid()
+
+    def _rebuild_grid(self):
+        self._awake = None
+        sleeping = [ball for ball in self.balls if ball.sleeping]
+        self._grid = {}
+        if not sleeping:
+            return
+        self._cell_size = 2 * max(ball.radius for ball in self.balls)
+        inv_cell = 1.0 / self._cell_size
+        for ball in sleeping:
+            key = (math.floor(ball.x * inv_cell), math.floor(ball.y * inv_cell))
+            self._grid.setdefault(key, []).append(ball)
@@ -0,0 +1,126 @@
+import math
+from array import array
+from bisect import bisect_right
+from collections import deque
+
+# Поля шара в снимке (в том же порядке, что и столбцы движка numpy)
+STATE_FIELDS = ("x", "y", "vx", "vy", "ax", "ay", "radius", "mass",
+                "rotation", "angular_velocity")
+LINE_FIELDS = ("x1", "y1", "x2", "y2", "thickness")
+# Параметры мира, которые сохраняются вместе с объектами
+PARAMETERS = ("gravity", "bounce", "friction", "time_scale", "mpp", "width")
+
+
+class Snapshot:
+    """Полное состояние мира на момент t.
+
+    balls и lines - буферы float64 по столбцам (сначала x всех шаров, затем
+    y и т.д., см. STATE_FIELDS и LINE_FIELDS), parameters - словарь
+    параметров мира. Снимок неизменяем и не ссылается на объекты сцены.
+    """
+
+    def __init__(self, t: float, parameters: dict, balls: bytes, lines: bytes,
+                 ball_count: int, line_count: int):
+        self.t = t
+        self.parameters = parameters
+        self.balls = balls
+        self.lines = lines
+        self.ball_count = ball_count
+        self.line_count = line_count
+
+    @property
+    def nbytes(self):
+        return len(self.balls) + len(self.lines)
+
+
+def pack_columns(objects, fields) -> bytes:
+    data = array("d")
+    for name in fields:
+        data.extend([getattr(obj, name) for obj in objects])
+    return data.tobytes()
+
+
+def unpack_columns(buffer: bytes, fields, count: int):
+    values = memoryview(buffer).cast("d")
+    return [values[k * count:(k + 1) * count] for k in range(len(fields))]
+
+
+def restore_balls(balls, buffer: bytes):
+    """Записывает в шары состояние из буфера снимка (порядок полей - STATE_FIELDS)."""
+    columns = unpack_columns(buffer, STATE_FIELDS, len(balls))
+    for ball, x, y, vx, vy, ax, ay, radius, mass, rotation, angular_velocity in zip(
+            balls, *columns):
+        ball.x = x
+        ball.y = y
+        ball.vx = vx
+        ball.vy = vy
+        ball.ax = ax
+        ball.ay = ay
+        ball.radius = radius
+        ball.mass = mass
+        ball.rotation = rotation
+        ball.rotation_degrees = math.degrees(rotation)
+        ball.angular_velocity = angular_velocity
+        ball._prev_vx = vx
+        ball._prev_vy = vy
+        ball.line_contact = False
+
+
+def restore_lines(lines, buffer: bytes):
+    columns = unpack_columns(buffer, LINE_FIELDS, len(lines))
+    for line, x1, y1, x2, y2, thickness in zip(lines, *columns):
+        line.x1 = x1
+        line.y1 = y1
+        line.x2 = x2
+        line.y2 = y2
+        line.thickness = thickness
+
+
+class SnapshotRing:
+    """Кольцевой буфер снимков за последние seconds секунд времени симуляции.
+
+    record() снимает состояние не чаще раза в interval секунд. Если время
+    симулятора ушло назад (после перемотки или сброса), более поздние снимки
+    отбрасываются: история продолжается от текущего момента.
+    """
+
+    def __init__(self, seconds: float = 10.0, interval: float = 0.1):
+        self.seconds = seconds
+        self.interval = interval
+        self._snapshots = deque(maxlen=max(1, math.ceil(seconds / interval) + 1))
+
+    def __len__(self):
+        return len(self._snapshots)
+
+    @property
+    def start(self):
+        return self._snapshots[0].t if self._snapshots else None
+
+    @property
+    def end(self):
+        return self._snapshots[-1].t if self._snapshots else None
+
+    def record(self, simulator):
+        """Снимает состояние, если с последнего снимка прошло не меньше interval."""
+        snapshots = self._snapshots
+        while snapshots and snapshots[-1].t > simulator.t:
+            snapshots.pop()
+        if not snapshots or simulator.t - snapshots[-1].t >= self.interval:
+            snapshots.append(simulator.snapshot())
+
+    def at(self, t: float):
+        """Последний снимок не позже t (или самый ранний, если t раньше всех)."""
+        if not self._snapshots:
+            return None
+        index = bisect_right([snapshot.t for snapshot in self._snapshots], t)
+        return self._snapshots[max(0, index - 1)]
+
+    def rewind(self, simulator, t: float, parameters: bool = True):
+        """Возвращает симулятор к снимку at(t), не пересчитывая шаги. Возвращает снимок."""
+        snapshot = self.at(t)
+        if snapshot is not None:
+            simulator.restore(snapshot, parameters=parameters)
+        return snapshot
+
+    def clear(self):
+        self._snapshots.clear()
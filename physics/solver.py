@@ -0,0 +1,183 @@
+import math
+
+
+class ContactSolver:
+    """Решатель контактов последовательными импульсами (sequential impulses).
+
+    Шаг делится на стадии: скорости интегрируются с гравитацией, затем
+    собираются все контакты шар-шар и шар-линия, и iterations раз по кругу
+    для каждого контакта подбирается накопленный импульс lam >= 0, чтобы
+    относительная скорость по нормали была не меньше целевой. Только после
+    этого шары перемещаются по скорости.
+
+    Импульсы прошлого шага сохраняются по паре объектов и применяются в
+    начале следующего (warm starting): в стопке веса передаются сразу, и
+    немногих итераций хватает при крупном dt. Контакты собираются с запасом
+    (speculative): ещё не касающаяся пара может сблизиться только на
+    оставшийся зазор, поэтому быстрый шар не проскакивает сквозь линию.
+    """
+
+    def __init__(self, iterations: int = 8, baumgarte: float = 0.2, slop: float = 0.5,
+                 warm_start: bool = True, restitution_velocity: float = 1.0):
+        self.iterations = iterations
+        # Доля перекрытия (сверх slop пикселей), выталкиваемая за один шаг
+        self.baumgarte = baumgarte
+        self.slop = slop
+        self.warm_start = warm_start
+        # Отскок только для ударов быстрее restitution_velocity (пикс/с)
+        self.restitution_velocity = restitution_velocity
+        self._impulses = {}
+
+    def reset(self):
+        """Забывает импульсы прошлых шагов (после телепортации объектов)."""
+        self._impulses.clear()
+
+    def solve(self, simulator, balls, dt: float):
+        """Разрешает контакты balls (скорости уже с гравитацией). Возвращает пары шаров в контакте."""
+        if dt <= 0:
+            return []
+        contacts = self._collect(simulator, balls, dt)
+        bounce = simulator.step_parameters.bounce
+        friction = simulator.step_parameters.friction
+        inv_dt = 1.0 / dt
+        impulses = {}
+        previous = self._impulses if self.warm_start else {}
+
+        for contact in contacts:
+            obj1, obj2, nx, ny, gap, inv_mass1, inv_mass2, key = contact[:8]
+            # Скорость удара берём до гравитации этого шага, иначе лежащие
+            # шары отскакивали бы от собственного веса
+            vn = self._approach_velocity(obj1, obj2, nx, ny)
+            if gap > 0:
+                # Спекулятивный контакт: можно сблизиться только на зазор
+                target = -gap * inv_dt
+            else:
+                target = self.baumgarte * max(-gap - self.slop, 0.0) * inv_dt
+            if vn < -self.restitution_velocity and gap + vn * dt <= self.slop:
+                target = max(target, -bounce * vn)
+            lam = previous.get(key, 0.0)
+            if lam:
+                self._apply(obj1, obj2, nx, ny, lam, inv_mass1, inv_mass2)
+            contact.append(target)
+            contact.append(lam)
+
+        for _ in range(self.iterations):
+            for contact in contacts:
+                obj1, obj2, nx, ny, gap, inv_mass1, inv_mass2, key, target, lam = contact
+                vn = self._normal_velocity(obj1, obj2, nx, ny)
+                new_lam = max(lam + (target - vn) / (inv_mass1 + inv_mass2), 0.0)
+                delta = new_lam - lam
+                if delta:
+                    self._apply(obj1, obj2, nx, ny, delta, inv_mass1, inv_mass2)
+                    contact[9] = new_lam
+
+        touching = []
+        for contact in contacts:
+            obj1, obj2, nx, ny, gap = contact[:5]
+            lam = contact[9]
+            impulses[contact[7]] = lam
+            if obj1 is None:
+                if lam > 0 or gap <= self.slop:
+                    obj2.line_contact = True
+                if lam > 0:
+                    # Трение о линию, как в дискретном режиме: гасим касательную скорость
+                    vn = obj2.vx * nx + obj2.vy * ny
+                    obj2.vx = vn * nx + (obj2.vx - vn * nx) * friction
+                    obj2.vy = vn * ny + (obj2.vy - vn * ny) * friction
+            elif lam > 0 or gap <= self.slop:
+                touching.append((obj1, obj2))
+        self._impulses = impulses
+        return touching
+
+    def _collect(self, simulator, balls, dt):
+        """Контакты [obj1, obj2, nx, ny, зазор, 1/m1, 1/m2, ключ]; нормаль от obj1 к obj2.
+
+        Для контакта с линией obj1 = None (бесконечная масса). Ключ для warm
+        starting - пара дескрипторов из ObjectRegistry.
+        """
+        contacts = []
+        slop = self.slop
+        segments = simulator.segments
+        for ball in balls:
+            ball.line_contact = False
+            if ball.sleeping:
+                continue
+            end_x = ball.x + ball.vx * dt
+            end_y = ball.y + ball.vy * dt
+            if segments is not None:
+                lines = segments.query_path(ball.x, ball.y, end_x, end_y, ball.radius + slop)
+            else:
+                lines = (simulator.table_line,)
+            for line in lines:
+                nx, ny, distance = self._line_normal(ball, line)
+                gap = distance - ball.radius
+                vn = ball.vx * nx + ball.vy * ny
+                if gap <= slop or gap + vn * dt < 0:
+                    contacts.append([None, ball, nx, ny, gap, 0.0, 1.0 / ball.mass,
+                                     (line.handle, ball.handle)])
+
+        for i, j in simulator.broad_phase.iter_pairs(balls):
+            obj1 = balls[i]
+            obj2 = balls[j]
+            if obj1.sleeping and obj2.sleeping:
+                continue
+            dx = obj2.x - obj1.x
+            dy = obj2.y - obj1.y
+            distance = math.sqrt(dx**2 + dy**2)
+            if distance == 0:
+                continue
+            nx = dx / distance
+            ny = dy / distance
+            gap = distance - obj1.radius - obj2.radius
+            vn = (obj2.vx - obj1.vx) * nx + (obj2.vy - obj1.vy) * ny
+            if gap <= slop or gap + vn * dt < 0:
+                # Спящий шар в контакте с бодрствующим неподвижен (бесконечная масса)
+                inv_mass1 = 0.0 if obj1.sleeping else 1.0 / obj1.mass
+                inv_mass2 = 0.0 if obj2.sleeping else 1.0 / obj2.mass
+                contacts.append([obj1, obj2, nx, ny, gap, inv_mass1, inv_mass2,
+                                 (obj1.handle, obj2.handle)])
+        return contacts
+
+    @staticmethod
+    def _line_normal(ball, line):
+        """Нормаль от ближайшей точки отрезка к центру шара и расстояние до неё."""
+        line_vec_x = line.x2 - line.x1
+        line_vec_y = line.y2 - line.y1
+        line_len_sq = line_vec_x**2 + line_vec_y**2
+        if line_len_sq == 0:
+            t = 0
+        else:
+            t = max(0, min(1, ((ball.x - line.x1) * line_vec_x + (ball.y - line.y1) * line_vec_y) / line_len_sq))
+        dx = ball.x - (line.x1 + t * line_vec_x)
+        dy = ball.y - (line.y1 + t * line_vec_y)
+        distance = math.sqrt(dx**2 + dy**2)
+        if distance == 0:
+            if line_len_sq == 0:
+                return 0.0, -1.0, 0.0
+            line_len = math.sqrt(line_len_sq)
+            return -line_vec_y / line_len, line_vec_x / line_len, 0.0
+        return dx / distance, dy / distance, distance
+
+    @staticmethod
+    def _approach_velocity(obj1, obj2, nx, ny):
+        vx = 0.0 if obj2.sleeping else obj2._prev_vx
+        vy = 0.0 if obj2.sleeping else obj2._prev_vy
+        if obj1 is not None and not obj1.sleeping:
+            vx -= obj1._prev_vx
+            vy -= obj1._prev_vy
+        return vx * nx + vy * ny
+
+    @staticmethod
+    def _normal_velocity(obj1, obj2, nx, ny):
+        if obj1 is None:
+            return obj2.vx * nx + obj2.vy * ny
+        return (obj2.vx - obj1.vx) * nx + (obj2.vy - obj1.vy) * ny
+
+    @staticmethod
+    def _apply(obj1, obj2, nx, ny, lam, inv_mass1, inv_mass2):
+        if inv_mass1:
+            obj1.vx -= lam * nx * inv_mass1
+            obj1.vy -= lam * ny * inv_mass1
+        if inv_mass2:
+            obj2.vx += lam * nx * inv_mass2
+            obj2.vy += lam * ny * inv_mass2
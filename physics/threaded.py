@@ -0,0 +1,248 @@
+"""Симуляция в отдельном потоке.
+
+SimulationThread делает шаги фиксированного dt по реальному времени в
+своём потоке, независимо от цикла кадров GUI. После каждой пачки шагов он
+публикует StateFrame - неизменяемый кадр с позициями и радиусами шаров и
+величинами отслеживаемых шаров (панель объектов). Публикация -
+это замена одной ссылки (self.frame), поэтому GUI читает последний кадр без
+блокировок: поток собирает следующий кадр в новом буфере, пока GUI рисует
+предыдущий (двойная буферизация).
+
+Все правки мира (параметры, свойства объектов, сброс, перемотка) должны
+выполняться в потоке симуляции: submit ставит функцию в очередь команд,
+call ещё и ждёт её результата. Команды выполняются между шагами.
+"""
+import queue
+import threading
+from functools import partial
+from time import perf_counter
+
+from .calculations import ball_info
+from .objects import Ball
+from .timestep import FixedTimestep
+
+_FRAME_FIELDS = ("x", "y", "radius")
+
+
+class StateFrame:
+    """Опубликованное состояние: время, номер шага, позиции и радиусы шаров (пиксели).
+
+    x, y - позиции после шага, prev_x, prev_y - из предыдущего кадра (для
+    интерполяции). Буферы - memoryview над bytes. info - BallInfo
+    отслеживаемых шаров по handle. Кадр не изменяется.
+    """
+
+    __slots__ = ("t", "steps", "wall", "x", "y", "prev_x", "prev_y", "radius", "info")
+
+    def __init__(self, t, steps, wall, x, y, prev_x, prev_y, radius, info):
+        self.t = t
+        self.steps = steps
+        self.wall = wall
+        self.x = x
+        self.y = y
+        self.prev_x = prev_x
+        self.prev_y = prev_y
+        self.radius = radius
+        self.info = info
+
+
+class SimulationThread:
+    """Поток, который двигает simulator в реальном времени.
+
+    stepper - объект с update(dt), через который идут шаги: сам симулятор
+    или DeterministicSession. listeners - функции listener(simulator),
+    вызываемые в потоке симуляции после каждой пачки шагов (например,
+    запись истории для перемотки). Ошибка в шаге или команде останавливает
+    поток; check() поднимает её в вызывающем потоке.
+    """
+
+    def __init__(self, simulator, stepper=None, dt: float = 1 / 60, substeps: int = 1,
+                 max_frame_time: float = 0.25):
+        self.simulator = simulator
+        self.timestep = FixedTimestep(stepper or simulator, dt=dt, substeps=substeps,
+                                      max_frame_time=max_frame_time, interpolate=False)
+        self.listeners = []
+        self.error = None
+        self._commands = queue.SimpleQueue()
+        self._running = False
+        self._stopping = False
+        self._thread = None
+        # Шары фиксированы при создании симулятора: индекс в буферах кадра по handle
+        self._index = {ball.handle: i for i, ball in enumerate(simulator._balls)}
+        # Шары, чьи BallInfo попадают в кадр (например, строки панели)
+        self._watched = ()
+        self.frame = None
+        self._publish()
+
+    @property
+    def running(self):
+        return self._running
+
+    def start(self):
+        """Запускает поток (на паузе; шаги начнутся после resume)."""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._loop, name="simulation", daemon=True)
+            self._thread.start()
+
+    def resume(self):
+        self.submit(self._set_running, True)
+
+    def pause(self):
+        self.submit(self._set_running, False)
+
+    def stop(self):
+        """Останавливает поток и дожидается его завершения."""
+        if self._thread is None:
+            return
+        self._stopping = True
+        self._commands.put(None)
+        self._thread.join()
+        self._thread = None
+
+    def submit(self, func, *args, **kwargs):
+        """Ставит func(*args, **kwargs) в очередь: выполнится в потоке симуляции между шагами."""
+        if not self._alive():
+            func(*args, **kwargs)
+            self._publish(interpolate=False)
+            return
+        self._commands.put(partial(func, *args, **kwargs))
+
+    def call(self, func, *args, **kwargs):
+        """Как submit, но ждёт выполнения и возвращает результат func."""
+        if not self._alive() or threading.current_thread() is self._thread:
+            result = func(*args, **kwargs)
+            self._publish(interpolate=False)
+            return result
+        done = threading.Event()
+        outcome = {}
+
+        def command():
+            try:
+                outcome["result"] = func(*args, **kwargs)
+                # Вызывающий сразу увидит состояние после команды
+                self._publish(interpolate=False)
+            except BaseException as error:
+                outcome["error"] = error
+            finally:
+                done.set()
+        self._commands.put(command)
+        done.wait()
+        if "error" in outcome:
+            raise outcome["error"]
+        return outcome["result"]
+
+    def watch(self, balls):
+        """Задаёт шары, для которых кадры содержат BallInfo (заменяет прежний набор).
+
+        Ждёт публикации кадра, в котором они уже есть.
+        """
+        self.call(self._set_watched, tuple(ball for ball in balls if isinstance(ball, Ball)))
+
+    def _set_watched(self, balls):
+        self._watched = balls
+
+    def check(self):
+        """Поднимает ошибку, остановившую поток симуляции (если была)."""
+        if self.error is not None:
+            raise RuntimeError("Поток симуляции остановлен ошибкой") from self.error
+
+    def position_source(self, now: float = None):
+        """Функция ball -> (x, y) для RenderSystem по последнему опубликованному кадру.
+
+        Весь кадр отрисовки читает один StateFrame; позиции интерполируются
+        между двумя последними состояниями по времени с момента публикации.
+        """
+        frame = self.frame
+        index = self._index
+        now = perf_counter() if now is None else now
+        alpha = min(1.0, max(0.0, (now - frame.wall) / self.timestep.dt))
+        x, y, prev_x, prev_y = frame.x, frame.y, frame.prev_x, frame.prev_y
+
+        def source(ball):
+            i = index.get(ball.handle)
+            if i is None:
+                return ball.x, ball.y
+            px = prev_x[i]
+            py = prev_y[i]
+            return px + (x[i] - px) * alpha, py + (y[i] - py) * alpha
+        return source
+
+    def radius_source(self):
+        """Функция ball -> радиус (пиксели) по последнему опубликованному кадру."""
+        radius = self.frame.radius
+        index = self._index
+
+        def source(ball):
+            i = index.get(ball.handle)
+            return ball.radius if i is None else radius[i]
+        return source
+
+    def _alive(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def _set_running(self, running):
+        self._running = running
+
+    def _publish(self, interpolate: bool = True):
+        simulator = self.simulator
+        n = len(self._index)
+        columns = memoryview(simulator.state_columns(_FRAME_FIELDS)).cast("d")
+        x = columns[:n]
+        y = columns[n:2 * n]
+        radius = columns[2 * n:]
+        info = {ball.handle: ball_info(simulator, ball) for ball in self._watched}
+        previous = self.frame
+        # После команд (сброс, перемотка) интерполировать от старого кадра нельзя
+        if previous is None or not interpolate:
+            prev_x, prev_y = x, y
+        else:
+            prev_x, prev_y = previous.x, previous.y
+        # Одна запись ссылки: GUI видит либо старый, либо новый кадр целиком
+        self.frame = StateFrame(simulator.t, simulator.steps, perf_counter(), x, y, prev_x, prev_y,
+                                radius, info)
+
+    def _loop(self):
+        commands = self._commands
+        timestep = self.timestep
+        last = perf_counter()
+        timeout = None
+        was_running = False
+        try:
+            while not self._stopping:
+                # Ждём команду не дольше, чем до следующего шага (на паузе - без срока)
+                try:
+                    command = commands.get(timeout=timeout)
+                except queue.Empty:
+                    command = None
+                executed = False
+                while command is not None:
+                    command()
+                    executed = True
+                    try:
+                        command = commands.get_nowait()
+                    except queue.Empty:
+                        command = None
+                if self._stopping:
+                    break
+                now = perf_counter()
+                if not self._running:
+                    if executed:
+                        self._publish(interpolate=False)
+                    was_running = False
+                    timeout = None
+                    continue
+                if not was_running:
+                    # Время на паузе не должно попасть в аккумулятор
+                    last = now
+                    was_running = True
+                if timestep.advance(now - last):
+                    for listener in self.listeners:
+                        listener(self.simulator)
+                    self._publish()
+                elif executed:
+                    self._publish(interpolate=False)
+                last = now
+                timeout = max(0.0, timestep.dt - timestep.accumulator - (perf_counter() - now))
+        except BaseException as error:
+            self.error = error
+            self._running = False
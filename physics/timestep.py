@@ -0,0 +1,62 @@
+from .objects import Ball
+
+
+class FixedTimestep:
+    """Аккумулятор фиксированного шага поверх PhysicsSimulator.
+
+    Реальное время кадра накапливается, и физика делает столько шагов dt,
+    сколько в него помещается (каждый шаг - substeps подшагов). Остаток
+    определяет alpha для интерполяции позиций при отрисовке. При
+    interpolate=False позиции для интерполяции не запоминаются (её делает
+    вызывающий, например SimulationThread).
+    """
+
+    def __init__(self, simulator, dt: float = 1 / 60, substeps: int = 1,
+                 max_frame_time: float = 0.25, interpolate: bool = True):
+        self.simulator = simulator
+        self.dt = dt
+        self.substeps = substeps
+        # Ограничение на время одного кадра, чтобы долгий стоп GUI
+        # не вызывал лавину шагов ("спираль смерти")
+        self.max_frame_time = max_frame_time
+        self.interpolate = interpolate
+        self.accumulator = 0.0
+        self.alpha = 1.0
+        self._previous = {}
+
+    def advance(self, elapsed: float) -> int:
+        """Продвигает симуляцию на elapsed секунд реального времени. Возвращает число шагов."""
+        self.accumulator += min(elapsed, self.max_frame_time)
+        steps = int(self.accumulator / self.dt)
+        for i in range(steps):
+            if i == steps - 1 and self.interpolate:
+                self._store_previous()
+            self.step()
+        self.accumulator -= steps * self.dt
+        self.alpha = min(1.0, self.accumulator / self.dt)
+        return steps
+
+    def step(self):
+        """Один фиксированный шаг dt, разбитый на substeps подшагов."""
+        sub_dt = self.dt / self.substeps
+        for _ in range(self.substeps):
+            self.simulator.update(sub_dt)
+
+    def reset(self):
+        """Сбрасывает накопленное время и интерполяцию (после телепортации объектов)."""
+        self.accumulator = 0.0
+        self.alpha = 1.0
+        self._previous.clear()
+
+    def render_position(self, ball):
+        """Позиция шара для отрисовки между двумя последними состояниями физики."""
+        previous = self._previous.get(ball.handle)
+        if previous is None:
+            return ball.x, ball.y
+        prev_x, prev_y = previous
+        alpha = self.alpha
+        return prev_x + (ball.x - prev_x) * alpha, prev_y + (ball.y - prev_y) * alpha
+
+    def _store_previous(self):
+        self._previous = {obj.handle: (obj.x, obj.y) for obj in self.simulator.objects
+                          if isinstance(obj, Ball)}
@@ -0,0 +1,619 @@
+import math
+import numpy as np
+from .objects import Ball, Line
+from .sleep import CONTACT_SLOP, SMOOTHING
+from .snapshot import STATE_FIELDS
+
+# Поля шара, которые хранятся в непрерывных массивах
+FIELDS = STATE_FIELDS
+
+# Половина окрестности 3x3 (включая свою ячейку), чтобы каждая пара ячеек
+# рассматривалась один раз
+_HALF_NEIGHBOURS = ((0, 0), (1, -1), (1, 0), (1, 1), (0, 1))
+
+
+class BallArrays:
+    """Состояние всех шаров в виде structure-of-arrays (по массиву float64 на поле)."""
+
+    def __init__(self, balls):
+        self.size = len(balls)
+        for name in FIELDS:
+            setattr(self, name, np.array([getattr(ball, name) for ball in balls],
+                                         dtype=np.float64))
+        self.line_contact = np.zeros(self.size, dtype=bool)
+        # Состояние усыпления: флаг сна, шаги неподвижности подряд, метка острова
+        self.asleep = np.zeros(self.size, dtype=bool)
+        self.still_frames = np.zeros(self.size, dtype=np.int64)
+        self.ground_frames = np.zeros(self.size, dtype=np.int64)
+        self.avg_vx = np.zeros(self.size)
+        self.avg_vy = np.zeros(self.size)
+        self.island = np.full(self.size, -1, dtype=np.int64)
+
+    def take(self, indices):
+        """Копия полей для подмножества шаров (для обработки только бодрствующих)."""
+        subset = BallArrays.__new__(BallArrays)
+        subset.size = len(indices)
+        for name in FIELDS + ("line_contact",):
+            setattr(subset, name, getattr(self, name)[indices])
+        return subset
+
+    def put(self, indices, subset):
+        for name in FIELDS + ("line_contact",):
+            getattr(self, name)[indices] = getattr(subset, name)
+
+
+def _array_field(name):
+    def getter(self):
+        return float(getattr(self._arrays, name)[self._index])
+
+    def setter(self, value):
+        getattr(self._arrays, name)[self._index] = value
+
+    return property(getter, setter)
+
+
+class BallView(Ball):
+    """Ball, чьи физические поля - ссылки на элемент BallArrays.
+
+    Экземпляры не создаются напрямую: существующие Ball переключаются на этот
+    класс функцией bind_views, поэтому весь остальной код продолжает работать
+    с теми же объектами.
+    """
+
+    # Раскладка памяти та же, что у Ball, иначе нельзя сменить __class__
+    __slots__ = ()
+
+    x = _array_field("x")
+    y = _array_field("y")
+    vx = _array_field("vx")
+    vy = _array_field("vy")
+    ax = _array_field("ax")
+    ay = _array_field("ay")
+    radius = _array_field("radius")
+    mass = _array_field("mass")
+    rotation = _array_field("rotation")
+    angular_velocity = _array_field("angular_velocity")
+
+    @property
+    def rotation_degrees(self):
+        return math.degrees(self.rotation)
+
+    @rotation_degrees.setter
+    def rotation_degrees(self, value):
+        self.rotation = math.radians(value)
+
+    @property
+    def sleeping(self):
+        return bool(self._arrays.asleep[self._index])
+
+    @property
+    def line_contact(self):
+        return bool(self._arrays.line_contact[self._index])
+
+
+def bind_views(balls, arrays):
+    """Превращает шары в представления над arrays (значения уже скопированы в массивы)."""
+    for i, ball in enumerate(balls):
+        # Значения в слотах Ball больше не нужны: их заменяют свойства BallView
+        if not isinstance(ball, BallView):
+            for name in FIELDS + ("rotation_degrees", "sleeping", "line_contact"):
+                if hasattr(ball, name):
+                    delattr(ball, name)
+        ball._arrays = arrays
+        ball._index = i
+        ball.__class__ = BallView
+
+
+def candidate_pairs(x, y, cell_size):
+    """Пары-кандидаты (i, j), i != j, из равномерной сетки с ячейкой cell_size."""
+    n = x.shape[0]
+    empty = np.empty(0, dtype=np.int64)
+    if n < 2 or cell_size <= 0:
+        return empty, empty
+    ix = np.floor(x / cell_size).astype(np.int64)
+    iy = np.floor(y / cell_size).astype(np.int64)
+    # Сдвигаем индексы, чтобы соседние ячейки тоже были неотрицательными
+    ix -= ix.min() - 1
+    iy -= iy.min() - 1
+    stride = iy.max() + 2
+    keys = ix * stride + iy
+
+    order = np.argsort(keys, kind="stable")
+    sorted_keys = keys[order]
+    indices = np.arange(n)
+    firsts = []
+    seconds = []
+    for ox, oy in _HALF_NEIGHBOURS:
+        target = keys + (ox * stride + oy)
+        lo = np.searchsorted(sorted_keys, target, side="left")
+        hi = np.searchsorted(sorted_keys, target, side="right")
+        counts = hi - lo
+        total = int(counts.sum())
+        if total == 0:
+            continue
+        first = np.repeat(indices, counts)
+        offsets = np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)
+        second = order[np.repeat(lo, counts) + offsets]
+        if ox == 0 and oy == 0:
+            keep = first < second
+            first = first[keep]
+            second = second[keep]
+        firsts.append(first)
+        seconds.append(second)
+    if not firsts:
+        return empty, empty
+    return np.concatenate(firsts), np.concatenate(seconds)
+
+
+def line_contacts(px, py, r, x1, y1, x2, y2):
+    """Векторный аналог Ball.check_line_collision для пар шар-отрезок.
+
+    Координаты отрезка могут быть скалярами (одна линия для всех шаров) или
+    массивами той же длины. Возвращает (маска, nx, ny, глубина).
+    """
+    px, py, r, x1, y1, x2, y2 = np.broadcast_arrays(px, py, r, x1, y1, x2, y2)
+    line_vec_x = x2 - x1
+    line_vec_y = y2 - y1
+    line_len_sq = line_vec_x**2 + line_vec_y**2
+    degenerate = line_len_sq == 0
+    line_len_sq = np.where(degenerate, 1.0, line_len_sq)
+
+    t = np.clip(((px - x1) * line_vec_x + (py - y1) * line_vec_y) / line_len_sq, 0, 1)
+    dx = px - (x1 + t * line_vec_x)
+    dy = py - (y1 + t * line_vec_y)
+    dist = np.sqrt(dx**2 + dy**2)
+    hit = (dist <= r) & ~degenerate
+
+    line_len = np.sqrt(line_len_sq)
+    on_line = dist == 0
+    safe_dist = np.where(on_line, 1.0, dist)
+    normal_x = np.where(on_line, -line_vec_y / line_len, dx / safe_dist)
+    normal_y = np.where(on_line, line_vec_x / line_len, dy / safe_dist)
+    return hit, normal_x, normal_y, r - dist
+
+
+def swept_line_contacts(sx, sy, ex, ey, r, x1, y1, x2, y2):
+    """Векторный аналог Ball.sweep_line_collision для пар шар-отрезок: (маска, toi, nx, ny)."""
+    sx, sy, ex, ey, r, x1, y1, x2, y2 = np.broadcast_arrays(sx, sy, ex, ey, r, x1, y1, x2, y2)
+    n = sx.shape[0]
+    toi = np.full(n, np.inf)
+    normal_x = np.zeros(n)
+    normal_y = np.zeros(n)
+    line_vec_x = x2 - x1
+    line_vec_y = y2 - y1
+    line_len_sq = line_vec_x**2 + line_vec_y**2
+    usable = line_len_sq > 0
+    line_len_sq = np.where(usable, line_len_sq, 1.0)
+    line_len = np.sqrt(line_len_sq)
+    move_x = ex - sx
+    move_y = ey - sy
+
+    # Боковая сторона отрезка
+    side_nx = -line_vec_y / line_len
+    side_ny = line_vec_x / line_len
+    start_dist = (sx - x1) * side_nx + (sy - y1) * side_ny
+    end_dist = (ex - x1) * side_nx + (ey - y1) * side_ny
+    side = np.where(start_dist >= 0, 1.0, -1.0)
+    start_dist = start_dist * side
+    end_dist = end_dist * side
+    # Касание, если шар подлетает к линии, или если он уже касался её, а центр
+    # за шаг пересекает линию (тогда момент касания - начало шага)
+    crossing = (usable & (end_dist < r) & (start_dist > end_dist) &
+                ((start_dist > r) | (end_dist < 0)))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        t = np.maximum(0, (start_dist - r) / (start_dist - end_dist))
+    u = ((sx + move_x * t - x1) * line_vec_x + (sy + move_y * t - y1) * line_vec_y) / line_len_sq
+    side_hit = crossing & (u >= 0) & (u <= 1)
+    toi[side_hit] = t[side_hit]
+    normal_x[side_hit] = side_nx[side_hit] * side[side_hit]
+    normal_y[side_hit] = side_ny[side_hit] * side[side_hit]
+
+    # Концы отрезка (только для тех, кто не задел боковую сторону)
+    moving_sq = move_x**2 + move_y**2
+    for end_x, end_y in ((x1, y1), (x2, y2)):
+        fx = sx - end_x
+        fy = sy - end_y
+        b = fx * move_x + fy * move_y
+        c = fx**2 + fy**2 - r**2
+        disc = b**2 - moving_sq * c
+        valid = usable & ~side_hit & (moving_sq > 0) & (c > 0) & (b < 0) & (disc >= 0)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            t = (-b - np.sqrt(np.where(valid, disc, 0))) / moving_sq
+        better = valid & (t <= 1) & (t < toi)
+        toi[better] = t[better]
+        normal_x[better] = (fx[better] + move_x[better] * t[better]) / r[better]
+        normal_y[better] = (fy[better] + move_y[better] * t[better]) / r[better]
+
+    return np.isfinite(toi), toi, normal_x, normal_y
+
+
+def _first_per_ball(ball, key, mask):
+    """Индексы пар с наименьшим key для каждого шара среди пар, где mask истинна."""
+    candidates = np.flatnonzero(mask)
+    if candidates.size == 0:
+        return candidates
+    order = candidates[np.lexsort((key[candidates], ball[candidates]))]
+    _, first = np.unique(ball[order], return_index=True)
+    return order[first]
+
+
+class SegmentTable:
+    """Ячейки SegmentGrid в виде отсортированных массивов для пакетных запросов."""
+
+    def __init__(self, segments):
+        self.cells = segments.cells
+        self.cell_size = segments.cell_size
+        lines = segments.lines
+        self.x1 = np.array([line.x1 for line in lines], dtype=np.float64)
+        self.y1 = np.array([line.y1 for line in lines], dtype=np.float64)
+        self.x2 = np.array([line.x2 for line in lines], dtype=np.float64)
+        self.y2 = np.array([line.y2 for line in lines], dtype=np.float64)
+
+        coords = np.array(list(self.cells.keys()), dtype=np.int64).reshape(-1, 2)
+        counts = np.array([len(ids) for ids in self.cells.values()], dtype=np.int64)
+        self.cx_min, self.cy_min = coords.min(axis=0) if coords.size else (0, 0)
+        self.cx_max, self.cy_max = coords.max(axis=0) if coords.size else (-1, -1)
+        self.stride = self.cy_max - self.cy_min + 1
+        keys = np.repeat((coords[:, 0] - self.cx_min) * self.stride + (coords[:, 1] - self.cy_min),
+                         counts)
+        ids = np.fromiter((i for ids in self.cells.values() for i in ids), dtype=np.int64,
+                          count=int(counts.sum()))
+        order = np.argsort(keys, kind="stable")
+        self.keys = keys[order]
+        self.ids = ids[order]
+
+    def pairs(self, x, y):
+        """Пары (шар, отрезок) для отрезков, зарегистрированных в ячейке центра шара."""
+        cx = np.floor(x / self.cell_size).astype(np.int64)
+        cy = np.floor(y / self.cell_size).astype(np.int64)
+        inside = ((cx >= self.cx_min) & (cx <= self.cx_max) &
+                  (cy >= self.cy_min) & (cy <= self.cy_max))
+        keys = np.where(inside, (cx - self.cx_min) * self.stride + (cy - self.cy_min), -1)
+        lo = np.searchsorted(self.keys, keys, side="left")
+        hi = np.searchsorted(self.keys, keys, side="right")
+        counts = hi - lo
+        total = int(counts.sum())
+        ball = np.repeat(np.arange(x.shape[0]), counts)
+        offsets = np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)
+        return ball, self.ids[np.repeat(lo, counts) + offsets]
+
+
+class VectorizedEngine:
+    """Пакетный движок: все шары обновляются операциями над массивами NumPy.
+
+    Столкновения шаров разрешаются одновременно для всех пар (по состоянию
+    после интегрирования), а не последовательно в порядке перебора. Пока у
+    каждого шара за шаг не больше одного касания с другим шаром (grid,
+    terrain), результаты совпадают со скалярным путём до округления. Когда
+    касания сцеплены (куча, плотный газ), скалярный путь видит поправки
+    предыдущих пар, а здесь все пары видят одно состояние: траектории
+    расходятся с первого шага, совпадает лишь поведение в целом.
+    При нескольких отрезках каждый шар разрешает одно касание за шаг
+    (самое раннее при CCD или самое глубокое).
+    """
+
+    # Пары-кандидаты и пересечения последнего прохода столкновений (для профилировщика)
+    pair_tests = None
+    contact_count = None
+
+    def __init__(self, balls):
+        self.balls = balls
+        self.arrays = BallArrays(balls)
+        bind_views(balls, self.arrays)
+        self._segment_table = None
+        self.sleep_enabled = False
+        self.sleep_velocity = 0.0
+        self.sleep_frames = 0
+
+    @classmethod
+    def from_arrays(cls, arrays):
+        """Движок над готовыми массивами, без объектов Ball (для рабочих процессов)."""
+        engine = cls.__new__(cls)
+        engine.balls = []
+        engine.arrays = arrays
+        engine._segment_table = None
+        engine.sleep_enabled = False
+        engine.sleep_velocity = 0.0
+        engine.sleep_frames = 0
+        return engine
+
+    def enable_sleep(self, velocity, frames):
+        """Включает усыпление островов (см. SleepManager - та же логика на массивах)."""
+        self.sleep_enabled = True
+        self.sleep_velocity = velocity
+        self.sleep_frames = frames
+
+    @property
+    def awake_count(self):
+        return int(self.arrays.size - np.count_nonzero(self.arrays.asleep))
+
+    def integrate(self, dt, gravity, bounce, friction, table_line, width, ccd=False,
+                  segments=None):
+        active = None
+        a = self.arrays
+        if self.sleep_enabled and a.asleep.any():
+            active = np.flatnonzero(~a.asleep)
+            if active.size == 0:
+                return
+            a = a.take(active)
+
+        start_x = a.x.copy()
+        start_y = a.y.copy()
+        a.vy += gravity * dt
+        a.x += a.vx * dt
+        a.y += a.vy * dt
+        if dt != 0:
+            # Как в Ball.update: ускорение до разрешения столкновения с линией
+            a.ax.fill(0.0)
+            a.ay.fill(gravity)
+
+        a.line_contact.fill(False)
+        ball, x1, y1, x2, y2 = self.line_pairs(a, table_line, segments, start_x, start_y)
+        swept = None
+        if ccd:
+            swept = self.resolve_line_impacts(a, ball, x1, y1, x2, y2, start_x, start_y,
+                                              dt, bounce, friction)
+        self.resolve_line_collisions(a, ball, x1, y1, x2, y2, bounce, friction, skip=swept)
+
+        left = a.x - a.radius < 0
+        a.x[left] = a.radius[left]
+        a.vx[left] *= -bounce
+        right = ~left & (a.x + a.radius > width)
+        a.x[right] = width - a.radius[right]
+        a.vx[right] *= -bounce
+
+        a.rotation += a.angular_velocity * dt
+
+        if active is not None:
+            self.arrays.put(active, a)
+
+    def line_pairs(self, a, table_line, segments, start_x, start_y):
+        """Пары шар-отрезок для проверки: (индексы шаров, x1, y1, x2, y2)."""
+        if segments is None:
+            return (np.arange(a.size), table_line.x1, table_line.y1,
+                    table_line.x2, table_line.y2)
+        segments.ensure_margin(float(self.arrays.radius.max()) if self.arrays.size else 0.0)
+        table = self._segment_table
+        if table is None or table.cells is not segments.cells:
+            table = self._segment_table = SegmentTable(segments)
+        # Отрезки из ячеек начала и конца пути; путь длиннее ячейки может
+        # пройти мимо отрезков промежуточных ячеек
+        ball_end, seg_end = table.pairs(a.x, a.y)
+        ball_start, seg_start = table.pairs(start_x, start_y)
+        pair_keys = np.unique(np.concatenate((ball_end, ball_start)) * len(table.x1) +
+                              np.concatenate((seg_end, seg_start)))
+        ball = pair_keys // len(table.x1)
+        seg = pair_keys % len(table.x1)
+        return ball, table.x1[seg], table.y1[seg], table.x2[seg], table.y2[seg]
+
+    def resolve_line_collisions(self, a, ball, x1, y1, x2, y2, bounce, friction, skip=None):
+        hit, normal_x, normal_y, depth = line_contacts(a.x[ball], a.y[ball], a.radius[ball],
+                                                       x1, y1, x2, y2)
+        if skip is not None:
+            hit &= ~skip[ball]
+        chosen = _first_per_ball(ball, -depth, hit)
+        if chosen.size == 0:
+            return
+        target = ball[chosen]
+        a.x[target] += normal_x[chosen] * depth[chosen]
+        a.y[target] += normal_y[chosen] * depth[chosen]
+        self._reflect(a, target, normal_x[chosen], normal_y[chosen], bounce, friction)
+        a.line_contact[target] = True
+
+    def resolve_line_impacts(self, a, ball, x1, y1, x2, y2, start_x, start_y, dt, bounce, friction):
+        """Векторный аналог Ball.resolve_line_impact. Возвращает маску обработанных шаров."""
+        hit, toi, normal_x, normal_y = swept_line_contacts(
+            start_x[ball], start_y[ball], a.x[ball], a.y[ball], a.radius[ball], x1, y1, x2, y2)
+        handled = np.zeros(a.size, dtype=bool)
+        chosen = _first_per_ball(ball, toi, hit)
+        if chosen.size == 0:
+            return handled
+        target = ball[chosen]
+        t = toi[chosen]
+        a.x[target] = start_x[target] + (a.x[target] - start_x[target]) * t
+        a.y[target] = start_y[target] + (a.y[target] - start_y[target]) * t
+        # В момент касания шар может уже немного перекрывать линию
+        x1, y1, x2, y2 = (np.broadcast_to(c, ball.shape)[chosen] for c in (x1, y1, x2, y2))
+        touching, contact_x, contact_y, depth = line_contacts(
+            a.x[target], a.y[target], a.radius[target], x1, y1, x2, y2)
+        nx = np.where(touching, contact_x, normal_x[chosen])
+        ny = np.where(touching, contact_y, normal_y[chosen])
+        depth = np.where(touching, depth, 0.0)
+        a.x[target] += nx * depth
+        a.y[target] += ny * depth
+        self._reflect(a, target, nx, ny, bounce, friction)
+        remaining = (1 - t) * dt
+        a.x[target] += a.vx[target] * remaining
+        a.y[target] += a.vy[target] * remaining
+        handled[target] = True
+        a.line_contact[target] = True
+        return handled
+
+    @staticmethod
+    def _reflect(a, target, nx, ny, bounce, friction):
+        vx = a.vx[target]
+        vy = a.vy[target]
+        vel_normal = vx * nx + vy * ny
+        vel_tangent_x = vx - vel_normal * nx
+        vel_tangent_y = vy - vel_normal * ny
+        a.vx[target] = -vel_normal * bounce * nx + vel_tangent_x * friction
+        a.vy[target] = -vel_normal * bounce * ny + vel_tangent_y * friction
+
+    def quantities(self, surface, gravity, mpp):
+        """Производные величины всех шаров (аналог BatchQuantities.from_balls на массивах)."""
+        from .calculations import (BatchQuantities, ELASTIC_COEFFICIENT,
+                                   FRICTION_COEFFICIENT, height_above_surface)
+        a = self.arrays
+        velocity = np.sqrt(a.vx**2 + a.vy**2) * mpp
+        kinetic = 0.5 * a.mass * velocity**2
+        if isinstance(surface, Line):
+            line_vec_x = surface.x2 - surface.x1
+            line_vec_y = surface.y2 - surface.y1
+            line_len_sq = line_vec_x**2 + line_vec_y**2
+            if line_len_sq == 0:
+                height = np.zeros(a.size)
+            else:
+                t = np.clip(((a.x - surface.x1) * line_vec_x + (a.y - surface.y1) * line_vec_y) /
+                            line_len_sq, 0, 1)
+                height = surface.y1 + t * line_vec_y - a.y - a.radius
+        else:
+            height = np.fromiter((height_above_surface(ball, surface) for ball in self.balls),
+                                 dtype=np.float64, count=a.size)
+        h_m = height * mpp
+        potential = np.where(h_m > 0, a.mass * gravity * h_m, 0.0)
+        gravity_force = a.mass * gravity
+        return BatchQuantities({
+            "velocity_magnitude": velocity,
+            "kinetic_energy": kinetic,
+            "potential_energy": potential,
+            "total_energy": kinetic + potential,
+            "momentum": a.mass * velocity,
+            "acceleration": np.sqrt(a.ax**2 + a.ay**2) * mpp,
+            "gravity_force": gravity_force,
+            "elastic_force": np.where(a.line_contact, velocity * a.mass * ELASTIC_COEFFICIENT, 0.0),
+            "friction_force": FRICTION_COEFFICIENT * gravity_force,
+            "momentum_x": a.mass * a.vx * mpp,
+            "momentum_y": a.mass * a.vy * mpp,
+        })
+
+    def resolve_ball_collisions(self, bounce):
+        a = self.arrays
+        empty = np.empty(0, dtype=np.int64)
+        first, second = empty, empty
+        if self.sleep_enabled and a.asleep.all():
+            return
+        if a.size >= 2:
+            first, second = candidate_pairs(a.x, a.y, 2 * a.radius.max())
+        self.pair_tests = first.size
+        self.contact_count = 0
+        if first.size:
+            first, second = self.resolve_pairs(first, second, bounce)
+        if self.sleep_enabled:
+            self._update_sleep(first, second)
+
+    def resolve_pairs(self, first, second, bounce):
+        """Разрешает пересекающиеся пары. Возвращает пары в контакте (для островов)."""
+        a = self.arrays
+        dx = a.x[second] - a.x[first]
+        dy = a.y[second] - a.y[first]
+        distance = np.sqrt(dx**2 + dy**2)
+        radius_sum = a.radius[first] + a.radius[second]
+        hit = (distance < radius_sum) & (distance > 0)
+        touching = empty = np.empty(0, dtype=np.int64)
+        if self.sleep_enabled:
+            # Спящие пары не проверяются; контакт с бодрствующим будит остров
+            hit &= ~(a.asleep[first] & a.asleep[second])
+            touched = np.concatenate((first[hit], second[hit]))
+            touched = touched[a.asleep[touched]]
+            if touched.size:
+                self._wake_islands(a.island[touched])
+            touching = np.flatnonzero((distance < radius_sum * (1 + CONTACT_SLOP)) &
+                                      ~a.asleep[first] & ~a.asleep[second])
+        contacts = first[touching], second[touching]
+        hits = int(np.count_nonzero(hit))
+        self.contact_count = hits
+        if not hits:
+            return contacts
+        first = first[hit]
+        second = second[hit]
+        distance = distance[hit]
+        overlap = a.radius[first] + a.radius[second] - distance
+        normal_x = dx[hit] / distance
+        normal_y = dy[hit] / distance
+
+        # resolve_collision_pair вызывает разрешение с обеих сторон, поэтому
+        # каждый шар сдвигается на полную глубину проникновения
+        n = a.size
+        shift_x = normal_x * overlap
+        shift_y = normal_y * overlap
+        a.x += np.bincount(second, shift_x, n) - np.bincount(first, shift_x, n)
+        a.y += np.bincount(second, shift_y, n) - np.bincount(first, shift_y, n)
+
+        # Импульс применяется один раз: после первого вызова шары уже расходятся
+        rel_vel_normal = ((a.vx[second] - a.vx[first]) * normal_x +
+                          (a.vy[second] - a.vy[first]) * normal_y)
+        approaching = rel_vel_normal <= 0
+        j = np.where(approaching, -(1 + bounce) * rel_vel_normal, 0.0)
+        j /= (1 / a.mass[first] + 1 / a.mass[second])
+        impulse_x = j * normal_x
+        impulse_y = j * normal_y
+        a.vx += (np.bincount(second, impulse_x, n) - np.bincount(first, impulse_x, n)) / a.mass
+        a.vy += (np.bincount(second, impulse_y, n) - np.bincount(first, impulse_y, n)) / a.mass
+        return contacts
+
+    def _update_sleep(self, first, second):
+        a = self.arrays
+        awake = np.flatnonzero(~a.asleep)
+        if awake.size == 0:
+            return
+        a.avg_vx[awake] += (a.vx[awake] - a.avg_vx[awake]) * SMOOTHING
+        a.avg_vy[awake] += (a.vy[awake] - a.avg_vy[awake]) * SMOOTHING
+        still = a.avg_vx[awake]**2 + a.avg_vy[awake]**2 < self.sleep_velocity**2
+        a.still_frames[awake] = np.where(still, a.still_frames[awake] + 1, 0)
+        # Лежащий шар касается линии не на каждом шаге, поэтому помним касание
+        a.ground_frames[awake] = np.where(a.line_contact[awake], self.sleep_frames,
+                                          np.maximum(a.ground_frames[awake] - 1, 0))
+
+        # Острова: метка = наименьший индекс шара в компоненте связности контактов
+        labels = np.arange(a.size)
+        while first.size:
+            low = np.minimum(labels[first], labels[second])
+            if np.array_equal(low, labels[first]) and np.array_equal(low, labels[second]):
+                break
+            np.minimum.at(labels, first, low)
+            np.minimum.at(labels, second, low)
+            labels = labels[labels]
+
+        island = labels[awake]
+        min_frames = np.full(a.size, np.iinfo(np.int64).max)
+        np.minimum.at(min_frames, island, a.still_frames[awake])
+        grounded = np.zeros(a.size, dtype=bool)
+        np.logical_or.at(grounded, island, a.ground_frames[awake] > 0)
+        ready = (min_frames >= self.sleep_frames) & grounded
+        falling_asleep = awake[ready[island]]
+        if falling_asleep.size:
+            a.asleep[falling_asleep] = True
+            a.island[falling_asleep] = labels[falling_asleep]
+            for name in ("vx", "vy", "ax", "ay"):
+                getattr(a, name)[falling_asleep] = 0.0
+
+    def _wake_islands(self, labels):
+        a = self.arrays
+        members = np.isin(a.island, np.unique(labels)) & a.asleep
+        a.asleep[members] = False
+        a.island[members] = -1
+        a.still_frames[members] = 0
+
+    def state_bytes(self, fields=FIELDS):
+        """Поля всех шаров одним буфером по столбцам (формат Snapshot.balls)."""
+        a = self.arrays
+        return np.concatenate([getattr(a, name) for name in fields]).tobytes()
+
+    def load_state(self, buffer):
+        a = self.arrays
+        columns = np.frombuffer(buffer, dtype=np.float64).reshape(len(FIELDS), a.size)
+        for name, column in zip(FIELDS, columns):
+            getattr(a, name)[:] = column
+        a.line_contact.fill(False)
+
+    def wake(self, ball):
+        a = self.arrays
+        index = ball._index
+        if a.asleep[index]:
+            self._wake_islands(a.island[index:index + 1])
+        else:
+            a.still_frames[index] = 0
+
+    def wake_all(self):
+        a = self.arrays
+        a.asleep.fill(False)
+        a.island.fill(-1)
+        a.still_frames.fill(0)
+
+    def reset_sleep(self):
+        """wake_all плюс сброс сглаженных скоростей и счётчиков касаний."""
+        self.wake_all()
+        a = self.arrays
+        a.ground_frames.fill(0)
+        a.avg_vx.fill(0.0)
+        a.avg_vy.fill(0.0)
@@ -0,0 +1,35 @@
+"""Пространственный хэш и полный перебор дают одни и те же пары."""
+import random
+
+from physics.broadphase import BruteForceBroadPhase, SpatialHashBroadPhase
+from physics.core import PhysicsSimulator
+from physics.objects import Ball
+from physics.scenes import grid_scene, pile_scene
+
+
+def _contacts(broad_phase, balls):
+    pairs = []
+    for i, j in broad_phase.iter_pairs(balls):
+        if balls[i].check_collision_with_ball(balls[j])[0]:
+            pairs.append((i, j))
+    return pairs
+
+
+def test_contact_pairs_match_brute_force():
+    rng = random.Random(1)
+    balls = [Ball(cord=(rng.uniform(0, 20), rng.uniform(0, 20)), r=rng.uniform(0.2, 0.8))
+             for _ in range(300)]
+    assert _contacts(SpatialHashBroadPhase(), balls) == _contacts(BruteForceBroadPhase(), balls)
+
+
+def test_simulation_matches_brute_force():
+    for scene in (grid_scene, pile_scene):
+        states = []
+        for broad_phase in ("grid", "brute"):
+            objects, table = scene(cols=8, rows=5)
+            simulator = PhysicsSimulator(objects=objects, table_line=table, width=850,
+                                         broad_phase=broad_phase)
+            for _ in range(120):
+                simulator.update(1 / 60)
+            states.append(simulator.state_columns())
+        assert states[0] == states[1]
@@ -0,0 +1,19 @@
+"""Устаревшие PhysicsVariables/PhysicsCalculations поверх ball_quantities."""
+import pytest
+
+from physics import PhysicsCalculations, PhysicsVariables
+from physics.calculations import ball_quantities
+from physics.objects import Ball, Line
+
+
+@pytest.mark.parametrize("cls", [PhysicsVariables, PhysicsCalculations])
+def test_deprecated_wrappers_match_ball_quantities(cls):
+    ball = Ball(cord=(5, 10), r=0.5, mass=2.0)
+    ball.vx, ball.vy = 30.0, -40.0
+    table = Line(p1=(0, 40), p2=(100, 40))
+    with pytest.warns(DeprecationWarning):
+        variables = cls(ball, table, 9.8, 0.1)
+    expected = ball_quantities(ball, table, 9.8, 0.1)
+    assert variables.total_energy == expected.total_energy
+    assert variables.velocity_magnitude == pytest.approx(5.0)
+    assert variables.potential_energy > 0
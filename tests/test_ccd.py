@@ -0,0 +1,34 @@
+"""Непрерывное обнаружение столкновений: быстрый шар не проходит сквозь стол."""
+import pytest
+
+from physics.core import PhysicsSimulator
+from physics.objects import Ball, Line
+
+def fast_ball(engine, ccd):
+    # За шаг 1/60 с шар пролетает 500 px, стол на его пути в 100 px
+    ball = Ball(cord=(50, 30), r=0.5)
+    ball.vy = 30000.0
+    table = Line(p1=(0, 40), p2=(100, 40), thickness=2)
+    simulator = PhysicsSimulator(objects=[ball, table], table_line=table, width=1000,
+                                 engine=engine, ccd=ccd)
+    simulator.update(1 / 60)
+    state = simulator._balls[0]
+    return simulator, state.y, state.vy, table.y1
+
+
+@pytest.mark.parametrize("engine", ["python", "numpy"])
+def test_fast_ball_tunnels_without_ccd(engine):
+    if engine == "numpy":
+        pytest.importorskip("numpy")
+    simulator, y, vy, table_y = fast_ball(engine, ccd=False)
+    simulator.close()
+    assert y > table_y and vy > 0
+
+
+@pytest.mark.parametrize("engine", ["python", "numpy"])
+def test_fast_ball_bounces_with_ccd(engine):
+    if engine == "numpy":
+        pytest.importorskip("numpy")
+    simulator, y, vy, table_y = fast_ball(engine, ccd=True)
+    simulator.close()
+    assert y < table_y and vy < 0
@@ -0,0 +1,46 @@
+"""Ансамбль: результаты по мере готовности, детерминизм, выборка перекрытий."""
+import physics.ensemble
+from physics.ensemble import aggregate, parameter_grid, run_ensemble
+from physics.scene_io import Scene
+from physics.scenes import pile_scene
+
+
+def _scene():
+    objects, table = pile_scene(cols=5, rows=2)
+    return Scene.from_objects(objects, table=table)
+
+
+def _run(parameters, **kwargs):
+    return run_ensemble(_scene(), parameters, steps=25, processes=1, **kwargs)
+
+
+def test_results_stream_and_repeat():
+    parameters = parameter_grid(bounce=[0.2, 0.8], friction=[0.99])
+    results = _run(parameters)
+    first = next(results)
+    # Первый прогон выдан до того, как посчитан второй
+    assert first["index"] == 0 and first["steps"] == 25
+    rest = list(results)
+    assert [result["index"] for result in rest] == [1]
+    again = list(_run(parameters))
+    for result in [first] + rest:
+        result.pop("elapsed")
+    for result in again:
+        result.pop("elapsed")
+    assert again == [first] + rest
+    summary = aggregate(again)
+    assert summary["runs"] == 2
+    assert summary["max_penetration"]["count"] == 2
+
+
+def test_penetration_sampled_every_n_steps(monkeypatch):
+    calls = []
+    original = physics.ensemble.max_penetration
+
+    def counting(simulator):
+        calls.append(simulator.steps)
+        return original(simulator)
+    monkeypatch.setattr(physics.ensemble, "max_penetration", counting)
+    list(_run([{"bounce": 0.5}], sample_every=10))
+    # До первого шага, каждые 10 шагов и после последнего
+    assert calls == [0, 10, 20, 25]
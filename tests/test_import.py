@@ -0,0 +1,14 @@
+"""Холодный импорт physics: без тяжёлых модулей и в пределах бюджета."""
+import os
+
+from benchmarks.import_time import IMPORT_BUDGET, measure
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_import_physics_is_light(monkeypatch):
+    # Каждый замер - свежий интерпретатор, запущенный из корня репозитория
+    monkeypatch.chdir(ROOT)
+    best, heavy = measure(repeats=5)
+    assert heavy == []
+    assert best < IMPORT_BUDGET
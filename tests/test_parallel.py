@@ -0,0 +1,54 @@
+"""Параллельный движок: правки параметров, restore и изменение линий."""
+import pytest
+
+pytest.importorskip("numpy")
+
+from physics.core import PhysicsSimulator  # noqa: E402
+from physics.objects import Ball, Line  # noqa: E402
+from physics.scenes import grid_scene  # noqa: E402
+
+
+@pytest.fixture
+def simulator():
+    objects, table = grid_scene(cols=6, rows=4)
+    simulator = PhysicsSimulator(objects=objects, table_line=table, width=850,
+                                 engine="parallel", workers=2)
+    yield simulator
+    simulator.close()
+
+
+def test_set_parameters_then_update(simulator):
+    simulator.set_parameters(gravity=5.0, bounce=0.5)
+    simulator.update(1 / 60)
+    simulator.wake(simulator._balls[0])
+    simulator.update(1 / 60)
+    assert simulator.steps == 2
+
+
+def test_snapshot_restore(simulator):
+    for _ in range(5):
+        simulator.update(1 / 60)
+    snapshot = simulator.snapshot()
+    state = simulator.state_columns()
+    for _ in range(5):
+        simulator.update(1 / 60)
+    simulator.restore(snapshot)
+    assert simulator.state_columns() == state
+    simulator.update(1 / 60)
+
+
+def test_line_edits_reach_workers():
+    # Стол опускается под лежащими на нём шарами: рабочие должны увидеть новый стол
+    balls = [Ball(cord=(5, 39), r=0.5), Ball(cord=(50, 39), r=0.5)]
+    table = Line(p1=(0, 40), p2=(100, 40))
+    simulator = PhysicsSimulator(objects=balls + [table], table_line=table, width=1000,
+                                 engine="parallel", workers=2)
+    try:
+        table.y1 += 1000
+        table.y2 += 1000
+        simulator.wake(table)
+        for _ in range(300):
+            simulator.update(1 / 60)
+        assert all(ball.y > 400 for ball in balls)
+    finally:
+        simulator.close()
@@ -0,0 +1,39 @@
+"""Профилировщик шага: стадии не перекрываются, счётчики пар."""
+import itertools
+
+import physics.core
+import physics.profiling
+from physics.core import PhysicsSimulator
+from physics.profiling import Profiler
+from physics.scenes import grid_scene, pile_scene
+
+
+def test_hooks_lap_excludes_solver(monkeypatch):
+    # Часы идут на 1 мс за вызов: время стадии - число вызовов таймера внутри неё
+    ticks = itertools.count()
+    clock = lambda: next(ticks) / 1000  # noqa: E731
+    monkeypatch.setattr(physics.core, "perf_counter", clock)
+    monkeypatch.setattr(physics.profiling, "perf_counter", clock)
+    objects, table = pile_scene(cols=4, rows=3)
+    simulator = PhysicsSimulator(objects=objects, table_line=table, width=850, solver="sequential")
+    simulator.profiler = Profiler()
+    simulator.step_hooks.append(lambda sim: None)
+    simulator.update(1 / 60)
+    stages = simulator.profiler.summary()["stages_ms"]
+    assert set(stages) >= {"integrate", "solver", "positions", "hooks"}
+    assert stages["hooks"]["last"] == 1
+
+
+def test_pair_counters_match_plain_step():
+    objects, table = grid_scene(cols=6, rows=4)
+    plain = PhysicsSimulator(objects=objects, table_line=table, width=850)
+    objects, table = grid_scene(cols=6, rows=4)
+    profiled = PhysicsSimulator(objects=objects, table_line=table, width=850)
+    profiled.profiler = Profiler()
+    for _ in range(60):
+        plain.update(1 / 60)
+        profiled.update(1 / 60)
+    assert profiled.state_columns() == plain.state_columns()
+    counters = profiled.profiler.summary()["counters"]
+    assert counters["pair_tests"]["count"] == 60
+    assert counters["contacts"]["max"] <= counters["pair_tests"]["max"]
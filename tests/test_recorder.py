@@ -0,0 +1,40 @@
+"""Запись траекторий: блоки читаются обратно, смена mpp не портит метры."""
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from physics.core import PhysicsSimulator  # noqa: E402
+from physics.recorder import TrajectoryReader, TrajectoryRecorder  # noqa: E402
+from physics.scenes import grid_scene  # noqa: E402
+
+
+def test_round_trip_with_mpp_change(tmp_path):
+    objects, table = grid_scene(cols=4, rows=3)
+    simulator = PhysicsSimulator(objects=objects, table_line=table, width=850)
+    path = str(tmp_path / "run")
+    expected_x = []
+    expected_t = []
+
+    def remember():
+        x = np.frombuffer(simulator.state_columns(("x",)), dtype=float)
+        expected_x.append(x * simulator.mpp)
+        expected_t.append(simulator.t)
+
+    with TrajectoryRecorder(path, chunk_steps=7) as recorder:
+        recorder.attach(simulator)
+        remember()
+        for step in range(30):
+            if step == 16:
+                simulator.set_parameters(mpp=0.2)
+            simulator.update(1 / 60)
+            remember()
+
+    with TrajectoryReader(path) as reader:
+        assert reader.step_count == 31
+        assert {chunk["mpp"] for chunk in reader.chunks} == {0.1, 0.2}
+        times, x = reader.read("x")
+        assert times.tolist() == expected_t
+        assert np.array_equal(x, np.array(expected_x))
+        handles = [ball.handle for ball in simulator._balls[:2]]
+        _, energy = reader.read("total", t0=expected_t[10], t1=expected_t[20], objects=handles)
+        assert energy.shape == (11, 2)
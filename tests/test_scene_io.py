@@ -0,0 +1,58 @@
+"""Сцены: JSON, двоичный файл и буфер в памяти возвращают те же объекты."""
+import pytest
+
+from physics.objects import Ball, Line
+from physics.scene_io import (Scene, load_scene, save_scene, scene_from_bytes,
+                              scene_from_dict, scene_to_bytes, scene_to_dict)
+from physics.scenes import terrain_scene
+
+BALL_FIELDS = ("x", "y", "radius", "mass", "vx", "vy", "rotation", "angular_velocity",
+               "color", "fill_color")
+LINE_FIELDS = ("x1", "y1", "x2", "y2", "thickness", "color")
+
+
+def _state(objects):
+    state = []
+    for obj in objects:
+        fields = BALL_FIELDS if isinstance(obj, Ball) else LINE_FIELDS
+        state.append((type(obj).__name__,) + tuple(
+            tuple(value) if isinstance(value, (tuple, list)) else pytest.approx(value)
+            for value in (getattr(obj, name) for name in fields)))
+    return state
+
+
+def _scene():
+    objects, table = terrain_scene(cols=6, rows=2, segments=20)
+    objects[0].vx = 3.0
+    objects[1].angular_velocity = 0.5
+    objects[2].mass = 2.5
+    return Scene.from_objects(objects, table=table), objects
+
+
+@pytest.mark.parametrize("name", ["scene.json", "scene.scene"])
+def test_file_round_trip(tmp_path, name):
+    scene, objects = _scene()
+    path = str(tmp_path / name)
+    save_scene(scene, path)
+    loaded, table = load_scene(path).to_objects()
+    assert _state(loaded) == _state(objects)
+    assert isinstance(table, Line)
+    assert loaded.index(table) == scene.ball_count + scene.table
+
+
+def test_bytes_round_trip():
+    scene, objects = _scene()
+    loaded, _ = scene_from_bytes(scene_to_bytes(scene)).to_objects()
+    assert _state(loaded) == _state(objects)
+
+
+def test_json_missing_or_ragged_columns():
+    scene, _ = _scene()
+    data = scene_to_dict(scene)
+    del data["balls"]["radius"]
+    with pytest.raises(ValueError):
+        scene_from_dict(data)
+    data = scene_to_dict(scene)
+    data["lines"]["x2"].pop()
+    with pytest.raises(ValueError):
+        scene_from_dict(data)
@@ -0,0 +1,37 @@
+"""Параметры мира: версия растёт только при изменении, шаг видит один снимок."""
+import pytest
+
+from physics.core import PhysicsSimulator
+from physics.scenes import grid_scene
+from physics.settings import WORLD_FIELDS, WorldSettings
+
+
+def test_version_bumps_only_on_change():
+    settings = WorldSettings(gravity=9.8, mpp=0.1)
+    before = settings.snapshot()
+    assert not settings.update(gravity=9.8)
+    assert settings.version == 0 and settings.snapshot() is before
+    assert settings.update(gravity=5.0, bounce=0.5)
+    assert settings.version == 1
+    after = settings.snapshot()
+    assert (after.gravity, after.bounce, after.version) == (5.0, 0.5, 1)
+    # Старый снимок не меняется
+    assert (before.gravity, before.version) == (9.8, 0)
+    assert settings.to_dict() == {name: getattr(after, name) for name in WORLD_FIELDS}
+    with pytest.raises(ValueError):
+        settings.update(viscosity=1.0)
+
+
+def test_step_sees_snapshot_taken_at_its_start():
+    objects, table = grid_scene(cols=4, rows=3)
+    simulator = PhysicsSimulator(objects=objects, table_line=table, width=850)
+    seen = []
+    # Правка посреди шага (из hook) попадает только в следующий шаг
+    simulator.step_hooks.append(lambda sim: seen.append(sim.step_parameters))
+    simulator.step_hooks.append(lambda sim: sim.set_parameters(gravity=sim.gravity + 1))
+    for _ in range(3):
+        simulator.update(1 / 60)
+    assert [parameters.gravity for parameters in seen] == pytest.approx([9.8, 10.8, 11.8])
+    assert [parameters.version for parameters in seen] == [0, 1, 2]
+    assert simulator.step_parameters == seen[-1]
+    assert simulator.settings.snapshot().gravity == pytest.approx(12.8)
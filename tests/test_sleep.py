@@ -0,0 +1,51 @@
+"""Усыпление: покоящиеся шары засыпают, правки параметров и свойств будят."""
+import pytest
+
+from physics.core import PhysicsSimulator
+from physics.objects import Ball, Line
+from physics.scenes import pile_scene
+
+
+def settle(simulator, steps=600):
+    for _ in range(steps):
+        simulator.update(1 / 60)
+
+
+@pytest.fixture
+def resting():
+    # Два шара далеко друг от друга на ровном столе: два отдельных острова
+    balls = [Ball(cord=(10, 39.5), r=0.5), Ball(cord=(80, 39.5), r=0.5)]
+    table = Line(p1=(0, 40), p2=(100, 40), thickness=2)
+    simulator = PhysicsSimulator(objects=balls + [table], table_line=table, width=1000,
+                                 sleeping=True)
+    settle(simulator)
+    return simulator, balls
+
+
+def test_pile_falls_asleep():
+    objects, table = pile_scene(cols=6, rows=3)
+    simulator = PhysicsSimulator(objects=objects, table_line=table, width=850, sleeping=True)
+    assert simulator.awake_count == len(simulator._balls)
+    settle(simulator)
+    assert simulator.awake_count == 0
+
+
+def test_parameter_change_wakes_all(resting):
+    simulator, balls = resting
+    assert simulator.awake_count == 0
+    # Значение не изменилось: версия та же, шары спят
+    simulator.set_parameters(gravity=simulator.gravity)
+    simulator.update(1 / 60)
+    assert simulator.awake_count == 0
+    simulator.set_parameters(gravity=5.0)
+    simulator.update(1 / 60)
+    assert simulator.awake_count == len(balls)
+
+
+def test_property_edit_wakes_only_that_island(resting):
+    simulator, balls = resting
+    balls[0].mass = 3.0
+    simulator.wake(balls[0])
+    assert not balls[0].sleeping
+    assert balls[1].sleeping
+    assert simulator.awake_count == 1
@@ -0,0 +1,22 @@
+"""Снимок мира: restore и шаги дают то же, что и продолжение без restore."""
+from physics.core import PhysicsSimulator
+from physics.scenes import pile_scene
+
+
+def test_restore_then_step_matches_continuing():
+    objects, table = pile_scene(cols=8, rows=5)
+    simulator = PhysicsSimulator(objects=objects, table_line=table, width=850)
+    for _ in range(30):
+        simulator.update(1 / 60)
+    snapshot = simulator.snapshot()
+    for _ in range(30):
+        simulator.update(1 / 60)
+    expected = simulator.state_columns()
+    expected_t = simulator.t
+
+    simulator.restore(snapshot)
+    assert simulator.t == snapshot.t
+    for _ in range(30):
+        simulator.update(1 / 60)
+    assert simulator.state_columns() == expected
+    assert simulator.t == expected_t
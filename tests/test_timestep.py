@@ -0,0 +1,54 @@
+"""Фиксированный шаг: остаток аккумулятора, ограничение кадра, alpha."""
+import pytest
+
+from physics.objects import Ball
+from physics.timestep import FixedTimestep
+
+
+class MovingSimulator:
+    """Вместо физики: каждый update сдвигает шар на 8 px и запоминает dt."""
+
+    def __init__(self):
+        self.ball = Ball(cord=(0, 0), r=1)
+        self.ball.handle = 1
+        self.objects = [self.ball]
+        self.dts = []
+
+    def update(self, dt):
+        self.dts.append(dt)
+        self.ball.x += 8.0
+
+
+def test_accumulator_keeps_leftover():
+    simulator = MovingSimulator()
+    timestep = FixedTimestep(simulator, dt=0.125, max_frame_time=1.0)
+    assert timestep.advance(0.3125) == 2
+    assert timestep.accumulator == 0.0625
+    assert timestep.alpha == 0.5
+    # Остаток с прошлого кадра добирает шаг в следующем
+    assert timestep.advance(0.0625) == 1
+    assert timestep.accumulator == 0.0
+    assert simulator.dts == [0.125] * 3
+
+
+def test_frame_time_cap_and_substeps():
+    simulator = MovingSimulator()
+    timestep = FixedTimestep(simulator, dt=0.125, substeps=4, max_frame_time=0.25)
+    # Долгий стоп GUI: не больше max_frame_time / dt шагов
+    assert timestep.advance(10.0) == 2
+    assert timestep.accumulator == 0.0
+    assert simulator.dts == [0.03125] * 8
+
+
+def test_render_position_interpolates_with_alpha():
+    simulator = MovingSimulator()
+    timestep = FixedTimestep(simulator, dt=0.125, max_frame_time=1.0)
+    ball = simulator.ball
+    assert timestep.render_position(ball) == (ball.x, ball.y)
+    timestep.advance(0.4375)
+    # Три шага по 8 px, alpha = 0.5: середина между вторым и третьим состоянием
+    assert ball.x == 24.0
+    assert timestep.alpha == 0.5
+    assert timestep.render_position(ball) == (pytest.approx(20.0), ball.y)
+    timestep.reset()
+    assert timestep.render_position(ball) == (ball.x, ball.y)
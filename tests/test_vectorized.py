@@ -0,0 +1,42 @@
+"""Движок numpy против скалярного: grid, terrain и pile."""
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from physics.core import PhysicsSimulator  # noqa: E402
+from physics.scenes import grid_scene, pile_scene, terrain_scene  # noqa: E402
+
+STEPS = 200
+# Без цепочек касаний движки расходятся только на округлении (px, px/s)
+EXACT_TOLERANCE = 1e-9
+# В куче касания шар-шар разрешаются в разном порядке: сравнивается центр масс (px)
+PILE_TOLERANCE = 3.0
+
+
+def run(scene, engine, **kwargs):
+    objects, table = scene(**kwargs)
+    simulator = PhysicsSimulator(objects=objects, table_line=table, width=3000, engine=engine)
+    try:
+        for _ in range(STEPS):
+            simulator.update(1 / 60)
+        columns = simulator.state_columns(("x", "y", "vx", "vy"))
+        return np.frombuffer(columns, dtype=float).reshape(4, -1).copy()
+    finally:
+        simulator.close()
+
+
+@pytest.mark.parametrize("scene, kwargs", [
+    (grid_scene, {"cols": 8, "rows": 5}),
+    (terrain_scene, {"cols": 8, "rows": 2, "segments": 50}),
+])
+def test_engines_agree(scene, kwargs):
+    expected = run(scene, "python", **kwargs)
+    actual = run(scene, "numpy", **kwargs)
+    assert np.abs(expected - actual).max() < EXACT_TOLERANCE
+
+
+def test_pile_agrees_in_bulk():
+    expected = run(pile_scene, "python", cols=8, rows=5)
+    actual = run(pile_scene, "numpy", cols=8, rows=5)
+    assert abs(expected[0].mean() - actual[0].mean()) < PILE_TOLERANCE
+    assert abs(expected[1].mean() - actual[1].mean()) < PILE_TOLERANCE